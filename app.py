@@ -1,18 +1,62 @@
-from flask import Flask, render_template, request, jsonify, send_file
-import re
 import time
+_STARTUP_T0 = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
+import re
 import sys
 from typing import List, Dict
 import socket
+import threading
+import io
+import csv
+import zipfile
+from xml.sax.saxutils import escape as xml_escape
+import uuid
+import secrets
+import json
+import sqlite3
+import queue
+import atexit
+import logging
+import logging.handlers
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import unescape
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import urlparse, unquote
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 from datetime import datetime
-import pandas as pd
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import requests
+from requests.adapters import HTTPAdapter
+# Selenium ve openpyxl ilk ihtiyaçta yüklenir (bkz. load_selenium / preload_heavy_modules)
+
+# Başlangıç zamanlaması: aşama -> ms (import, .env, init, tekil kontrol, bind)
+STARTUP_TIMINGS = OrderedDict()
+# Arka planda yüklenen ağır modüller: modül -> ms (kritik yolda değil)
+LAZY_IMPORT_TIMINGS = OrderedDict()
+_startup_last = _STARTUP_T0
+
+def startup_mark(stage: str):
+    """Önceki işaretten bu yana geçen süreyi aşama olarak kaydet"""
+    global _startup_last
+    now = time.perf_counter()
+    STARTUP_TIMINGS[stage] = (now - _startup_last) * 1000
+    _startup_last = now
+
+def startup_report() -> str:
+    """Tek satırlık başlangıç özeti"""
+    parts = [f"{stage} {ms:.0f} ms" for stage, ms in STARTUP_TIMINGS.items()]
+    parts.append(f"toplam {sum(STARTUP_TIMINGS.values()):.0f} ms")
+    line = ' | '.join(parts)
+    if LAZY_IMPORT_TIMINGS:
+        lazy = ', '.join(f"{name} {ms:.0f} ms" for name, ms in LAZY_IMPORT_TIMINGS.items())
+        line += f" (arka plan: {lazy})"
+    return line
+
+startup_mark('import')
 
 # .env dosyasını yükle (PyInstaller uyumlu)
 try:
@@ -36,383 +80,3205 @@ try:
 except ImportError:
     pass
 
+startup_mark('.env')
+
+# Yapılandırılmış log: kayıtlar kuyruğa atılır, yazma işini tek bir arka plan thread'i yapar.
+# İstek yolu hiçbir zaman konsol/dosya I/O'su beklemez; kuyruk doluysa kayıt düşürülür ve sayılır.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').strip().upper()
+# Konsola yaz (Windows EXE'de konsol gizli; kayıtlar /api/debug/logs'tan da okunur)
+LOG_CONSOLE = os.getenv('LOG_CONSOLE', 'True').lower() == 'true'
+# İsteğe bağlı log dosyası (boyutla döner)
+LOG_FILE = os.getenv('LOG_FILE', '').strip()
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# /api/debug/logs için bellekte tutulan son kayıt sayısı
+LOG_BUFFER_SIZE = int(os.getenv('LOG_BUFFER_SIZE', '2000'))
+# Olay bazlı örnekleme: 'search.stages=0.1,search.attempt=0.5' (uyarı ve hatalar örneklenmez)
+LOG_SAMPLE = os.getenv('LOG_SAMPLE', '').strip()
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for pair in filter(None, (p.strip() for p in spec.split(','))):
+        event, _, rate = pair.partition('=')
+        try:
+            rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            pass
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Olay başına örnekleme: oran r ise her 1/r kayıttan biri geçer (deterministik).
+    Oran `extra={'sample': r}` ile çağrıda ya da LOG_SAMPLE ile olay adına verilir.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._seen: Dict[str, int] = {}
+        self.sampled_out: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        event = getattr(record, 'event', '')
+        rate = getattr(record, 'sample', None)
+        if rate is None:
+            rate = self.rates.get(event)
+        if rate is None or rate >= 1.0:
+            return True
+        with self._lock:
+            n = self._seen.get(event, 0)
+            self._seen[event] = n + 1
+            keep = rate > 0 and n % max(1, round(1 / rate)) == 0
+            if not keep:
+                self.sampled_out[event] = self.sampled_out.get(event, 0) + 1
+        return keep
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Kayıt kuyruğa bloklamadan konur; kuyruk doluysa düşürülür (hata yazdırılmaz)"""
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.queued = 0
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Mesaj biçimlendirmesi ve traceback metni dinleyici thread'inde yapılır
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class RingBufferHandler(logging.Handler):
+    """Son kayıtları sıra numarasıyla bellekte tutar (dinleyici thread'inde çalışır)"""
+
+    def __init__(self, capacity: int):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.seq = 0
+
+    def emit(self, record):
+        try:
+            self.seq += 1
+            entry = {
+                'seq': self.seq,
+                'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                'level': record.levelname,
+                'event': getattr(record, 'event', '') or record.name,
+                'message': record.getMessage(),
+                'thread': record.threadName,
+            }
+            fields = getattr(record, 'fields', None)
+            if fields:
+                entry['fields'] = fields
+            if record.exc_info:
+                entry['exception'] = logging.Formatter().formatException(record.exc_info)
+            self.records.append(entry)
+        except Exception:
+            self.handleError(record)
+
+    def query(self, since: int = 0, level: int = logging.NOTSET, event: str = '', limit: int = 200) -> List[Dict]:
+        entries = [
+            e for e in list(self.records)
+            if e['seq'] > since and logging.getLevelName(e['level']) >= level and e['event'].startswith(event)
+        ]
+        return entries[-limit:] if limit else entries
+
+
+log = logging.getLogger('hb')
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+log_buffer = RingBufferHandler(LOG_BUFFER_SIZE)
+log_sampler = SamplingFilter(parse_sample_rates(LOG_SAMPLE))
+log_queue_handler = NonBlockingQueueHandler(log_queue)
+log_queue_handler.addFilter(log_sampler)
+
+
+def _log_handlers() -> List[logging.Handler]:
+    """Dinleyici thread'inde çalışan çıktı handler'ları"""
+    handlers = [log_buffer]
+    if LOG_CONSOLE and sys.stdout is not None:
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter('%(message)s'))
+        handlers.append(console)
+    if LOG_FILE:
+        try:
+            file_handler = logging.handlers.RotatingFileHandler(LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8')
+            file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(threadName)s %(message)s'))
+            handlers.append(file_handler)
+        except OSError as e:
+            sys.stderr.write(f"⚠️ Log dosyası açılamadı: {e}\n")
+    return handlers
+
+
+# Fork sonrası (gunicorn) modül yeniden yüklenince üst sürecin handler'ları atılır
+for _handler in list(log.handlers):
+    log.removeHandler(_handler)
+log.addHandler(log_queue_handler)
+log.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+log.propagate = False
+log_listener = logging.handlers.QueueListener(log_queue, *_log_handlers(), respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+
+def log_event(level: int, event: str, message: str, *args, sample: float = None, exc_info=None, **fields):
+    """Yapılandırılmış kayıt: `event` olay adı (örnekleme/filtre), `fields` ek alanlar.
+    Mesaj `%` argümanlarıyla verilir; biçimlendirme dinleyici thread'inde yapılır.
+    """
+    if log.isEnabledFor(level):
+        log.log(level, message, *args, exc_info=exc_info,
+                extra={'event': event, 'fields': fields or None, 'sample': sample})
+
+
+def log_stats() -> Dict:
+    return {
+        'level': logging.getLevelName(log.level),
+        'queued': log_queue_handler.queued,
+        'dropped': log_queue_handler.dropped,
+        'pending': log_queue.qsize(),
+        'sampled_out': dict(log_sampler.sampled_out),
+        'buffered': len(log_buffer.records),
+        'buffer_size': log_buffer.records.maxlen,
+        'last_seq': log_buffer.seq,
+    }
+
+
 app = Flask(__name__)
-app.secret_key = 'hepsiburada_secret_key_2024'
+# İstek gövdesi üst sınırı (MB): aşan yüklemeler okunmadan 413 ile reddedilir
+app.config['MAX_CONTENT_LENGTH'] = int(float(os.getenv('MAX_UPLOAD_MB', '16')) * 1024 * 1024)
 
 # Google Sheets ayarları (.env'den oku)
 GOOGLE_SHEET_URL = os.getenv('GOOGLE_SHEET_URL', '')
 DEVELOPMENT_MODE = os.getenv('DEVELOPMENT_MODE', 'False').lower() == 'true'
 
-def get_password_from_sheet():
-    """Google Sheets'ten B5 hücresindeki şifreyi al (EXE uyumlu ve dayanıklı)."""
-    if DEVELOPMENT_MODE:
-        return None
+# Şifre cache'i: login'ler cache'ten, yenileme arka planda koşullu istekle
+PASSWORD_CACHE_TTL = float(os.getenv('PASSWORD_CACHE_TTL', '60'))
+# Bundan eski şifre kullanılmaz, login senkron olarak yeniden okur (sn)
+PASSWORD_MAX_STALE = float(os.getenv('PASSWORD_MAX_STALE', '900'))
+# Yanlış şifrede (şifre yeni değişmiş olabilir) en sık bu aralıkla kaynağı yeniden kontrol et
+PASSWORD_RECHECK_INTERVAL = float(os.getenv('PASSWORD_RECHECK_INTERVAL', '5'))
+# Google Sheets yerine yerel CSV dosyası (test/çevrimdışı)
+PASSWORD_CSV = os.getenv('PASSWORD_CSV', '').strip()
 
+def sheet_csv_url() -> str:
+    """GOOGLE_SHEET_URL / SHEET_ID'den CSV export URL'si oluştur"""
     sheet_id = os.getenv('SHEET_ID', '').strip()
     sheet_url = os.getenv('GOOGLE_SHEET_URL', '').strip()
 
-    # CSV URL oluştur
-    csv_url = ''
     if sheet_url:
         if '/export?format=csv' in sheet_url:
-            csv_url = sheet_url
-        else:
-            csv_url = sheet_url.replace('/edit?gid=', '/export?format=csv&gid=')
-            csv_url = csv_url.replace('/edit#gid=', '/export?format=csv&gid=')
-            if 'export?format=csv' not in csv_url:
-                csv_url = sheet_url.rstrip('/') + '/export?format=csv'
-    elif sheet_id:
-        csv_url = f'https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv'
+            return sheet_url
+        csv_url = sheet_url.replace('/edit?gid=', '/export?format=csv&gid=')
+        csv_url = csv_url.replace('/edit#gid=', '/export?format=csv&gid=')
+        if 'export?format=csv' not in csv_url:
+            csv_url = sheet_url.rstrip('/') + '/export?format=csv'
+        return csv_url
+    if sheet_id:
+        return f'https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv'
+    return ''
+
+def parse_password_csv(text: str):
+    """CSV'den B5 hücresini oku; B5 yoksa son satırın 2. sütunu"""
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows:
+        log_event(logging.WARNING, 'password.csv', '⚠️ Sheets CSV boş döndü')
+        return None
+    if len(rows) >= 5 and len(rows[4]) >= 2:
+        password = rows[4][1]
     else:
-        print('⚠️ Ne GOOGLE_SHEET_URL ne de SHEET_ID tanımlı.')
+        last = rows[-1]
+        password = last[1] if len(last) >= 2 else ''
+    password = (password or '').strip().strip('"')
+    if not password:
+        log_event(logging.WARNING, 'password.csv', '⚠️ Sheets B sütununda şifre bulunamadı')
         return None
+    return password
 
-    # requests ile CSV çek (EXE'de daha stabil)
-    try:
-        import requests, csv, io
-        resp = requests.get(csv_url, timeout=8)
-        resp.raise_for_status()
-        reader = csv.reader(io.StringIO(resp.text))
-        rows = list(reader)
-        if not rows:
-            print('⚠️ Sheets CSV boş döndü')
+
+class PasswordCache:
+    """Giriş şifresini TTL ile cache'le, kaynağı koşullu isteklerle yenile.
+
+    Taze (TTL içinde) değer doğrudan döner. TTL dolmuş ama `max_stale`
+    içindeki değer de hemen döner, yenileme arka planda başlatılır. Değer
+    yoksa ya da `max_stale`'den eskiyse login senkron olarak okur. HTTP
+    kaynakta ETag/Last-Modified ile koşullu istek yapılır (304 = değişmedi);
+    yerel CSV'de (PASSWORD_CSV) dosyanın mtime/boyutu karşılaştırılır.
+    """
+
+    def __init__(self, ttl: float = PASSWORD_CACHE_TTL, max_stale: float = PASSWORD_MAX_STALE,
+                 recheck_interval: float = PASSWORD_RECHECK_INTERVAL):
+        self.ttl = ttl
+        self.max_stale = max(max_stale, ttl)
+        self.recheck_interval = recheck_interval
+        self.password = None
+        self.validated_at = 0.0  # Son başarılı kontrol (200 veya 304)
+        self.attempted_at = 0.0
+        self._validators = {}  # etag, last_modified, file_stat, digest
+        self._session = None
+        self._refresh_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.fetches = 0
+        self.not_modified = 0
+        self.failures = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.sync_loads = 0
+
+    def source(self) -> str:
+        return PASSWORD_CSV or sheet_csv_url()
+
+    def _read(self, source: str):
+        """Kaynağı oku: değişmediyse None, değiştiyse CSV metni. Hata fırlatabilir."""
+        if not source.startswith(('http://', 'https://')):
+            path = source[7:] if source.startswith('file://') else source
+            st = os.stat(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == self._validators.get('file_stat'):
+                return None
+            with open(path, encoding='utf-8-sig') as f:
+                text = f.read()
+            self._validators['file_stat'] = stamp
+            return text
+
+        if self._session is None:
+            self._session = requests.Session()
+        headers = {}
+        if self._validators.get('etag'):
+            headers['If-None-Match'] = self._validators['etag']
+        if self._validators.get('last_modified'):
+            headers['If-Modified-Since'] = self._validators['last_modified']
+        resp = self._session.get(source, headers=headers, timeout=8)
+        if resp.status_code == 304:
             return None
-        # B5 (5. satır, 2. sütun) yoksa son satırın 2. sütunu
-        if len(rows) >= 5 and len(rows[4]) >= 2:
-            password = rows[4][1]
-        else:
-            last = rows[-1]
-            password = last[1] if len(last) >= 2 else ''
-        password = (password or '').strip().strip('"')
-        if not password:
-            print('⚠️ Sheets B sütununda şifre bulunamadı')
+        resp.raise_for_status()
+        self._validators['etag'] = resp.headers.get('ETag')
+        self._validators['last_modified'] = resp.headers.get('Last-Modified')
+        # Doğrulayıcı göndermeyen sunucular için içerik özeti
+        digest = hash(resp.content)
+        if digest == self._validators.get('digest') and self.password is not None:
             return None
-        print('✅ Şifre Google Sheets\'ten alındı')
-        return password
-    except Exception as e:
-        print(f'❌ Google Sheets isteği başarısız: {e}')
+        self._validators['digest'] = digest
+        return resp.text
+
+    def refresh(self, wait: bool = True) -> bool:
+        """Kaynağı bir kez (koşullu) oku. Başka bir yenileme sürüyorsa
+        wait=True onun bitmesini bekler, wait=False hemen döner.
+        """
+        if not self._refresh_lock.acquire(blocking=wait):
+            return False
+        try:
+            source = self.source()
+            self.attempted_at = time.time()
+            if not source:
+                log_event(logging.WARNING, 'password.config', '⚠️ Ne GOOGLE_SHEET_URL ne de SHEET_ID tanımlı.')
+                return False
+            try:
+                text = self._read(source)
+            except Exception as e:
+                with self._lock:
+                    self.failures += 1
+                log_event(logging.ERROR, 'password.fetch', '❌ Google Sheets isteği başarısız: %s', e)
+                return False
+            with self._lock:
+                self.fetches += 1
+                if text is None:
+                    self.not_modified += 1
+                else:
+                    password = parse_password_csv(text)
+                    if password is None:
+                        return False
+                    if self.password is None:
+                        log_event(logging.INFO, 'password.loaded', "✅ Şifre Google Sheets'ten alındı")
+                    elif password != self.password:
+                        log_event(logging.INFO, 'password.changed', '🔑 Şifre değişti, cache güncellendi')
+                    self.password = password
+                self.validated_at = time.time()
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_async(self):
+        threading.Thread(target=self.refresh, kwargs={'wait': False}, daemon=True).start()
+
+    def get(self):
+        """Login için şifre: taze ya da sınırlı ölçüde bayat cache, gerekirse senkron okuma"""
+        with self._lock:
+            password = self.password
+            age = time.time() - self.validated_at
+        if password is not None and age <= self.ttl:
+            with self._lock:
+                self.hits += 1
+            return password
+        if password is not None and age <= self.max_stale:
+            with self._lock:
+                self.stale_hits += 1
+            self._refresh_async()
+            return password
+        with self._lock:
+            self.sync_loads += 1
+        self.refresh()
+        with self._lock:
+            if self.password is not None and time.time() - self.validated_at <= self.max_stale:
+                return self.password
         return None
 
-# NOT: CORRECT_PASSWORD kullanılmıyor, her login'de dinamik olarak alınıyor
+    def recheck(self):
+        """Yanlış şifre girildiğinde: şifre yeni değişmiş olabilir, sınırlı sıklıkla yeniden oku"""
+        if time.time() - self.attempted_at >= self.recheck_interval:
+            self.refresh()
+        return self.get()
 
-class HepsiburadaScraper:
-    """Hepsiburada scraper - Web için"""
-    
-    def __init__(self):
-        self.driver = None
-        # Driver'ı başlangıçta açma, ilk kullanımda açılacak (lazy init)
-    
-    def _setup_driver(self):
-        """Chrome driver'ı kur - Hızlandırılmış ve optimize edilmiş"""
-        if self.driver:
-            return  # Driver zaten var, yeniden oluşturma
-        
-        options = Options()
-        options.add_argument("--headless=new")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-images")
-        options.add_argument("--disable-plugins")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-software-rasterizer")
-        options.add_argument("--disable-background-timer-throttling")
-        options.add_argument("--disable-renderer-backgrounding")
-        options.add_argument("--disable-backgrounding-occluded-windows")
-        options.add_argument("--window-size=1280,800")
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-        
-        # Hızlandırma için yeni eklemeler
-        options.add_argument("--disable-notifications")
-        options.add_argument("--disable-web-security")
-        options.add_argument("--disable-features=IsolateOrigins,site-per-process")
-        options.add_argument("--disable-site-isolation-trials")
-        options.add_argument("--disable-remote-fonts")
-        options.add_argument("--disable-smooth-scrolling")
-        options.add_argument("--disable-css-animations")
-        
+    def start(self):
+        """Açılışta hemen oku, sonra TTL aralıklarıyla arka planda yenile"""
+        if self._thread:
+            return
+        def loop():
+            self.refresh(wait=False)
+            while not self._stop.wait(self.ttl):
+                self.refresh(wait=False)
+        self._thread = threading.Thread(target=loop, name='password-refresh', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'source': 'csv' if PASSWORD_CSV else 'sheets',
+                'loaded': self.password is not None,
+                'age': (time.time() - self.validated_at) if self.validated_at else None,
+                'ttl': self.ttl,
+                'max_stale': self.max_stale,
+                'fetches': self.fetches,
+                'not_modified': self.not_modified,
+                'failures': self.failures,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'sync_loads': self.sync_loads,
+            }
+
+
+password_cache = PasswordCache()
+
+def get_password_from_sheet():
+    """Google Sheets'teki (B5) şifreyi cache üzerinden al; geliştirme modunda None."""
+    if DEVELOPMENT_MODE:
+        return None
+    return password_cache.get()
+
+# NOT: CORRECT_PASSWORD kullanılmıyor, şifre password_cache üzerinden alınıyor
+
+def load_selenium():
+    """Selenium'u ilk driver açılışında yükle; giriş sayfası beklemeden sunulur"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    return webdriver, Options, Service
+
+def preload_heavy_modules():
+    """Sunucu dinlemeye başladıktan sonra ağır modülleri arka planda ısıt"""
+    def _selenium():
+        webdriver, _, _ = load_selenium()
+        return webdriver.Chrome  # selenium 4'te Chrome sınıfı erişimde yüklenir
+
+    def _openpyxl():
+        import openpyxl
+        return openpyxl
+
+    for name, loader in (('selenium', _selenium), ('openpyxl', _openpyxl)):
+        started = time.perf_counter()
         try:
-            # EXE içinde dosya yolu sorunu için düzeltme
-            if getattr(sys, 'frozen', False):
-                # EXE modda
-                chromedriver_path = os.path.join(sys._MEIPASS, 'chromedriver.exe')
-            else:
-                # Normal modda
-                chromedriver_path = 'chromedriver.exe'
-            
-            service = Service(chromedriver_path)
-            self.driver = webdriver.Chrome(service=service, options=options)
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            self.driver.set_page_load_timeout(15)  # EXE için daha uzun timeout
-            self.driver.implicitly_wait(3)  # EXE için implicit wait
-            print("✅ Chrome driver hazırlandı (optimize edilmiş)")
+            loader()
         except Exception as e:
-            print(f"Driver hatası: {e}")
-            self.driver = None
+            log_event(logging.WARNING, 'startup.preload', '⚠️ %s ön yüklemesi başarısız: %s', name, e)
+            continue
+        LAZY_IMPORT_TIMINGS[name] = (time.perf_counter() - started) * 1000
 
-    def get_html_content(self, search_term: str) -> str:
-        """Hepsiburada'dan arama yapıp HTML içeriğini al - EXE için optimize"""
-        # Driver yoksa oluştur (lazy initialization)
-        if not self.driver:
-            print("🚀 ChromeDriver başlatılıyor...")
-            self._setup_driver()
-        
-        if not self.driver:
-            print("❌ Driver oluşturulamadı")
-            return ""
-        
-        max_retries = 3  # EXE için daha fazla deneme
-        
-        for attempt in range(max_retries):
-            try:
-                
-                search_url = f"https://www.hepsiburada.com/ara?q={search_term}"
-                print(f"🔍 Deneme {attempt + 1}/{max_retries}: {search_url}")
-                
-                self.driver.get(search_url)
+# Driver havuzu ayarları (.env'den oku)
+DRIVER_POOL_SIZE = max(1, int(os.getenv('DRIVER_POOL_SIZE', '2')))
+DRIVER_POOL_TIMEOUT = float(os.getenv('DRIVER_POOL_TIMEOUT', '30'))
+DRIVER_MAX_FAILURES = max(1, int(os.getenv('DRIVER_MAX_FAILURES', '2')))
+# Açılışta arka planda hazırlanan driver sayısı (0 = kapalı)
+DRIVER_PREWARM = max(0, int(os.getenv('DRIVER_PREWARM', '1')))
+# Driver yenileme eşikleri: navigasyon sayısı, Chrome süreç ağacı RSS (MB, psutil gerekir)
+DRIVER_MAX_NAVIGATIONS = int(os.getenv('DRIVER_MAX_NAVIGATIONS', '200'))
+DRIVER_MAX_RSS_MB = float(os.getenv('DRIVER_MAX_RSS_MB', '1024'))
+# Boştaki driver'ların canlılık kontrolü aralığı (sn, 0 = kapalı)
+DRIVER_WATCHDOG_INTERVAL = float(os.getenv('DRIVER_WATCHDOG_INTERVAL', '60'))
 
-                # Sayfanın tamamen yüklenmesini bekle
-                wait = WebDriverWait(self.driver, 8)
-                wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                
-                # Ürün kartlarının yüklenmesi için bekle
-                time.sleep(1)
-                
-                # Sayfayı kaydır - JavaScript ile yüklenen içerik için
-                self.driver.execute_script("window.scrollTo(0, 500);")
-                time.sleep(0.3)
-                
-                self.driver.execute_script("window.scrollTo(0, 1000);")
-                time.sleep(0.3)
-                
-                html_content = self.driver.page_source
-                
-                if len(html_content) > 1000:  # HTML içerik yeterli
-                    print(f"✅ HTML başarıyla alındı: {len(html_content)} karakter")
-                    return html_content
-                else:
-                    print(f"⚠️ HTML içeriği çok kısa: {len(html_content)} karakter")
-                    
-            except Exception as e:
-                print(f"❌ Hata (Deneme {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    print(f"🔄 {2} saniye bekleyip tekrar deneniyor...")
-                    time.sleep(2)
-                else:
-                    print(f"❌ Tüm denemeler başarısız oldu")
-                    return ""
-        
-        return ""
+# HTTP öncelikli arama ayarları: önce düz HTTP, kart yoksa Selenium
+HB_BASE_URL = os.getenv('HB_BASE_URL', 'https://www.hepsiburada.com').rstrip('/')
+HB_HTTP_FIRST = os.getenv('HB_HTTP_FIRST', 'True').lower() == 'true'
+HB_HTTP_TIMEOUT = float(os.getenv('HB_HTTP_TIMEOUT', '6'))
+# Sayfa başına en fazla okunacak ürün kartı (0 = sınırsız). Varsayılan, hazır olma hedefiyle
+# aynı (bir sonuç sayfası): bu sayıya ulaşınca tarama sayfanın kalanını okumadan durur
+HB_MAX_CARDS = int(os.getenv('HB_MAX_CARDS', os.getenv('HB_READY_TARGET', '24')))
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
+}
 
-    def clean_stock_code(self, stock_code: str) -> str:
-        """Stok kodunu temizle - sadece % işaretine kadar olan kısmı al"""
-        if not stock_code or stock_code == "Bulunamadı":
-            return stock_code
-        
-        # URL encoding'i decode et
-        if '%' in stock_code:
-            stock_code = stock_code.split('%')[0]
-        
-        return stock_code
 
-    def parse_products(self, html_content: str) -> List[Dict]:
-        """HTML içeriğinden ürün bilgilerini parse et"""
-        products = []
+# Sayfa hazır olma (readiness) ayarları
+HB_READY_TARGET = int(os.getenv('HB_READY_TARGET', '24'))
+READY_TIMEOUT = float(os.getenv('READY_TIMEOUT', '8'))
+READY_POLL_INTERVAL = float(os.getenv('READY_POLL_INTERVAL', '0.1'))
 
-        selectors = [
-            r'<article class="productCard-module_article__[^"]*"[^>]*>(.*?)</article>',
-            r'<article[^>]*class="[^"]*productCard[^"]*"[^>]*>(.*?)</article>',
-            r'<div[^>]*class="[^"]*product-card[^"]*"[^>]*>(.*?)</div>',
-            r'<li[^>]*class="[^"]*product[^"]*"[^>]*>(.*?)</li>'
-        ]
 
-        product_cards = []
-        for selector in selectors:
-            cards = re.findall(selector, html_content, re.DOTALL)
-            if cards:
-                product_cards = cards
-                print(f"🔍 Bulunan ürün kartı sayısı: {len(product_cards)}")
+class Histogram:
+    """Basit kümülatif histogram (saniye) - thread-safe"""
+
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, le in enumerate(self.buckets):
+                if value <= le:
+                    self._counts[i] += 1
+                    break
+
+    def snapshot(self) -> Dict:
+        """Kümülatif kova sayıları (Prometheus `le` mantığı)"""
+        with self._lock:
+            cumulative, running = {}, 0
+            for le, c in zip(self.buckets, self._counts):
+                running += c
+                cumulative[le] = running
+            return {'buckets': cumulative, 'count': self.count, 'sum': self.sum}
+
+
+# Arama aşaması histogram kovaları (saniye): parse/json milisaniye altı, navigate saniyeler
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0)
+
+
+class SearchMetrics:
+    """Arama başına aşama süreleri ve sayaçlar (/api/metrics için).
+
+    Aşamalar: acquire (havuzdan driver alma, lazy açılış dahil),
+    driver_start (yeni Chrome açılışı), http_fetch, navigate (driver.get),
+    ready_wait (sayfa hazır olma beklemesi, kaydırmalar dahil), scroll,
+    page_source, parse, json ve total. Her aşama site bazında histograma
+    yazılır; begin()/finish() arasında aynı thread'deki aşamalar ayrıca
+    toplanıp arama bitince tek satırda yazdırılır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stages: Dict[tuple, Histogram] = {}
+        self.searches: Dict[tuple, int] = {}
+        self.html_bytes: Dict[str, int] = {}
+        self.cards: Dict[str, int] = {}
+        self.selectors: Dict[str, int] = {}
+        self.retries = 0
+
+    @contextmanager
+    def stage(self, name: str, site: str = 'hepsiburada'):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, site)
+
+    def observe(self, name: str, seconds: float, site: str = 'hepsiburada'):
+        key = (site, name)
+        hist = self.stages.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self.stages.setdefault(key, Histogram(STAGE_BUCKETS))
+        hist.observe(seconds)
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace[name] = trace.get(name, 0.0) + seconds
+
+    def begin(self):
+        """Bu thread'de yeni bir arama dökümü başlat"""
+        self._local.trace = OrderedDict()
+        self._local.started = time.perf_counter()
+
+    def finish(self, path: str, outcome: str, cards: int = 0):
+        """Aramayı sayaçlara yaz ve aşama dökümünü yazdır"""
+        trace = getattr(self._local, 'trace', None)
+        self._local.trace = None
+        if trace is None:
+            return
+        total = time.perf_counter() - self._local.started
+        self.observe('total', total)
+        with self._lock:
+            self.searches[(path, outcome)] = self.searches.get((path, outcome), 0) + 1
+            self.cards[path] = self.cards.get(path, 0) + cards
+        parts = [f"{name} {seconds * 1000:.0f} ms" for name, seconds in trace.items()]
+        log_event(logging.INFO, 'search.stages', '⏱️ Arama (%s, %s): %s | toplam %.0f ms', path, outcome, ' | '.join(parts),
+                  total * 1000, path=path, outcome=outcome, cards=cards, total_ms=round(total * 1000, 1),
+                  stages={name: round(seconds * 1000, 1) for name, seconds in trace.items()})
+
+    def record_html(self, path: str, size: int):
+        with self._lock:
+            self.html_bytes[path] = self.html_bytes.get(path, 0) + size
+
+    def record_selector(self, selector: str):
+        with self._lock:
+            self.selectors[selector] = self.selectors.get(selector, 0) + 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stages = dict(self.stages)
+            data = {
+                'searches': [{'path': p, 'outcome': o, 'count': n} for (p, o), n in self.searches.items()],
+                'html_bytes': dict(self.html_bytes),
+                'cards': dict(self.cards),
+                'selectors': dict(self.selectors),
+                'retries': self.retries,
+            }
+        data['stages'] = [{'site': site, 'stage': name, **hist.snapshot()} for (site, name), hist in stages.items()]
+        return data
+
+
+search_metrics = SearchMetrics()
+
+
+class ReadinessStrategy:
+    """Bir sayfanın ne zaman 'hazır' sayılacağının tarifi.
+
+    `count_script` sayfadaki hedef öğe sayısını döndüren JavaScript'tir.
+    Sayı `target_count`'a ulaşınca ya da art arda `stable_polls` yoklamada
+    büyümeyi bırakınca sayfa hazırdır. `scroll_steps` ilk yoklamalarda
+    sırayla uygulanır (lazy-load içerik için). `empty_grace` saniye boyunca
+    hiç öğe çıkmazsa sayfa boş (sonuçsuz) kabul edilir.
+    """
+
+    def __init__(self, name: str, count_script: str, target_count: int,
+                 stable_polls: int = 2, scroll_steps=(), timeout: float = READY_TIMEOUT,
+                 empty_grace: float = 2.0):
+        self.name = name
+        self.empty_grace = empty_grace
+        self.count_script = count_script
+        self.target_count = target_count
+        self.stable_polls = stable_polls
+        self.scroll_steps = tuple(scroll_steps)
+        self.timeout = timeout
+
+
+HB_READINESS = ReadinessStrategy(
+    'hepsiburada',
+    "return document.querySelectorAll("
+    "'article[class*=\"productCard\"], div[class*=\"product-card\"], li[class*=\"product\"]').length;",
+    target_count=HB_READY_TARGET,
+    scroll_steps=(500, 1000),
+)
+
+GOOGLE_READINESS = ReadinessStrategy(
+    'google',
+    "return document.querySelectorAll('h3').length;",
+    target_count=8,
+    scroll_steps=(600, 1200),
+    empty_grace=1.5,
+)
+
+
+class ReadinessEngine:
+    """Sabit sleep yerine koşul tabanlı bekleme + time-to-ready histogramları"""
+
+    def __init__(self, poll_interval: float = READY_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.histograms: Dict[str, Histogram] = {}
+        self.outcomes: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, driver, strategy: ReadinessStrategy, cancel: threading.Event = None) -> int:
+        """Sayfa hazır olana kadar bekle, bulunan öğe sayısını döndür.
+        `cancel` set edilirse yoklama hemen bırakılır (outcome 'cancelled').
+        """
+        started = time.perf_counter()
+        deadline = started + strategy.timeout
+        steps = list(strategy.scroll_steps)
+        last_count, stable, count = -1, 0, 0
+        outcome = 'timeout'
+
+        while True:
+            count = int(driver.execute_script(strategy.count_script) or 0)
+            if count >= strategy.target_count:
+                outcome = 'target'
+                break
+            if count > 0 and count == last_count:
+                stable += 1
+                if stable >= strategy.stable_polls and not steps:
+                    outcome = 'stable'
+                    break
+            else:
+                stable = 0
+            if count == 0 and time.perf_counter() - started >= strategy.empty_grace:
+                outcome = 'empty'
                 break
+            last_count = count
 
-        if not product_cards:
-            print("❌ Ürün kartı bulunamadı")
-            return products
+            if steps:
+                with search_metrics.stage('scroll', strategy.name):
+                    driver.execute_script(f"window.scrollTo(0, {steps.pop(0)});")
+            if time.perf_counter() + self.poll_interval > deadline:
+                break
+            if cancel is None:
+                time.sleep(self.poll_interval)
+            elif cancel.wait(self.poll_interval):
+                outcome = 'cancelled'
+                break
 
-        for card_html in product_cards:
-            product = {}
+        self._record(strategy.name, outcome, time.perf_counter() - started)
+        return count
+
+    def _record(self, name: str, outcome: str, elapsed: float):
+        with self._lock:
+            hist = self.histograms.setdefault(name, Histogram())
+            counts = self.outcomes.setdefault(name, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+        hist.observe(elapsed)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            names = list(self.histograms)
+        return {
+            name: {'time_to_ready': self.histograms[name].snapshot(), 'outcomes': dict(self.outcomes[name])}
+            for name in names
+        }
+
+
+readiness = ReadinessEngine()
+
+
+# Ağ seviyesinde kaynak engelleme (DevTools Network.setBlockedURLs)
+BLOCK_RESOURCES = os.getenv('BLOCK_RESOURCES', 'True').lower() == 'true'
+
+
+def _env_patterns(name: str) -> List[str]:
+    return [p.strip() for p in os.getenv(name, '').split(',') if p.strip()]
+
+
+class ResourceBlocker:
+    """Site bazlı URL engelleme listesi ve sayfa başına trafik ölçümü.
+
+    Görseller, fontlar, medya, reklam ve izleme scriptleri tarayıcı ağ
+    katmanında engellenir. Liste her gezinmeden önce hedef siteye göre
+    uygulanır; `HB_BLOCKED_URLS` / `GOOGLE_BLOCKED_URLS` ile genişletilebilir.
+    """
+
+    COMMON = [
+        '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.mp4', '*.webm', '*.mp3',
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*googlesyndication.com*', '*facebook.net*', '*facebook.com/tr*',
+        '*hotjar.com*', '*criteo.*', '*adservice.*',
+    ]
+    SITES = {
+        'hepsiburada': [
+            '*productimages.hepsiburada.net*', '*images.hepsiburada.net*',
+            '*useinsider.com*', '*segmentify.com*', '*nr-data.net*',
+        ] + _env_patterns('HB_BLOCKED_URLS'),
+        'google': [
+            '*gstatic.com/images*', '*encrypted-tbn*', '*googleusercontent.com*',
+        ] + _env_patterns('GOOGLE_BLOCKED_URLS'),
+    }
+    # Ağ trafiği CDP Network olaylarından (performance logu) ölçülür. Resource Timing'in
+    # transferSize değeri Timing-Allow-Origin olmayan çapraz kaynaklarda 0'dır ve
+    # engellenen istekleri hiç göstermez.
+    TRAFFIC_EVENTS = ('Network.requestWillBeSent', 'Network.loadingFinished', 'Network.loadingFailed')
+
+    def __init__(self, enabled: bool = BLOCK_RESOURCES):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.traffic: Dict[str, Dict[str, int]] = {}
+
+    def patterns(self, site: str) -> List[str]:
+        return self.COMMON + self.SITES.get(site, [])
+
+    def configure(self, options):
+        """Chrome seçenekleri: Network olaylarını performance loguna yazdır"""
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    def prepare(self, driver):
+        """Yeni driver'da ağ alanını etkinleştir"""
+        driver.execute_cdp_cmd('Network.enable', {})
+
+    @staticmethod
+    def _network_events(driver):
+        """Son okumadan beri biriken CDP Network olayları (log okununca boşalır)"""
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            if message.get('method') in ResourceBlocker.TRAFFIC_EVENTS:
+                yield message['method'], message.get('params', {})
+
+    def apply(self, driver, site: str):
+        """Gezinmeden önce hedef sitenin engelleme listesini uygula"""
+        # Önceki (ölçülmemiş) gezinmelerin olayları bu sayfaya sayılmasın
+        try:
+            for _ in self._network_events(driver):
+                pass
+        except Exception:
+            pass
+        if getattr(driver, '_blocked_site', None) == site:
+            return
+        patterns = self.patterns(site) if self.enabled else []
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        driver._blocked_site = site
+
+    def record_traffic(self, driver, site: str) -> Dict[str, int]:
+        """Son gezinmede gönderilen istek, ağdan gelen bayt (encodedDataLength) ve
+        engellenen istek sayısını kaydet. Engellenenlerin boyutu bilinemez, ayrı sayılır.
+        """
+        requests_count = transferred = blocked = 0
+        try:
+            for method, params in self._network_events(driver):
+                if method == 'Network.requestWillBeSent':
+                    requests_count += 1
+                elif method == 'Network.loadingFinished':
+                    transferred += int(params.get('encodedDataLength') or 0)
+                elif params.get('blockedReason'):
+                    blocked += 1
+        except Exception:
+            return {}
+        with self._lock:
+            t = self.traffic.setdefault(site, {'pages': 0, 'requests': 0, 'bytes': 0, 'blocked': 0})
+            t['pages'] += 1
+            t['requests'] += requests_count
+            t['bytes'] += transferred
+            t['blocked'] += blocked
+        return {'requests': requests_count, 'bytes': transferred, 'blocked': blocked}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'sites': {
+                    site: dict(t, avg_requests=t['requests'] / t['pages'], avg_bytes=t['bytes'] / t['pages'],
+                               avg_blocked=t['blocked'] / t['pages'])
+                    for site, t in self.traffic.items() if t['pages']
+                },
+            }
+
+
+resource_blocker = ResourceBlocker()
+
+
+class SearchCancelled(Exception):
+    """Arama işi iptal edildi (ör. aynı oturumdan daha yeni bir arama geldi)"""
+
+
+class PooledDriver:
+    """Havuzdaki tek bir Chrome driver'ı ve sağlık durumu"""
+
+    def __init__(self, slot_id: int, driver):
+        self.slot_id = slot_id
+        self.driver = driver
+        self.created_at = time.time()
+        self.uses = 0
+        self.failures = 0  # Art arda başarısız kullanım sayısı
+        self.total_failures = 0
+        self.navigations = 0
+        self.rss_mb = None  # Son watchdog ölçümü
+        self.dead = False  # Canlılık kontrolü başarısız
+
+    def navigate(self, url: str):
+        self.navigations += 1
+        self.driver.get(url)
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        self.total_failures += 1
+
+    @property
+    def healthy(self) -> bool:
+        return self.driver is not None and not self.dead and self.failures < DRIVER_MAX_FAILURES
+
+    def recycle_reason(self):
+        """Driver yenilenmeli mi? Nedeni döner, gerekmiyorsa None"""
+        if self.driver is None or self.dead:
+            return 'yanıt vermiyor'
+        if self.failures >= DRIVER_MAX_FAILURES:
+            return 'ardışık hata'
+        if DRIVER_MAX_NAVIGATIONS > 0 and self.navigations >= DRIVER_MAX_NAVIGATIONS:
+            return 'navigasyon limiti'
+        if DRIVER_MAX_RSS_MB > 0 and self.rss_mb is not None and self.rss_mb >= DRIVER_MAX_RSS_MB:
+            return 'bellek limiti'
+        return None
+
+    def probe(self) -> bool:
+        """Ucuz canlılık kontrolü: sayfa yüklemeden tek bir script çalıştır"""
+        try:
+            alive = self.driver.execute_script('return 1') == 1
+        except Exception:
+            alive = False
+        self.dead = not alive
+        return alive
+
+    def measure_rss(self):
+        """chromedriver + Chrome alt süreçlerinin toplam RSS'i (MB); psutil yoksa None"""
+        try:
+            import psutil
+        except ImportError:
+            return None
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            total = 0
+            for proc in [root] + root.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+        except Exception:
+            return None
+        self.rss_mb = total / (1024 * 1024)
+        return self.rss_mb
+
+    def quit(self):
+        try:
+            if self.driver:
+                self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+
+
+class DriverPool:
+    """Headless Chrome driver havuzu - checkout/checkin ile paralel arama.
+
+    Driver'lar ilk ihtiyaçta ya da prewarm() ile arka planda açılır, en fazla
+    `size` adet. Boş driver yoksa istek kuyrukta bekler. Yenilenmesi gereken
+    driver'lar (hata, navigasyon/bellek limiti, canlılık) iade edilirken
+    havuzdan çıkarılır; kapatma ve yerine yenisini açma arka planda yapılır,
+    bekleyen istekler bundan etkilenmez.
+    """
+
+    def __init__(self, factory, size: int = DRIVER_POOL_SIZE, timeout: float = DRIVER_POOL_TIMEOUT):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._slots: Dict[int, PooledDriver] = {}
+        self._creating = 0
+        self._next_id = 0
+        self._closed = False
+        # Kuyruk metrikleri
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+        self.create_failures = 0
+        self.discarded = 0
+        self.waiting = 0
+        # Arka plan hazırlama ve watchdog
+        self.warm_target = 0
+        self._warming = 0
+        self.prewarmed = 0
+        self.recycled: Dict[str, int] = {}
+        self.probes = 0
+        self.probe_failures = 0
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def acquire(self, timeout: float = None, cancel: threading.Event = None):
+        """Boş bir driver al; süre dolarsa veya driver açılamazsa None döner.
+        Kuyrukta beklerken `cancel` set edilirse SearchCancelled fırlatır.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        deadline = started + timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                if cancel is not None and cancel.is_set():
+                    raise SearchCancelled()
+                if self._idle:
+                    slot = self._idle.popleft()
+                    break
+                # Arka planda açılan driver varsa ikinci bir Chrome başlatmak yerine onu bekle
+                if not self._warming and len(self._slots) + self._creating < self.size:
+                    self._creating += 1
+                    slot = None
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    log_event(logging.WARNING, 'pool.timeout', '⏳ Driver havuzu dolu, %.0f sn içinde boş driver bulunamadı', timeout)
+                    return None
+                waited = True
+                self.waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+        if slot is None:
+            slot = self._create_slot()
+            if slot is None:
+                return None
+
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+            self.wait_time_total += elapsed
+            self.wait_time_max = max(self.wait_time_max, elapsed)
+            slot.uses += 1
+        return slot
+
+    def _create_slot(self, warm: bool = False):
+        """Kilit dışında yeni driver aç (Chrome açılışı yavaş).
+        warm=True: arka plan hazırlığı, driver doğrudan boş kuyruğa eklenir.
+        """
+        driver = None
+        try:
+            with search_metrics.stage('driver_start', 'pool'):
+                driver = self.factory()
+        except Exception as e:
+            log_event(logging.ERROR, 'pool.create', 'Driver hatası: %s', e)
+        with self._cond:
+            self._creating -= 1
+            if warm:
+                self._warming -= 1
+            if driver is None:
+                self.create_failures += 1
+                self._cond.notify_all() if warm else self._cond.notify()
+                return None
+            self._next_id += 1
+            slot = PooledDriver(self._next_id, driver)
+            self._slots[slot.slot_id] = slot
+            if warm and not self._closed:
+                self._idle.append(slot)
+                self.prewarmed += 1
+                self._cond.notify()
+        return slot
+
+    def release(self, slot: PooledDriver):
+        """Driver'ı havuza iade et; yenilenmesi gerekiyorsa arka planda kapat"""
+        reason = 'kapanış' if self._closed else slot.recycle_reason()
+        with self._cond:
+            if reason:
+                self._slots.pop(slot.slot_id, None)
+                self.discarded += 1
+            else:
+                self._idle.append(slot)
+            self._cond.notify()
+        if reason:
+            self._retire(slot, reason)
+
+    def _retire(self, slot: PooledDriver, reason: str):
+        """Havuzdan çıkarılmış driver'ı arka planda kapat, hedef sayıya tamamla"""
+        if self._closed:
+            slot.quit()
+            return
+        with self._cond:
+            self.recycled[reason] = self.recycled.get(reason, 0) + 1
+        log_event(logging.INFO, 'pool.recycle', '♻️ Driver #%s yenileniyor: %s (%s navigasyon, %s ardışık hata)',
+                  slot.slot_id, reason, slot.navigations, slot.failures, driver=slot.slot_id, reason=reason)
+        threading.Thread(target=slot.quit, daemon=True).start()
+        self.prewarm(self.warm_target)
+
+    def prewarm(self, count: int) -> int:
+        """Havuzda `count` driver olana kadar arka planda driver aç"""
+        with self._cond:
+            self.warm_target = min(max(count, 0), self.size)
+            missing = self.warm_target - len(self._slots) - self._creating
+            if self._closed or missing <= 0:
+                return 0
+            self._creating += missing
+            self._warming += missing
+        for _ in range(missing):
+            threading.Thread(target=self._warm_one, daemon=True).start()
+        return missing
+
+    def _warm_one(self):
+        slot = self._create_slot(warm=True)
+        if slot is None:
+            return
+        if not self._closed:
+            log_event(logging.INFO, 'pool.prewarm', '🔥 Driver #%s arka planda hazırlandı', slot.slot_id)
+            return
+        with self._cond:
+            self._slots.pop(slot.slot_id, None)
+        slot.quit()
+
+    def start_watchdog(self, interval: float = DRIVER_WATCHDOG_INTERVAL):
+        """Boştaki driver'ları periyodik olarak kontrol eden thread'i başlat"""
+        if interval <= 0 or self._watchdog:
+            return
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.check_idle()
+                except Exception as e:
+                    log_event(logging.WARNING, 'pool.watchdog', '⚠️ Driver watchdog hatası: %s', e)
+        self._watchdog = threading.Thread(target=loop, name='driver-watchdog', daemon=True)
+        self._watchdog.start()
+
+    def check_idle(self) -> int:
+        """Boştaki driver'ları tek tek ödünç alıp canlılık/bellek kontrolü yap.
+        Kullanımdaki driver'lara dokunulmaz; onlar iade edilirken kontrol edilir.
+        Yenilenen driver sayısını döner.
+        """
+        with self._cond:
+            candidates = list(self._idle)
+        retired = 0
+        for slot in candidates:
+            with self._cond:
+                if self._closed:
+                    return retired
+                try:
+                    self._idle.remove(slot)
+                except ValueError:
+                    continue  # Bu arada bir isteğe verildi
+                self.probes += 1
+            alive = slot.probe()
+            if alive:
+                slot.measure_rss()
+            reason = slot.recycle_reason()
+            with self._cond:
+                if not alive:
+                    self.probe_failures += 1
+                if reason:
+                    self._slots.pop(slot.slot_id, None)
+                    self.discarded += 1
+                else:
+                    self._idle.append(slot)
+                self._cond.notify()
+            if reason:
+                retired += 1
+                self._retire(slot, reason)
+        # Açılışı başarısız olan ya da kapatılan driver'ları hedef sayıya tamamla
+        self.prewarm(self.warm_target)
+        return retired
+
+    def wake(self):
+        """Kuyrukta bekleyenleri uyandır (iptal edilen işler hemen çıksın)"""
+        with self._cond:
+            self._cond.notify_all()
+
+    @contextmanager
+    def checkout(self, timeout: float = None, cancel: threading.Event = None):
+        """`with pool.checkout() as slot:` - slot None olabilir"""
+        slot = self.acquire(timeout, cancel)
+        try:
+            yield slot
+        except SearchCancelled:
+            # İptal driver hatası değildir
+            raise
+        except Exception:
+            if slot:
+                slot.record_failure()
+            raise
+        finally:
+            if slot:
+                self.release(slot)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            slots = list(self._slots.values())
+            return {
+                'size': self.size,
+                'open': len(slots),
+                'idle': len(self._idle),
+                'in_use': len(slots) - len(self._idle),
+                'creating': self._creating,
+                'waiting': self.waiting,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'wait_time_avg': (self.wait_time_total / self.checkouts) if self.checkouts else 0.0,
+                'wait_time_max': self.wait_time_max,
+                'create_failures': self.create_failures,
+                'discarded': self.discarded,
+                'warm_target': self.warm_target,
+                'prewarmed': self.prewarmed,
+                'recycled': dict(self.recycled),
+                'probes': self.probes,
+                'probe_failures': self.probe_failures,
+                'drivers': [
+                    {
+                        'id': s.slot_id,
+                        'healthy': s.healthy,
+                        'uses': s.uses,
+                        'failures': s.failures,
+                        'total_failures': s.total_failures,
+                        'navigations': s.navigations,
+                        'rss_mb': s.rss_mb,
+                        'age': time.time() - s.created_at,
+                    }
+                    for s in slots
+                ],
+            }
+
+    def close(self):
+        """Tüm driver'ları kapat"""
+        self._stop.set()
+        with self._cond:
+            self._closed = True
+            slots = list(self._slots.values())
+            self._slots.clear()
+            self._idle.clear()
+            self._cond.notify_all()
+        for slot in slots:
+            slot.quit()
+
+
+# Tek geçişli kart tarayıcısı için derlenmiş desenler
+_CARD_OPEN_RE = re.compile(r'<(article|div|li)\b[^>]*?\bclass="([^"]*product[^"]*)"[^>]*>')
+_TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)([^>]*)>')
+_ATTR_RE = re.compile(r'([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+# Kart kökleri öncelik sırasıyla: article.productCard (0), div.product-card (1), li.product (2)
+_CARD_RULES = (('article', 'productCard'), ('div', 'product-card'), ('li', 'product'))
+CARD_SELECTOR_NAMES = tuple(f'{tag}.{marker}' for tag, marker in _CARD_RULES)
+
+
+def _card_category(tag: str, cls: str) -> int:
+    for category, (rule_tag, marker) in enumerate(_CARD_RULES):
+        if tag == rule_tag and marker in cls:
+            return category
+    return -1
+
+
+def iter_product_cards(html_content: str, limit: int = None):
+    """HTML'i tek geçişte tarayıp kartları bulundukça üret.
+
+    Etiketler derlenmiş bir tokenizer ile olay olarak okunur; her kart kendi
+    kapanış etiketine kadar (iç içe aynı etiketler sayılarak) izlenir, bu
+    yüzden `(.*?)</article>` gibi geri izlemeli taramalar yoktur. Üretilen
+    değerler `(kategori, {'title', 'href', 'image'})` şeklindedir. En
+    öncelikli kategoride `limit` kart bulununca tarama durur.
+    """
+    pos = 0
+    best = None
+    best_count = 0
+    length = len(html_content)
+    while pos < length:
+        # Önce 'product' sabit metnini ara (C hızında), sonra içinde geçtiği etiketi doğrula
+        hit = html_content.find('product', pos)
+        if hit < 0:
+            return
+        lt = html_content.rfind('<', pos, hit)
+        m = _CARD_OPEN_RE.match(html_content, lt) if lt >= 0 else None
+        if not m or m.end() <= hit:
+            pos = hit + 7
+            continue
+        category = _card_category(m.group(1), m.group(2))
+        # Daha öncelikli kart tipi görüldüyse düşük öncelikli kökleri atla
+        if category < 0 or (best is not None and category > best):
+            pos = m.end()
+            continue
+
+        card_tag, card = m.group(1), {}
+        depth = 1
+        pos = m.end()
+        restart = None
+        for t in _TAG_RE.finditer(html_content, pos):
+            closing, tag, attrs = t.group(1), t.group(2), t.group(3)
+            if closing:
+                if tag == card_tag:
+                    depth -= 1
+                    if depth == 0:
+                        pos = t.end()
+                        break
+                continue
+            if tag in ('article', 'div', 'li') and 'product' in attrs:
+                inner = _CARD_OPEN_RE.match(html_content, t.start())
+                if inner and -1 < _card_category(inner.group(1), inner.group(2)) < category:
+                    # Düşük öncelikli kartın içinde daha öncelikli kart: onu esas al
+                    restart = t.start()
+                    break
+            if tag == 'li' and card_tag == 'li' and depth == 1:
+                # HTML'de yeni <li> açık kalan <li>'yi örtük olarak kapatır
+                pos = t.start()
+                break
+            if tag == card_tag and not attrs.endswith('/'):
+                depth += 1
+            if 'title' in card and 'href' in card and 'image' in card:
+                continue
+            for a in _ATTR_RE.finditer(attrs):
+                key = a.group(1)
+                if key == 'title' and 'title' not in card:
+                    card['title'] = unescape(a.group(2) if a.group(2) is not None else (a.group(3) or a.group(4) or ''))
+                elif key == 'href' and 'href' not in card:
+                    card['href'] = unescape(a.group(2) if a.group(2) is not None else (a.group(3) or a.group(4) or ''))
+                elif key == 'src' and tag == 'img' and 'image' not in card:
+                    card['image'] = unescape(a.group(2) if a.group(2) is not None else (a.group(3) or a.group(4) or ''))
+        else:
+            # Kapanmamış kart: sayfa sonuna kadar okundu
+            pos = length
+
+        if restart is not None:
+            pos = restart
+            continue
+
+        if best is None or category < best:
+            best, best_count = category, 0
+        best_count += 1
+        yield category, card
+        if limit and category == 0 and best_count >= limit:
+            return
+
+
+# Stok kodu çıkarma: öncelik sırasıyla derlenmiş kurallar, URL başına LRU memo
+STOCK_CODE_CACHE_SIZE = max(0, int(os.getenv('STOCK_CODE_CACHE_SIZE', '4096')))
+STOCK_CODE_NOT_FOUND = "Bulunamadı"
+# HBCV -> HBV -> HBC (yolun herhangi bir yerinde) -> pm-/p- sonrası blok -> yol sonu bloğu.
+# Son kural tüm yola uygulanır: '-' ile sondaki alfasayısal blok arasında '/' olamayacağı
+# için son segmente uygulamakla aynı sonucu verir.
+_STOCK_CODE_RULES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(HBCV[0-9A-Z]+)',
+    r'(HBV[0-9A-Z]+)',
+    r'(HBC[0-9A-Z]+)',
+    r'/(?:pm|p)-([a-z0-9]+)',
+    r'-([a-z0-9]{6,})$',
+))
+_STOCK_CODE_STRIP_RE = re.compile(r'[^0-9A-Z]')
+
+
+def _stock_code_path(url):
+    """Çözülmüş URL yolu; ayrıştırılamayan girdi için None"""
+    try:
+        return unquote(urlparse(url or '').path or '')
+    except Exception:
+        return None
+
+
+def _extract_stock_code(url) -> str:
+    path = _stock_code_path(url)
+    if path is None:
+        return STOCK_CODE_NOT_FOUND
+    for rule in _STOCK_CODE_RULES:
+        m = rule.search(path)
+        if m:
+            return _STOCK_CODE_STRIP_RE.sub('', m.group(1).upper())[:24]
+    return STOCK_CODE_NOT_FOUND
+
+
+_extract_stock_code_cached = lru_cache(maxsize=STOCK_CODE_CACHE_SIZE)(_extract_stock_code)
+
+
+def extract_stock_code(url) -> str:
+    """Hepsiburada ürün URL'sinden UPPERCASE stok kodu (bulunamazsa "Bulunamadı").
+    Aynı ürün kartları aramalar arasında sık tekrarlandığı için sonuç URL başına memoize edilir.
+    """
+    try:
+        return _extract_stock_code_cached(url)
+    except TypeError:
+        # Hash'lenemeyen girdi (liste vb.) cache'e giremez
+        return _extract_stock_code(url)
+
+
+def extract_stock_codes(urls) -> List[str]:
+    """Toplu stok kodu çıkarma (içe aktarma vb.); her eleman için extract_stock_code ile aynı sonuç.
+    Tekrarlayan URL'ler bir kez çözülür; toplu işler aramaların LRU cache'ini doldurmaz.
+    """
+    seen = {}
+    codes = []
+    for url in urls:
+        try:
+            code = seen.get(url)
+        except TypeError:
+            codes.append(_extract_stock_code(url))
+            continue
+        if code is None:
+            code = seen[url] = _extract_stock_code(url)
+        codes.append(code)
+    return codes
+
+
+class HepsiburadaScraper:
+    """Hepsiburada scraper - Web için"""
+    
+    def __init__(self, pool_size: int = DRIVER_POOL_SIZE):
+        # Driver'lar başlangıçta açılmaz, ilk kullanımda açılır (lazy init)
+        self.pool = DriverPool(self._create_driver, size=pool_size)
+        # Keep-alive HTTP oturumu (hızlı yol); bağlantı havuzu driver havuzundan geniş
+        self.http = requests.Session()
+        self.http.headers.update(HTTP_HEADERS)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(8, pool_size * 4))
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        # Arama yolu istatistikleri
+        self._stats_lock = threading.Lock()
+        self.http_attempts = 0
+        self.http_hits = 0
+        self.browser_fallbacks = 0
+        # Son aramada tarayıcı kullanıldı mı (thread başına)
+        self._local = threading.local()
+    
+    def _create_driver(self):
+        """Chrome driver'ı kur - Hızlandırılmış ve optimize edilmiş"""
+        log_event(logging.INFO, 'driver.start', '🚀 ChromeDriver başlatılıyor...')
+        webdriver, Options, Service = load_selenium()
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        # Görselleri gerçekten kapat (--disable-images geçerli bir Chrome anahtarı değil)
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        options.add_argument("--disable-plugins")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-software-rasterizer")
+        options.add_argument("--disable-background-timer-throttling")
+        options.add_argument("--disable-renderer-backgrounding")
+        options.add_argument("--disable-backgrounding-occluded-windows")
+        options.add_argument("--window-size=1280,800")
+        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+        
+        # Hızlandırma için yeni eklemeler
+        options.add_argument("--disable-notifications")
+        options.add_argument("--disable-web-security")
+        options.add_argument("--disable-features=IsolateOrigins,site-per-process")
+        options.add_argument("--disable-site-isolation-trials")
+        options.add_argument("--disable-remote-fonts")
+        options.add_argument("--disable-smooth-scrolling")
+        options.add_argument("--disable-css-animations")
+        resource_blocker.configure(options)
+        
+        # EXE içinde dosya yolu sorunu için düzeltme
+        if getattr(sys, 'frozen', False):
+            # EXE modda
+            chromedriver_path = os.path.join(sys._MEIPASS, 'chromedriver.exe')
+        else:
+            # Normal modda
+            chromedriver_path = 'chromedriver.exe'
+        
+        service = Service(chromedriver_path)
+        driver = webdriver.Chrome(service=service, options=options)
+        try:
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            driver.set_page_load_timeout(15)  # EXE için daha uzun timeout
+            driver.implicitly_wait(3)  # EXE için implicit wait
+            resource_blocker.prepare(driver)
+        except Exception:
+            driver.quit()
+            raise
+        log_event(logging.INFO, 'driver.ready', '✅ Chrome driver hazırlandı (optimize edilmiş)')
+        return driver
+
+    def search_products(self, search_term: str, cancel: threading.Event = None):
+        """Ürün ara: önce HTTP hızlı yol, kart bulunamazsa tarayıcı.
+        HTML hiç alınamazsa None döner; `cancel` set edilirse SearchCancelled.
+        """
+        self._local.used_browser = False
+        search_metrics.begin()
+        products, outcome = None, 'error'
+        try:
+            products = self._search_products(search_term, cancel)
+            outcome = 'ok' if products else ('empty' if products is not None else 'error')
+            return products
+        except SearchCancelled:
+            outcome = 'cancelled'
+            raise
+        finally:
+            search_metrics.finish('browser' if self.used_browser() else 'http', outcome, len(products or ()))
+
+    def _search_products(self, search_term: str, cancel: threading.Event = None):
+        if HB_HTTP_FIRST:
+            with self._stats_lock:
+                self.http_attempts += 1
+            html = self.fetch_html_http(search_term)
+            if html:
+                with search_metrics.stage('parse'):
+                    products = self.parse_products(html, limit=HB_MAX_CARDS)
+                if products:
+                    with self._stats_lock:
+                        self.http_hits += 1
+                    return products
+
+            if cancel is not None and cancel.is_set():
+                raise SearchCancelled()
+            with self._stats_lock:
+                self.browser_fallbacks += 1
+            log_event(logging.INFO, 'search.fallback', "🌐 HTTP'de ürün kartı yok, tarayıcıya geçiliyor (fallback oranı: %%%.0f)",
+                      self.fallback_rate() * 100, term=search_term)
+
+        self._local.used_browser = True
+        html = self.get_html_content(search_term, cancel)
+        if not html:
+            return None
+        with search_metrics.stage('parse'):
+            return self.parse_products(html, limit=HB_MAX_CARDS)
+
+    def fetch_html_http(self, search_term: str) -> str:
+        """Arama sayfasını keep-alive HTTP oturumu ile al (JavaScript yok)"""
+        try:
+            with search_metrics.stage('http_fetch'):
+                resp = self.http.get(f"{HB_BASE_URL}/ara", params={'q': search_term}, timeout=HB_HTTP_TIMEOUT)
+                html = resp.text
+            if resp.status_code != 200:
+                log_event(logging.WARNING, 'search.http', '⚠️ HTTP arama durumu: %s', resp.status_code, status=resp.status_code)
+                return ""
+            search_metrics.record_html('http', len(html))
+            return html
+        except Exception as e:
+            log_event(logging.WARNING, 'search.http', '⚠️ HTTP arama hatası: %s', e)
+            return ""
+
+    def used_browser(self) -> bool:
+        """Bu thread'deki son search_products çağrısı tarayıcıya düştü mü"""
+        return getattr(self._local, 'used_browser', False)
+
+    def fallback_rate(self) -> float:
+        """HTTP denemelerinin ne kadarında tarayıcıya düşüldü"""
+        with self._stats_lock:
+            return (self.browser_fallbacks / self.http_attempts) if self.http_attempts else 0.0
+
+    def search_stats(self) -> Dict:
+        with self._stats_lock:
+            attempts, hits, fallbacks = self.http_attempts, self.http_hits, self.browser_fallbacks
+        return {
+            'http_first': HB_HTTP_FIRST,
+            'http_attempts': attempts,
+            'http_hits': hits,
+            'browser_fallbacks': fallbacks,
+            'fallback_rate': (fallbacks / attempts) if attempts else 0.0,
+        }
+
+    def get_html_content(self, search_term: str, cancel: threading.Event = None) -> str:
+        """Hepsiburada'dan arama yapıp HTML içeriğini al - EXE için optimize"""
+        # Havuzdan driver al (yoksa lazy olarak açılır, doluysa kuyrukta beklenir)
+        started = time.perf_counter()
+        with self.pool.checkout(cancel=cancel) as slot:
+            search_metrics.observe('acquire', time.perf_counter() - started)
+            if not slot:
+                log_event(logging.ERROR, 'search.driver', '❌ Driver oluşturulamadı')
+                return ""
+            return self._fetch_with_driver(slot, search_term, cancel)
+
+    def _fetch_with_driver(self, slot: PooledDriver, search_term: str, cancel: threading.Event = None) -> str:
+        """Havuzdan alınmış driver ile arama sayfasını yükle.
+        İptal; yükleme, hazır olma beklemesi ve denemeler arasında kontrol edilir.
+        Süren bir driver.get() kesilemez, dönünce sayfa durdurulup slot bırakılır.
+        """
+        driver = slot.driver
+        max_retries = 3  # EXE için daha fazla deneme
+        
+        for attempt in range(max_retries):
+            try:
+                
+                search_url = f"{HB_BASE_URL}/ara?q={search_term}"
+                log_event(logging.DEBUG, 'search.attempt', '🔍 [Driver #%s] Deneme %s/%s: %s', slot.slot_id, attempt + 1, max_retries, search_url)
+                
+                resource_blocker.apply(driver, 'hepsiburada')
+                with search_metrics.stage('navigate'):
+                    slot.navigate(search_url)
+
+                if cancel is not None and cancel.is_set():
+                    self._stop_loading(driver)
+                    raise SearchCancelled()
+
+                # Ürün kartları oluşup sayısı sabitlenene kadar bekle (sabit sleep yok)
+                with search_metrics.stage('ready_wait'):
+                    cards = readiness.wait(driver, HB_READINESS, cancel)
+                if cancel is not None and cancel.is_set():
+                    self._stop_loading(driver)
+                    raise SearchCancelled()
+                log_event(logging.DEBUG, 'search.ready', '⏱️ Sayfa hazır: %s kart', cards)
+                
+                with search_metrics.stage('page_source'):
+                    html_content = driver.page_source
+                search_metrics.record_html('browser', len(html_content))
+                traffic = resource_blocker.record_traffic(driver, 'hepsiburada')
+                if traffic:
+                    log_event(logging.DEBUG, 'search.traffic', '📦 %s istek, %.0f KB aktarıldı, %s istek engellendi',
+                              traffic['requests'], traffic['bytes'] / 1024, traffic['blocked'])
+                
+                if len(html_content) > 1000:  # HTML içerik yeterli
+                    log_event(logging.DEBUG, 'search.html', '✅ HTML başarıyla alındı: %s karakter', len(html_content))
+                    slot.record_success()
+                    return html_content
+                else:
+                    log_event(logging.WARNING, 'search.html', '⚠️ HTML içeriği çok kısa: %s karakter', len(html_content))
+                    
+            except SearchCancelled:
+                log_event(logging.INFO, 'search.cancelled', '🛑 [Driver #%s] Arama iptal edildi: %s', slot.slot_id, search_term)
+                raise
+            except Exception as e:
+                log_event(logging.WARNING, 'search.attempt', '❌ Hata (Deneme %s/%s): %s', attempt + 1, max_retries, e)
+                slot.record_failure()
+                if not slot.healthy:
+                    log_event(logging.ERROR, 'search.driver', '❌ Driver #%s sağlıksız, denemeler durduruldu', slot.slot_id)
+                    return ""
+                if attempt < max_retries - 1:
+                    search_metrics.record_retry()
+                    backoff = 0.5 * (attempt + 1)
+                    log_event(logging.INFO, 'search.retry', '🔄 %s saniye bekleyip tekrar deneniyor...', backoff)
+                    if cancel is None:
+                        time.sleep(backoff)
+                    elif cancel.wait(backoff):
+                        raise SearchCancelled()
+                else:
+                    log_event(logging.ERROR, 'search.failed', '❌ Tüm denemeler başarısız oldu', term=search_term)
+                    return ""
+        
+        return ""
+
+    @staticmethod
+    def _stop_loading(driver):
+        """Yarım kalan sayfa yüklemesini durdur (sonraki kullanıcıya temiz slot)"""
+        try:
+            driver.execute_script('window.stop();')
+        except Exception:
+            pass
+
+    def clean_stock_code(self, stock_code: str) -> str:
+        """Stok kodunu temizle - sadece % işaretine kadar olan kısmı al"""
+        if not stock_code or stock_code == "Bulunamadı":
+            return stock_code
+        
+        # URL encoding'i decode et
+        if '%' in stock_code:
+            stock_code = stock_code.split('%')[0]
+        
+        return stock_code
+
+    def parse_products(self, html_content: str, limit: int = None) -> List[Dict]:
+        """HTML içeriğinden ürün bilgilerini parse et (tek geçiş, akış halinde)"""
+        products = []
+
+        # Sadece bulunan en öncelikli kart tipini kullan
+        product_cards = []
+        best = None
+        for category, card in iter_product_cards(html_content, limit=limit):
+            if best is None or category < best:
+                best = category
+                product_cards = []
+            if category == best:
+                product_cards.append(card)
+
+        search_metrics.record_selector(CARD_SELECTOR_NAMES[best] if best is not None else 'none')
+        if not product_cards:
+            log_event(logging.DEBUG, 'parse.empty', '❌ Ürün kartı bulunamadı')
+            return products
+        log_event(logging.DEBUG, 'parse.cards', '🔍 Bulunan ürün kartı sayısı: %s', len(product_cards))
+
+        for card in product_cards:
+            product = {}
+
+            # Ürün adı (entity'ler tarayıcıda çözülür)
+            if 'title' in card:
+                product['name'] = card['title'].strip()
+
+            # Stok kodu
+            if 'href' in card:
+                product['stock_code'] = self.extract_stock_code_from_url(card['href'])
+
+            # Görsel URL
+            product['image_url'] = card.get('image', "")
+
+            if product.get('name'):
+                products.append(product)
+
+        return products
+
+    def extract_stock_code_from_url(self, url: str) -> str:
+        """Hepsiburada ürün URL'sinden stok kodunu çıkarır ve UPPERCASE döner.
+        Öncelik: HBV/HBCV -> pm-/p- sonrası kod -> yol sonu bloğu (bkz. extract_stock_code).
+        """
+        return extract_stock_code(url)
+
+    def close(self):
+        """Tarayıcıları ve HTTP oturumunu kapat"""
+        self.pool.close()
+        self.http.close()
+
+
+# Arama sonuç cache ayarları (.env'den oku)
+SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', '900'))
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '500'))
+SEARCH_CACHE_DB = os.getenv('SEARCH_CACHE_DB', '').strip()
+
+
+def normalize_term(term: str) -> str:
+    """Cache anahtarı için arama terimini normalize et"""
+    return ' '.join((term or '').split()).casefold()
+
+
+class SearchCache:
+    """TTL + LRU arama sonuç cache'i, isteğe bağlı SQLite ikinci katman.
+
+    Bellek katmanı `max_entries` ile sınırlıdır; dolunca en eski kullanılan
+    kayıt atılır. `db_path` verilirse sonuçlar SQLite'a da yazılır ve
+    uygulama yeniden başlasa bile TTL dolana kadar kullanılır.
+    """
+
+    def __init__(self, ttl: float = SEARCH_CACHE_TTL, max_entries: int = SEARCH_CACHE_SIZE, db_path: str = SEARCH_CACHE_DB):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._db = None
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute('PRAGMA journal_mode=WAL')
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS search_cache ('
+                    'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+                )
+                self._db.execute('DELETE FROM search_cache WHERE expires_at < ?', (time.time(),))
+                self._db.commit()
+                log_event(logging.INFO, 'cache.sqlite', "💾 Arama cache'i SQLite katmanı: %s", db_path)
+            except Exception as e:
+                log_event(logging.WARNING, 'cache.sqlite', '⚠️ SQLite cache açılamadı: %s', e)
+                self._db = None
+
+    @staticmethod
+    def make_key(namespace: str, term: str) -> str:
+        return f"{namespace}:{normalize_term(term)}"
+
+    def get(self, namespace: str, term: str):
+        """Cache'teki sonucu döndür, yoksa None"""
+        key = self.make_key(namespace, term)
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires_at FROM search_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row and row[1] >= now:
+                    value = json.loads(row[0])
+                    self._store_memory(key, value, row[1])
+                    self.l2_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, namespace: str, term: str, value):
+        key = self.make_key(namespace, term)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO search_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(value, ensure_ascii=False), expires_at),
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    log_event(logging.WARNING, 'cache.sqlite', '⚠️ SQLite cache yazılamadı: %s', e)
+
+    def _store_memory(self, key: str, value, expires_at: float):
+        # Kilit çağıran tarafından tutulur
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM search_cache')
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.l2_hits + self.misses
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'l2_hits': self.l2_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': ((self.hits + self.l2_hits) / lookups) if lookups else 0.0,
+                'sqlite': self._db is not None,
+            }
+
+
+class _FlightCancel:
+    """Ortak arama için iptal sinyali: yalnızca bekleyen herkes iptal edince set olur.
+    threading.Event'in is_set/wait arayüzünü taklit eder.
+    """
+
+    POLL = 0.05
+
+    def __init__(self, flight: '_Flight'):
+        self._flight = flight
+
+    def is_set(self) -> bool:
+        return self._flight.all_cancelled()
+
+    def wait(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while not self.is_set():
+            remaining = self.POLL if deadline is None else deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.POLL, remaining))
+        return True
+
+
+class _Flight:
+    """Uçuştaki tek bir getirme işlemi ve onu bekleyenler"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.participants = []  # Her katılımcının iptal Event'i (senkron çağrılar için None)
+        self.cancel = _FlightCancel(self)
+
+    def all_cancelled(self) -> bool:
+        participants = list(self.participants)
+        return bool(participants) and all(e is not None and e.is_set() for e in participants)
+
+
+class SingleFlight:
+    """Aynı anahtar için eşzamanlı istekleri tek bir getirme işleminde birleştir.
+
+    İlk çağıran (lider) işi çalıştırır, aynı anahtarla gelen diğerleri sonucu
+    bekler ve aynı sonucu alır. Ortak iş yalnızca bekleyen herkes iptal
+    edince iptal edilir; lider tek başına iptal edilse bile diğerleri için
+    getirme sürer.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0  # Ortak sonuçla yanıtlanan, kendi getirmesini yapmayan çağrılar
+        self.abandoned = 0  # Beklerken iptal edilen takipçiler
+        self.saved_browser_fetches = 0
+        self.rejoined = 0  # İptal edilen ortak işe denk gelip yeniden deneyen takipçiler
+        self.max_waiters = 0
+
+    def do(self, key: str, fn, cancel: threading.Event = None):
+        """fn(flight_cancel) sonucunu döndür: (sonuç, paylaşıldı mı)"""
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = _Flight()
+                    self._flights[key] = flight
+                    self.leaders += 1
+                flight.participants.append(cancel)
+                self.max_waiters = max(self.max_waiters, len(flight.participants) - 1)
+
+            if leader:
+                try:
+                    flight.result = fn(flight.cancel)
+                except BaseException as e:
+                    flight.error = e
+                finally:
+                    with self._lock:
+                        del self._flights[key]
+                    flight.done.set()
+                if flight.error is not None:
+                    raise flight.error
+                if cancel is not None and cancel.is_set():
+                    # Sonuç diğer bekleyenlere gitti; liderin kendi işi iptal edilmişti
+                    raise SearchCancelled()
+                return flight.result, False
+
+            while not flight.done.wait(0.1):
+                if cancel is not None and cancel.is_set():
+                    with self._lock:
+                        flight.participants.remove(cancel)
+                        self.abandoned += 1
+                    raise SearchCancelled()
+            if isinstance(flight.error, SearchCancelled) and not (cancel is not None and cancel.is_set()):
+                # Ortak iş, bu çağrı katılmadan hemen önce herkes iptal ettiği için durdu;
+                # bu çağrı iptal etmedi: yeniden dene (gerekirse lider olarak)
+                with self._lock:
+                    self.rejoined += 1
+                continue
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                self.coalesced += 1
+            return flight.result, True
+
+    def record_saved_browser_fetch(self):
+        with self._lock:
+            self.saved_browser_fetches += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'abandoned': self.abandoned,
+                'saved_browser_fetches': self.saved_browser_fetches,
+                'rejoined': self.rejoined,
+                'max_waiters': self.max_waiters,
+            }
+
+
+# Sepet kalıcılığı (append-only journal + periyodik snapshot)
+CART_DATA_DIR = os.getenv('CART_DATA_DIR', '').strip() or (
+    os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.getcwd()
+)
+CART_JOURNAL_ENABLED = os.getenv('CART_JOURNAL', 'True').lower() == 'true'
+CART_FSYNC_INTERVAL = float(os.getenv('CART_FSYNC_INTERVAL', '0.5'))
+CART_SNAPSHOT_EVERY = int(os.getenv('CART_SNAPSHOT_EVERY', '200'))
+CART_SNAPSHOT_INTERVAL = float(os.getenv('CART_SNAPSHOT_INTERVAL', '300'))
+# Production modu: worker süreç sayısı ve worker başına thread (gunicorn/waitress)
+SERVE_WORKERS = max(1, int(os.getenv('SERVE_WORKERS', '1')))
+SERVE_THREADS = max(1, int(os.getenv('SERVE_THREADS', '8')))
+SERVE_HOST = os.getenv('SERVE_HOST', '127.0.0.1')
+SERVE_PORT = int(os.getenv('SERVE_PORT', '5001'))
+
+def serves_multi_process() -> bool:
+    """SERVE_WORKERS>1 gerçekten birden çok süreç açacak mı? Yalnızca gunicorn açar;
+    Windows'ta ya da gunicorn kurulu değilken waitress/werkzeug tek süreçte çalışır.
+    """
+    if SERVE_WORKERS <= 1 or sys.platform == 'win32':
+        return False
+    import importlib.util
+    return importlib.util.find_spec('gunicorn') is not None
+
+# Worker'lar arası paylaşılan durum (sepet logu, arama işleri, arama cache'i) için SQLite dosyası.
+# Birden çok süreç çalışacaksa varsayılan olarak veri klasöründe açılır; tek süreçte bellek içi yapılar yeter.
+SHARED_STATE_DB = os.getenv('SHARED_STATE_DB', '').strip() or (
+    os.path.join(CART_DATA_DIR, 'app_state.db') if serves_multi_process() else ''
+)
+# Delta senkronizasyon için tutulacak en fazla silinmiş satır izi
+CART_TOMBSTONE_LIMIT = int(os.getenv('CART_TOMBSTONE_LIMIT', '5000'))
+
+
+class CartItem:
+    """Sepet satırı - sabit id'li, __slots__ ile kompakt kayıt"""
+
+    __slots__ = ('id', 'barcode', 'stock_code', 'name', 'image_url', 'price', 'quantity', 'source')
+    FIELDS = __slots__[1:]
+
+    def __init__(self, item_id: int, barcode='', stock_code='', name='', image_url='', price='', quantity=1, source=''):
+        self.id = item_id
+        self.barcode = barcode
+        self.stock_code = stock_code
+        self.name = name
+        self.image_url = image_url
+        self.price = price
+        self.quantity = quantity
+        self.source = source
+
+    @property
+    def key(self):
+        return (self.stock_code, self.barcode)
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'barcode': self.barcode,
+            'stock_code': self.stock_code,
+            'name': self.name,
+            'image_url': self.image_url,
+            'price': self.price,
+            'quantity': self.quantity,
+            'source': self.source,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CartItem':
+        return cls(data['id'], **{f: data[f] for f in cls.FIELDS if f in data})
+
+
+class CartStore:
+    """Sepet deposu: id -> satır sözlüğü + (stock_code, barcode) hash indeksi.
+
+    Ekleme, adet artırma, düzenleme ve silme sabit zamanlıdır; sıra ekleme
+    sırasıdır. Her değişiklik `version`'ı artırır ve değişiklik günlüğüne
+    yazılır, böylece istemciler yalnızca farkları çekebilir. Çağıranlar
+    `cart_write()` / `cart_read()` içinde olmalıdır.
+    """
+
+    def __init__(self, tombstone_limit: int = CART_TOMBSTONE_LIMIT):
+        self._items: Dict[int, CartItem] = {}
+        self._by_key: Dict[tuple, Dict[int, None]] = {}
+        self._next_id = 1
+        self.version = 0
+        # id -> son değiştiği versiyon (en eskiden en yeniye); silinenler de kalır
+        self._changes: OrderedDict = OrderedDict()
+        # Bu versiyondan eski istemciler tam liste almalı
+        self._horizon = 0
+        self.tombstone_limit = tombstone_limit
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def get(self, item_id) -> 'CartItem':
+        return self._items.get(item_id)
+
+    def find(self, stock_code, barcode) -> 'CartItem':
+        """Aynı (stok kodu, barkod) anahtarlı ilk satır"""
+        ids = self._by_key.get((stock_code, barcode))
+        return self._items[next(iter(ids))] if ids else None
+
+    def id_at(self, index):
+        """Eski index tabanlı istemciler için (O(n))"""
+        if not isinstance(index, int) or not 0 <= index < len(self._items):
+            return None
+        for i, item_id in enumerate(self._items):
+            if i == index:
+                return item_id
+        return None
+
+    def add(self, **fields) -> CartItem:
+        item = CartItem(self._next_id, **fields)
+        self.insert(item)
+        return item
+
+    def insert(self, item: CartItem):
+        self._items[item.id] = item
+        self._by_key.setdefault(item.key, {})[item.id] = None
+        self._next_id = max(self._next_id, item.id + 1)
+        self._touch(item.id)
+
+    def update(self, item: CartItem, **changes):
+        """Alanları güncelle; anahtar değişirse indeksi taşı"""
+        old_key = item.key
+        for field, value in changes.items():
+            setattr(item, field, value)
+        if item.key != old_key:
+            self._unindex(old_key, item.id)
+            self._by_key.setdefault(item.key, {})[item.id] = None
+        self._touch(item.id)
+
+    def delete(self, item_id) -> 'CartItem':
+        item = self._items.pop(item_id, None)
+        if item is not None:
+            self._unindex(item.key, item_id)
+            self._touch(item_id)
+        return item
+
+    def _touch(self, item_id):
+        self.version += 1
+        self._changes[item_id] = self.version
+        self._changes.move_to_end(item_id)
+        # Silinmiş satır izleri sınırı aşarsa en eskileri at, ufku ileri al
+        while len(self._changes) > len(self._items) + self.tombstone_limit:
+            _, self._horizon = self._changes.popitem(last=False)
+
+    def changes_since(self, since: int):
+        """`since`'ten sonra değişen satırlar ve silinen id'ler.
+        Değişiklik günlüğü o kadar eskiye gitmiyorsa None (tam liste gerekir).
+        """
+        if since < self._horizon or since > self.version:
+            return None
+        changed, removed = [], []
+        for item_id, version in reversed(self._changes.items()):
+            if version <= since:
+                break
+            item = self._items.get(item_id)
+            if item is None:
+                removed.append(item_id)
+            else:
+                changed.append(item.to_dict())
+        changed.reverse()
+        return changed, removed
+
+    def _unindex(self, key, item_id):
+        ids = self._by_key.get(key)
+        if ids is not None:
+            ids.pop(item_id, None)
+            if not ids:
+                del self._by_key[key]
+
+    def clear(self):
+        self._items.clear()
+        self._by_key.clear()
+        # Boş sepetin tam listesi zaten ucuz: günlüğü sıfırla
+        self.version += 1
+        self._changes.clear()
+        self._horizon = self.version
+
+    def to_list(self) -> List[Dict]:
+        return [item.to_dict() for item in self._items.values()]
+
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    def load(self, items: List[Dict], next_id: int = 1):
+        """Satırları yükle; `next_id` silinmiş satırların id'lerinin yeniden verilmesini önler"""
+        self.clear()
+        for data in items:
+            self.insert(CartItem.from_dict(data) if 'id' in data else CartItem(self._next_id, **{
+                f: data[f] for f in CartItem.FIELDS if f in data
+            }))
+        self._next_id = max(self._next_id, int(next_id))
+
+    def apply_op(self, op: Dict):
+        """Journal kaydını uygula (kurtarma sırasında)"""
+        kind = op.get('op')
+        if kind == 'clear':
+            self.clear()
+            return
+        if kind == 'batch':
+            for sub in op.get('ops', []):
+                self.apply_op(sub)
+            return
+        data = op.get('item') or {}
+        item_id = op.get('id', data.get('id'))
+        if item_id is None and 'index' in op:
+            item_id = self.id_at(op['index'])  # Eski index tabanlı kayıtlar
+        if kind == 'add':
+            self.load_one(data)
+        elif kind == 'set':
+            item = self.get(item_id)
+            if item is not None:
+                self.update(item, **{f: data[f] for f in CartItem.FIELDS if f in data})
+        elif kind == 'delete':
+            self.delete(item_id)
+
+    def load_one(self, data: Dict):
+        if 'id' in data:
+            self.insert(CartItem.from_dict(data))
+        else:
+            self.add(**{f: data[f] for f in CartItem.FIELDS if f in data})
+
+    def export_state(self) -> Dict:
+        """Versiyon ve değişiklik günlüğü dahil tam durum (paylaşımlı log snapshot'ı)"""
+        return {
+            'items': self.to_list(),
+            'next_id': self._next_id,
+            'version': self.version,
+            'changes': list(self._changes.items()),
+            'horizon': self._horizon,
+        }
+
+    def import_state(self, state: Dict):
+        """export_state çıktısını birebir yükle (versiyonlar korunur)"""
+        self._items.clear()
+        self._by_key.clear()
+        for data in state.get('items', []):
+            item = CartItem.from_dict(data)
+            self._items[item.id] = item
+            self._by_key.setdefault(item.key, {})[item.id] = None
+        self._next_id = state.get('next_id', 1)
+        self.version = state.get('version', 0)
+        self._changes = OrderedDict((item_id, version) for item_id, version in state.get('changes', []))
+        self._horizon = state.get('horizon', 0)
+
+
+class CartJournal:
+    """Sepet değişiklikleri için append-only journal.
+
+    Her değişiklik sıra numarasıyla JSON satırı olarak hemen dosyaya yazılır;
+    fsync arka planda `CART_FSYNC_INTERVAL` aralıklarla toplu yapılır.
+    Belirli sayıda değişiklikten (veya süreden) sonra tüm sepet atomik bir
+    snapshot'a yazılır ve journal sıfırlanır, böylece açılışta kurtarma
+    süresi gün boyu biriken geçmişle büyümez.
+    """
+
+    def __init__(self, data_dir: str = CART_DATA_DIR, fsync_interval: float = CART_FSYNC_INTERVAL,
+                 snapshot_every: int = CART_SNAPSHOT_EVERY, snapshot_interval: float = CART_SNAPSHOT_INTERVAL):
+        self.snapshot_path = os.path.join(data_dir, 'cart_snapshot.json')
+        self.journal_path = os.path.join(data_dir, 'cart_journal.log')
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self.seq = 0
+        self._state_fn = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._dirty = False
+        self._ops_since_snapshot = 0
+        self._last_snapshot = time.time()
+        self._stopped = False
+        self._thread = None
+        # Süreç her başladığında değişir; versiyonlar açılışta sıfırlanır
+        self.epoch = uuid.uuid4().hex[:8]
+
+    @contextmanager
+    def transaction(self, store: CartStore):
+        """Tek süreçte kilit yeterli (bkz. SharedCartLog.transaction)"""
+        yield
+
+    def catch_up(self, store: CartStore):
+        """Tek süreçte bellek kopyası zaten günceldir"""
+
+    def recover(self, store: CartStore):
+        """Snapshot + journal kuyruğundan sepeti yeniden kur"""
+        snapshot_seq = 0
+        try:
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                snap = json.load(f)
+            store.load(snap.get('items', []), snap.get('next_id', 1))
+            snapshot_seq = self.seq = int(snap.get('seq', 0))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log_event(logging.WARNING, 'cart.snapshot', "⚠️ Sepet snapshot'ı okunamadı: %s", e)
+
+        replayed = 0
+        try:
+            with open(self.journal_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        break  # Yarım yazılmış son satır (çökme anı)
+                    if op.get('seq', 0) <= snapshot_seq:
+                        continue
+                    try:
+                        store.apply_op(op)
+                    except (KeyError, TypeError):
+                        continue
+                    self.seq = op['seq']
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        if len(store) or replayed:
+            log_event(logging.INFO, 'cart.recover', '♻️ Sepet kurtarıldı: %s ürün (%s journal kaydı)', len(store), replayed)
+        self._ops_since_snapshot = replayed
+
+    def start(self, state_fn):
+        """Journal'ı aç ve arka plan fsync/snapshot thread'ini başlat.
+        `state_fn()` sepet kilidi altında (seq, snapshot JSON'u) döndürmelidir.
+        """
+        self._state_fn = state_fn
+        if self._ops_since_snapshot:
+            self.snapshot()
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='cart-journal', daemon=True)
+        self._thread.start()
+
+    def append(self, op: Dict):
+        """Değişikliği journal'a yaz (sepet kilidi altında çağrılmalı)"""
+        if self._file is None:
+            return
+        with self._lock:
+            self.seq += 1
+            op['seq'] = self.seq
+            self._file.write(json.dumps(op, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self._dirty = True
+            self._ops_since_snapshot += 1
+            if self._ops_since_snapshot >= self.snapshot_every:
+                self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.fsync_interval)
+            self._wakeup.clear()
+            self.sync()
+            if self._ops_since_snapshot and (
+                self._ops_since_snapshot >= self.snapshot_every
+                or time.time() - self._last_snapshot >= self.snapshot_interval
+            ):
+                self.snapshot()
+
+    def sync(self):
+        """Bekleyen yazmaları diske zorla (toplu fsync)"""
+        with self._lock:
+            if not self._dirty or self._file is None:
+                return
+            self._dirty = False
+            fileno = self._file.fileno()
+        try:
+            os.fsync(fileno)
+        except Exception as e:
+            log_event(logging.WARNING, 'cart.journal', '⚠️ Journal fsync hatası: %s', e)
+
+    def snapshot(self):
+        """Tüm sepeti atomik olarak yaz ve journal'ı sıfırla"""
+        if self._state_fn is None:
+            return
+        seq, payload = self._state_fn()
+        tmp_path = self.snapshot_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload if isinstance(payload, str) else json.dumps({'seq': seq, 'items': payload}, ensure_ascii=False))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            log_event(logging.WARNING, 'cart.snapshot', "⚠️ Sepet snapshot'ı yazılamadı: %s", e)
+            return
+        with self._lock:
+            # Snapshot'tan sonra eklenen kayıtlar korunur (seq filtrelemesi ile tekrar oynatılmaz)
+            if self._file is not None and self.seq == seq:
+                self._file.close()
+                self._file = open(self.journal_path, 'w', encoding='utf-8')
+                self._dirty = False
+            self._ops_since_snapshot = self.seq - seq
+            self._last_snapshot = time.time()
+
+    def close(self):
+        """Uygulama kapanırken son snapshot'ı al ve dosyayı kapat"""
+        self._stopped = True
+        self._wakeup.set()
+        self.sync()
+        if self._ops_since_snapshot:
+            self.snapshot()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _connect_shared_db(path: str):
+    """Paylaşımlı durum veritabanına WAL modunda bağlan (transaction'lar elle yönetilir)"""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class SharedCartLog:
+    """Çoklu worker için paylaşımlı sepet logu (SQLite, WAL).
+
+    CartJournal ile aynı kayıt biçimini ve arayüzü kullanır. Her worker
+    sepetin bellekte bir kopyasını tutar; okumadan önce logdaki yeni
+    kayıtları uygular (değişiklik yoksa `PRAGMA data_version` ile tek sorguda
+    anlaşılır). Yazmalar `BEGIN IMMEDIATE` ile süreçler arası kilit altında
+    yapılır: kopya güncellenir, değişiklik uygulanır, kayıt loga eklenir ve
+    commit edilir. Kopyalar aynı kayıtları aynı sırayla uyguladığı için
+    id'ler ve versiyonlar tüm worker'larda aynıdır. `snapshot_every` kayıtta
+    bir tam durum snapshot tablosuna yazılır ve eski kayıtlar silinir.
+    """
+
+    EMPTY_STATE = {'items': [], 'next_id': 1, 'version': 0, 'changes': [], 'horizon': 0}
+
+    def __init__(self, path: str, snapshot_every: int = CART_SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.seq = 0
+        self._snapshot_seq = 0
+        self._data_version = None
+        self._conn = None
+        self._pid = None
+        self._in_tx = False
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cart_log (seq INTEGER PRIMARY KEY, op TEXT NOT NULL)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cart_snapshot ('
+                'id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL, state TEXT NOT NULL)'
+            )
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('cart_epoch', ?)", (uuid.uuid4().hex[:8],))
+            # Versiyonlar veritabanıyla birlikte yaşar: epoch yalnızca veritabanı yeniden oluşunca değişir
+            self.epoch = conn.execute("SELECT value FROM meta WHERE key = 'cart_epoch'").fetchone()[0]
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _connection(self):
+        # Fork sonrası üst sürecin bağlantısı kullanılmaz, her süreç kendi bağlantısını açar
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = _connect_shared_db(self.path)
+            self._pid = os.getpid()
+            self._data_version = None
+        return self._conn
+
+    def recover(self, store: CartStore):
+        self._reload(store)
+        if len(store):
+            log_event(logging.INFO, 'cart.recover', '♻️ Paylaşımlı sepet yüklendi: %s ürün (log #%s)', len(store), self.seq)
+
+    def start(self, state_fn=None):
+        """Arka plan thread'i gerekmez: sıkıştırma yazma transaction'ında yapılır"""
+
+    def _reload(self, store: CartStore):
+        """Snapshot + log kuyruğundan bellek kopyasını baştan kur"""
+        conn = self._connection()
+        row = conn.execute('SELECT seq, state FROM cart_snapshot WHERE id = 1').fetchone()
+        if row:
+            store.import_state(json.loads(row[1]))
+            self.seq = self._snapshot_seq = row[0]
+        else:
+            store.import_state(self.EMPTY_STATE)
+            self.seq = self._snapshot_seq = 0
+        self._data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        for seq, text in conn.execute('SELECT seq, op FROM cart_log WHERE seq > ? ORDER BY seq', (self.seq,)):
+            store.apply_op(json.loads(text))
+            self.seq = seq
+
+    def catch_up(self, store: CartStore):
+        """Diğer worker'ların yazdığı kayıtları uygula (cart_lock altında)"""
+        conn = self._connection()
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == self._data_version:
+            return
+        rows = conn.execute('SELECT seq, op FROM cart_log WHERE seq > ? ORDER BY seq', (self.seq,)).fetchall()
+        if (rows and rows[0][0] != self.seq + 1) or (not rows and self._compacted_past(conn)):
+            # Aradaki kayıtlar sıkıştırılmış: snapshot'tan yeniden kur
+            self._reload(store)
+            return
+        for seq, text in rows:
+            store.apply_op(json.loads(text))
+            self.seq = seq
+        self._data_version = data_version
+
+    def _compacted_past(self, conn) -> bool:
+        row = conn.execute('SELECT seq FROM cart_snapshot WHERE id = 1').fetchone()
+        return bool(row) and row[0] > self.seq
+
+    @contextmanager
+    def transaction(self, store: CartStore):
+        """Süreçler arası yazma kilidi: güncel kopya üzerinde değiştir, logu commit et.
+        Hata olursa log geri alınır ve kopya logdan yeniden kurulur.
+        """
+        if self._in_tx:
+            yield  # İç içe çağrı (aynı thread, cart_lock zaten tutuluyor)
+            return
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        self._in_tx = True
+        try:
+            self.catch_up(store)
+            yield
+            if self.seq - self._snapshot_seq >= self.snapshot_every:
+                self._compact(conn, store)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            self._in_tx = False
+            self._reload(store)
+            raise
+        finally:
+            self._in_tx = False
+
+    def append(self, op: Dict):
+        """Kaydı loga ekle (yalnızca transaction içinde)"""
+        if not self._in_tx:
+            raise RuntimeError('Sepet logu transaction dışında yazılamaz')
+        self.seq += 1
+        op['seq'] = self.seq
+        self._conn.execute('INSERT INTO cart_log (seq, op) VALUES (?, ?)', (self.seq, json.dumps(op, ensure_ascii=False)))
+
+    def _compact(self, conn, store: CartStore):
+        conn.execute(
+            'INSERT OR REPLACE INTO cart_snapshot (id, seq, state) VALUES (1, ?, ?)',
+            (self.seq, json.dumps(store.export_state(), ensure_ascii=False)),
+        )
+        conn.execute('DELETE FROM cart_log WHERE seq <= ?', (self.seq,))
+        self._snapshot_seq = self.seq
+
+    def sync(self):
+        """Commit ile zaten diske yazıldı"""
+
+    def snapshot(self):
+        pass
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+# Global scraper instance
+scraper = HepsiburadaScraper()
+# Birden çok worker varsa arama cache'inin SQLite katmanı paylaşımlı veritabanında
+search_cache = SearchCache(db_path=SEARCH_CACHE_DB or SHARED_STATE_DB)
+search_flights = SingleFlight()
+
+def cached_search(term: str, cancel: threading.Event = None):
+    """Cache'ten ya da canlı olarak ara: (ürünler veya None, cache'ten mi).
+    Aynı terim için eşzamanlı canlı aramalar tek getirmede birleştirilir.
+    """
+    cached = search_cache.get('hb', term)
+    if cached is not None:
+        return cached, True
+
+    def fetch(flight_cancel):
+        products = scraper.search_products(term, flight_cancel)
+        # Boş sonuçlar cache'lenmez (geçici hata olabilir)
+        if products:
+            search_cache.set('hb', term, products)
+        return products, scraper.used_browser()
+
+    (products, used_browser), shared = search_flights.do(normalize_term(term), fetch, cancel)
+    if shared:
+        log_event(logging.INFO, 'search.coalesced', "🔗 '%s' için süren arama paylaşıldı (tarayıcı: %s)", term,
+                  'evet' if used_browser else 'hayır')
+        if used_browser:
+            search_flights.record_saved_browser_fetch()
+    return products, False
+
+# Sepet: değişiklikler cart_write() altında yapılır ve journal'a (ya da paylaşımlı loga) yazılır
+cart_lock = threading.RLock()
+cart = CartStore()
+cart_journal = SharedCartLog(SHARED_STATE_DB) if SHARED_STATE_DB else CartJournal()
+_cart_storage_ready = False
+
+def _cart_state():
+    with cart_lock:
+        return cart_journal.seq, json.dumps({'seq': cart_journal.seq, 'next_id': cart.next_id, 'items': cart.to_list()},
+                                            ensure_ascii=False)
+
+def init_cart_storage():
+    """Sepeti journal'dan kurtar ve arka plan yazıcısını başlat (süreç başına bir kez).
+    Modül yüklenirken yapılmaz: app'i import eden script'ler ve tekil kontrolde
+    kapanacak ikinci instance kullanıcının journal'ını açmaz. Açılışta çağrılır,
+    unutulan giriş noktaları için ilk sepet erişimi de çağırır.
+    """
+    global _cart_storage_ready
+    with cart_lock:
+        if _cart_storage_ready:
+            return
+        if SHARED_STATE_DB or CART_JOURNAL_ENABLED:
+            cart_journal.recover(cart)
+            cart_journal.start(_cart_state)
+        _cart_storage_ready = True
+
+@contextmanager
+def cart_write(atomic: bool = False):
+    """Sepeti değiştiren bloklar için: yerel kilit + (çoklu worker'da) süreçler arası yazma kilidi.
+    `atomic` ise blok hata verince sepet bloğa girmeden önceki haline döner (O(n) kopya).
+    """
+    with cart_lock:
+        if not _cart_storage_ready:
+            init_cart_storage()
+        with cart_journal.transaction(cart):
+            if not atomic:
+                yield
+                return
+            state = cart.export_state()
+            try:
+                yield
+            except BaseException:
+                cart.import_state(state)
+                raise
+
+@contextmanager
+def cart_read():
+    """Sepeti okuyan bloklar için: diğer worker'ların değişikliklerini uygula"""
+    with cart_lock:
+        if not _cart_storage_ready:
+            init_cart_storage()
+        cart_journal.catch_up(cart)
+        yield
+
+# Kullanıcı oturumları: sunucuda tablo yok, imzalı ve süreli token cookie'de taşınır.
+# Doğrulama yalnızca imza + zaman kontrolüdür (O(1)), her worker bağımsız yapabilir.
+SESSION_TTL = int(os.getenv('SESSION_TTL', str(12 * 3600)))
+# Eski sürümlerin kaynakta duran anahtarı: bununla imzalanan token herkesçe üretilebilir
+_PUBLIC_SECRET_KEYS = ('hepsiburada_secret_key_2024',)
+SECRET_KEY_FILE = os.path.join(CART_DATA_DIR, '.secret_key')
+
+def load_secret_key() -> str:
+    """Oturum imza anahtarı: SECRET_KEY, yoksa veri klasöründe bir kez üretilip saklanan rastgele anahtar.
+    Dosya O_EXCL ile oluşturulur; aynı anda açılan worker'lar aynı anahtarı okur.
+    """
+    key = os.getenv('SECRET_KEY', '').strip()
+    if key and key not in _PUBLIC_SECRET_KEYS:
+        return key
+    if key:
+        log_event(logging.WARNING, 'auth.secret', '⚠️ SECRET_KEY herkesçe bilinen eski değer, yok sayıldı')
+    try:
+        fd = os.open(SECRET_KEY_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    except FileExistsError:
+        for _ in range(50):
+            with open(SECRET_KEY_FILE, encoding='utf-8') as f:
+                key = f.read().strip()
+            if key:
+                return key
+            # Başka bir worker dosyayı henüz yazıyor
+            time.sleep(0.02)
+        raise RuntimeError(f'{SECRET_KEY_FILE} boş; silip yeniden başlatın')
+    except OSError as e:
+        log_event(logging.WARNING, 'auth.secret', '⚠️ Anahtar dosyası yazılamadı (%s), oturumlar yeniden başlatınca düşer', e)
+        return secrets.token_urlsafe(32)
+    key = secrets.token_urlsafe(32)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(key)
+    log_event(logging.INFO, 'auth.secret', '🔑 Oturum anahtarı üretildi: %s', SECRET_KEY_FILE)
+    return key
+
+_session_signer = None
+
+def session_signer() -> URLSafeTimedSerializer:
+    """Oturum token imzalayıcısı; anahtar ilk kullanımda yüklenir (import veri klasörüne yazmasın)"""
+    global _session_signer
+    if _session_signer is None:
+        # Birden çok worker/process aynı anahtarı kullanmalı
+        app.secret_key = load_secret_key()
+        _session_signer = URLSafeTimedSerializer(app.secret_key, salt='hb-session')
+    return _session_signer
+
+def issue_session_token() -> str:
+    """Yeni oturum için imzalı token üret"""
+    return session_signer().dumps({'sid': uuid.uuid4().hex})
+
+def read_session_token(token: str):
+    """Token geçerliyse oturum kimliğini döndür; imza bozuk ya da süresi dolmuşsa None"""
+    if not token:
+        return None
+    try:
+        data = session_signer().loads(token, max_age=SESSION_TTL)
+    except BadSignature:  # SignatureExpired da bir BadSignature'dır
+        return None
+    return data.get('sid') if isinstance(data, dict) else None
+
+def current_session_id():
+    return read_session_token(request.cookies.get('session_id'))
+
+def login_response():
+    """Başarılı giriş yanıtı: oturum token'ını cookie olarak ver"""
+    response = jsonify({'success': True, 'redirect': '/'})
+    response.set_cookie('session_id', issue_session_token(), max_age=SESSION_TTL,
+                        httponly=True, samesite='Lax')
+    return response
+
+def check_auth():
+    """Şifre kontrolü - Geliştirme modunda atla"""
+    if DEVELOPMENT_MODE:
+        return True
+    return current_session_id() is not None
+
+def is_port_in_use(port: int) -> bool:
+    """Belirtilen port dinlemede mi?"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.3)
+            return s.connect_ex(('127.0.0.1', port)) == 0
+    except Exception:
+        return False
+
+@app.route('/')
+def index():
+    # Şifre kontrolü
+    if not check_auth():
+        return render_template('login.html')
+    return render_template('index.html')
+
+@app.route('/api/login', methods=['POST'])
+def login():
+    """Şifre ile giriş yap - Şifre cache'ten, Google Sheets arka planda yenilenir"""
+    data = request.json
+    password = data.get('password', '')
+    
+    if DEVELOPMENT_MODE:
+        # Geliştirme modunda: Şifreyi atla
+        return login_response()
+    
+    # Şifre cache'ten gelir; eşleşmezse Sheets'te yeni değişmiş olabilir, koşullu olarak yeniden kontrol et
+    current_password = get_password_from_sheet()
+    if current_password is not None and password != current_password:
+        current_password = password_cache.recheck()
+    
+    if password == current_password:
+        return login_response()
+    else:
+        log_event(logging.WARNING, 'auth.failed', '❌ Yanlış şifre girildi', remote=request.remote_addr)
+        return jsonify({'success': False, 'error': 'Yanlış şifre!'}), 401
+
+def search_response(payload: Dict, status: int = 200):
+    """Arama sonucunu JSON yanıtına çevir (süresi 'json' aşaması olarak ölçülür)"""
+    with search_metrics.stage('json'):
+        response = jsonify(payload)
+    return response, status
+
+@app.route('/api/search', methods=['POST'])
+def search():
+    data = request.json
+    barcode = data.get('barcode', '')
+    
+    if not barcode:
+        return jsonify({'error': 'Arama terimi boş olamaz'}), 400
+    
+    products, cached = cached_search(barcode)
+    
+    if products is None:
+        return jsonify({'error': 'HTML içeriği alınamadı'}), 500
+    
+    log_event(logging.DEBUG, 'search.result', 'Bulunan ürün sayısı: %s', len(products))
+    
+    return search_response({'products': products, 'cached': cached})
+
+@app.route('/api/search-hb', methods=['POST'])
+def search_hb():
+    data = request.json
+    term = data.get('barcode', '').strip()
+    if not term:
+        return jsonify({'error': 'Arama terimi boş olamaz'}), 400
+
+    # Önce cache, sonra HTTP, gerekirse Selenium ile ara
+    products, cached = cached_search(term)
+    if products is None:
+        return jsonify({'products': []})
+
+    return search_response({'products': products, 'cached': cached})
+
+# Asenkron arama işleri
+SEARCH_JOB_WORKERS = max(1, int(os.getenv('SEARCH_JOB_WORKERS', str(DRIVER_POOL_SIZE * 2))))
+# Biten işlerin sonuçlarının tutulma süresi (sn)
+SEARCH_JOB_TTL = float(os.getenv('SEARCH_JOB_TTL', '300'))
+# Long-poll / SSE için en fazla bekleme (sn)
+SEARCH_JOB_MAX_WAIT = float(os.getenv('SEARCH_JOB_MAX_WAIT', '30'))
+
+
+class SearchJob:
+    """Arka planda çalışan tek bir arama ve sonucu"""
+
+    def __init__(self, term: str, owner: str = None):
+        self.id = uuid.uuid4().hex
+        self.term = term
+        self.owner = owner
+        self.status = 'queued'  # queued, running, done, cancelled, error
+        self.products = None
+        self.cached = False
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.done.is_set()
+
+    def to_dict(self) -> Dict:
+        data = {'job_id': self.id, 'barcode': self.term, 'status': self.status}
+        if self.status == 'done':
+            data['products'] = self.products
+            data['cached'] = self.cached
+        if self.error:
+            data['error'] = self.error
+        if self.finished_at:
+            data['elapsed'] = round(self.finished_at - self.created_at, 3)
+        return data
+
+
+class SharedJobTable:
+    """Arama işlerinin worker'lar arası görünen durumu (SQLite, WAL).
+
+    İşi çalıştıran worker durum değişikliklerini yazar; polling/SSE isteği
+    başka bir worker'a düşerse durum buradan okunur. Başka worker'dan gelen
+    iptal `cancel_requested` ile işaretlenir, işi çalıştıran worker bunu
+    kısa aralıklarla kontrol edip kendi iptal event'ini tetikler.
+    """
+
+    ACTIVE = ('queued', 'running')
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS search_jobs ('
+                'id TEXT PRIMARY KEY, owner TEXT, status TEXT NOT NULL, payload TEXT NOT NULL, '
+                'cancel_requested INTEGER NOT NULL DEFAULT 0, finished_at REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS search_jobs_owner ON search_jobs (owner)')
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = _connect_shared_db(self.path)
+            self._pid = os.getpid()
+        return self._conn
+
+    def save(self, job: SearchJob):
+        payload = json.dumps(job.to_dict(), ensure_ascii=False)
+        with self._lock:
+            self._connection().execute(
+                'INSERT INTO search_jobs (id, owner, status, payload, finished_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET status = excluded.status, payload = excluded.payload, '
+                'finished_at = excluded.finished_at',
+                (job.id, job.owner, job.status, payload, job.finished_at)
+            )
+
+    def load(self, job_id: str):
+        with self._lock:
+            row = self._connection().execute('SELECT payload FROM search_jobs WHERE id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Henüz bitmemiş işi iptal için işaretle"""
+        with self._lock:
+            cur = self._connection().execute(
+                'UPDATE search_jobs SET cancel_requested = 1 WHERE id = ? AND status IN (?, ?)',
+                (job_id,) + self.ACTIVE
+            )
+        return cur.rowcount > 0
+
+    def supersede(self, owner: str, keep_id: str) -> int:
+        """Aynı oturumun (başka worker'lardaki) önceki işlerini iptal için işaretle"""
+        with self._lock:
+            cur = self._connection().execute(
+                'UPDATE search_jobs SET cancel_requested = 1 '
+                'WHERE owner = ? AND id != ? AND cancel_requested = 0 AND status IN (?, ?)',
+                (owner, keep_id) + self.ACTIVE
+            )
+        return cur.rowcount
+
+    def cancel_requested(self, job_ids: List[str]) -> List[str]:
+        if not job_ids:
+            return []
+        marks = ','.join('?' * len(job_ids))
+        with self._lock:
+            rows = self._connection().execute(
+                f'SELECT id FROM search_jobs WHERE cancel_requested = 1 AND id IN ({marks})', job_ids
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self, cutoff: float):
+        with self._lock:
+            self._connection().execute('DELETE FROM search_jobs WHERE finished_at < ?', (cutoff,))
+
+
+class SearchJobManager:
+    """Arama işlerini thread havuzunda çalıştırır.
+
+    submit() iş kimliğini hemen döner; sonuç polling ya da SSE ile alınır.
+    Aynı oturumdan yeni bir arama gelince önceki iş iptal edilir: kuyruktaysa
+    hiç başlamaz, çalışıyorsa driver kuyruğu, sayfa hazır olma beklemesi ve
+    denemeler arasında durur ve driver havuza geri döner.
+
+    `table` verilirse (çoklu worker) iş durumları paylaşımlı tabloya da
+    yazılır: status/wait/cancel işi başka bir worker çalıştırıyor olsa da
+    çalışır.
+    """
+
+    def __init__(self, runner, workers: int = SEARCH_JOB_WORKERS, ttl: float = SEARCH_JOB_TTL,
+                 table: SharedJobTable = None):
+        self.runner = runner  # (term, cancel_event) -> (ürünler veya None, cache'ten mi)
+        self.ttl = ttl
+        self.table = table
+        self._stop = threading.Event()
+        self._watcher = None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='search-job')
+        self._jobs = OrderedDict()
+        self._by_owner: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.superseded = 0
+        self.failed = 0
+        self.remote_cancels = 0
+
+    def submit(self, term: str, owner: str = None) -> SearchJob:
+        job = SearchJob(term, owner)
+        if self.table is not None:
+            self.table.save(job)
+            if owner and self.table.supersede(owner, job.id):
+                with self._lock:
+                    self.superseded += 1
+            self.table.prune(time.time() - self.ttl)
+            self._start_watcher()
+        with self._lock:
+            self._prune()
+            previous = self._jobs.get(self._by_owner.get(owner)) if owner else None
+            self._jobs[job.id] = job
+            if owner:
+                self._by_owner[owner] = job.id
+            self.submitted += 1
+        if previous is not None and not previous.finished:
+            with self._lock:
+                self.superseded += 1
+            self.cancel(previous.id)
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: SearchJob):
+        if job.cancel_event.is_set():
+            self._finish(job, 'cancelled')
+            return
+        job.status = 'running'
+        job.started_at = time.time()
+        if self.table is not None:
+            self.table.save(job)
+        try:
+            products, cached = self.runner(job.term, job.cancel_event)
+        except SearchCancelled:
+            self._finish(job, 'cancelled')
+        except Exception as e:
+            log_event(logging.ERROR, 'jobs.error', '❌ Arama işi hatası (%s): %s', job.term, e, exc_info=True)
+            self._finish(job, 'error', error=str(e))
+        else:
+            job.products = products or []
+            job.cached = cached
+            self._finish(job, 'done', error=None if products is not None else 'HTML içeriği alınamadı')
+
+    def _finish(self, job: SearchJob, status: str, error: str = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        with self._lock:
+            if status == 'done':
+                self.completed += 1
+            elif status == 'cancelled':
+                self.cancelled += 1
+            else:
+                self.failed += 1
+        if self.table is not None:
+            try:
+                self.table.save(job)
+            except sqlite3.Error as e:
+                log_event(logging.WARNING, 'jobs.shared', '⚠️ İş durumu paylaşımlı tabloya yazılamadı: %s', e)
+        job.done.set()
+
+    def cancel(self, job_id: str) -> bool:
+        """İşi iptal et; zaten bitmişse False"""
+        job = self.get(job_id)
+        if job is None:
+            # Başka bir worker'ın işi: o worker'ın izleyicisi iptal eder
+            return self.table.request_cancel(job_id) if self.table is not None else False
+        if job.finished:
+            return False
+        job.cancel_event.set()
+        # Driver kuyruğunda bekliyorsa hemen çıksın
+        scraper.pool.wake()
+        return True
+
+    def get(self, job_id: str):
+        """Bu worker'da çalışan iş"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str):
+        """İş durumu (dict); iş yoksa None"""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.table.load(job_id) if self.table is not None else None
+
+    def wait(self, job_id: str, timeout: float):
+        """İş bitene ya da süre dolana kadar bekle, son durumu dön"""
+        job = self.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+            return job.to_dict()
+        if self.table is None:
+            return None
+        deadline = time.perf_counter() + timeout
+        while True:
+            data = self.table.load(job_id)
+            remaining = deadline - time.perf_counter()
+            if data is None or data['status'] not in SharedJobTable.ACTIVE or remaining <= 0:
+                return data
+            if self._stop.wait(min(0.1, remaining)):
+                return data
+
+    def _start_watcher(self):
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch_cancellations, name='search-job-cancel', daemon=True)
+        self._watcher.start()
+
+    def _watch_cancellations(self):
+        """Başka worker'lardan gelen iptal isteklerini yerel işlere uygula"""
+        while not self._stop.wait(0.2):
+            with self._lock:
+                active = [j.id for j in self._jobs.values() if not j.finished and not j.cancel_event.is_set()]
+            try:
+                requested = self.table.cancel_requested(active)
+            except sqlite3.Error as e:
+                log_event(logging.WARNING, 'jobs.shared', '⚠️ İptal istekleri okunamadı: %s', e)
+                continue
+            for job_id in requested:
+                job = self.get(job_id)
+                if job is not None:
+                    job.cancel_event.set()
+                    with self._lock:
+                        self.remote_cancels += 1
+            if requested:
+                scraper.pool.wake()
+
+    def _prune(self):
+        """TTL'i dolmuş bitmiş işleri at (kilit altında çağrılır)"""
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            job = self._jobs.pop(job_id)
+            if job.owner and self._by_owner.get(job.owner) == job_id:
+                del self._by_owner[job.owner]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if not j.finished)
+            return {
+                'jobs': len(self._jobs),
+                'active': active,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'cancelled': self.cancelled,
+                'superseded': self.superseded,
+                'failed': self.failed,
+                'remote_cancels': self.remote_cancels,
+                'shared': self.table is not None,
+            }
+
+    def close(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        self._stop.set()
+        for job in jobs:
+            job.cancel_event.set()
+        self._executor.shutdown(wait=False)
+
+
+search_jobs = SearchJobManager(cached_search, table=SharedJobTable(SHARED_STATE_DB) if SHARED_STATE_DB else None)
+
+def _job_wait_seconds(value) -> float:
+    try:
+        return min(max(float(value), 0.0), SEARCH_JOB_MAX_WAIT)
+    except (TypeError, ValueError):
+        return 0.0
+
+@app.route('/api/search-jobs', methods=['POST'])
+def submit_search_job():
+    """Arama işi başlat: iş kimliği hemen döner (202).
+    `wait` (sn) verilirse o kadar süre içinde biten iş (ör. cache) doğrudan döner.
+    Aynı oturumun önceki araması iptal edilir.
+    """
+    data = request.get_json(silent=True) or {}
+    term = str(data.get('barcode', '')).strip()
+    if not term:
+        return jsonify({'error': 'Arama terimi boş olamaz'}), 400
+
+    job = search_jobs.submit(term, owner=current_session_id())
+    job.done.wait(_job_wait_seconds(data.get('wait')))
+    return search_response(job.to_dict(), 200 if job.finished else 202)
+
+@app.route('/api/search-jobs/<job_id>', methods=['GET'])
+def get_search_job(job_id):
+    """İş durumu (polling). `?wait=<sn>` ile iş bitene kadar bekler (long-poll)."""
+    status = search_jobs.wait(job_id, _job_wait_seconds(request.args.get('wait')))
+    if status is None:
+        return jsonify({'error': 'İş bulunamadı'}), 404
+    return search_response(status)
+
+@app.route('/api/search-jobs/<job_id>', methods=['DELETE'])
+def cancel_search_job(job_id):
+    status = search_jobs.status(job_id)
+    if status is None:
+        return jsonify({'error': 'İş bulunamadı'}), 404
+    cancelled = search_jobs.cancel(job_id)
+    return jsonify({'success': True, 'cancelled': cancelled, 'status': status['status']})
+
+@app.route('/api/search-jobs/<job_id>/events', methods=['GET'])
+def search_job_events(job_id):
+    """İş durumunu Server-Sent Events ile akıt: önce mevcut durum, bitince sonuç"""
+    status = search_jobs.status(job_id)
+    if status is None:
+        return jsonify({'error': 'İş bulunamadı'}), 404
 
-            # Ürün adı
-            title_match = re.search(r'title="([^"]*?)"', card_html)
-            if title_match:
-                product_name = title_match.group(1)
-                product_name = product_name.replace('&amp;', '&').replace('&quot;', '"').replace('&lt;', '<').replace('&gt;', '>')
-                product['name'] = product_name.strip()
+    def generate():
+        current = status
+        yield f"data: {json.dumps(current, ensure_ascii=False)}\n\n"
+        deadline = time.perf_counter() + SEARCH_JOB_MAX_WAIT
+        while current['status'] in SharedJobTable.ACTIVE:
+            current = search_jobs.wait(job_id, min(15.0, max(0.0, deadline - time.perf_counter()))) or current
+            if current['status'] not in SharedJobTable.ACTIVE:
+                break
+            if time.perf_counter() >= deadline:
+                # İstemci aynı uca yeniden bağlanır (EventSource otomatik yeniden dener)
+                return
+            yield ": keep-alive\n\n"
+        yield f"data: {json.dumps(current, ensure_ascii=False)}\n\n"
 
-            # Stok kodu
-            href_match = re.search(r'href="([^"]*?)"', card_html)
-            if href_match:
-                href = href_match.group(1)
-                stock_code = self.extract_stock_code_from_url(href)
-                product['stock_code'] = stock_code
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
-            # Görsel URL
-            img_match = re.search(r'<img[^>]*src="([^"]*)"[^>]*>', card_html)
-            if img_match:
-                product['image_url'] = img_match.group(1)
-            else:
-                product['image_url'] = ""
+BATCH_CONCURRENCY = max(1, int(os.getenv('BATCH_CONCURRENCY', str(DRIVER_POOL_SIZE * 2))))
+BATCH_MAX_TERMS = int(os.getenv('BATCH_MAX_TERMS', '500'))
+# Toplu arama dosyası: en fazla boyut (KB) ve satır sayısı (tekrarlar ayıklanmadan önce)
+BATCH_MAX_UPLOAD_KB = int(os.getenv('BATCH_MAX_UPLOAD_KB', '1024'))
+BATCH_MAX_ROWS = int(os.getenv('BATCH_MAX_ROWS', str(BATCH_MAX_TERMS * 4)))
 
-            if product.get('name'):
-                products.append(product)
+def read_batch_terms(upload, max_rows: int = None) -> List[str]:
+    """Yüklenen CSV/XLSX dosyasının ilk sütunundan arama terimlerini oku.
+    `max_rows` aşılırsa dosyanın geri kalanı okunmadan ValueError fırlatılır.
+    """
+    filename = (upload.filename or '').lower()
+    rows = []
 
-        return products
+    def add(value):
+        if max_rows is not None and len(rows) >= max_rows:
+            raise ValueError(f'en fazla {max_rows} satır okunabilir')
+        rows.append(value)
 
-    def extract_stock_code_from_url(self, url: str) -> str:
-        """Hepsiburada ürün URL'sinden stok kodunu çıkarır ve UPPERCASE döner.
-        Öncelik: HBV/HBCV -> pm-/p- sonrası kod -> yol sonu bloğu.
-        """
+    if filename.endswith(('.xlsx', '.xlsm')):
+        from openpyxl import load_workbook
+        wb = load_workbook(upload.stream, read_only=True, data_only=True)
         try:
-            from urllib.parse import urlparse, unquote
-            parsed = urlparse(url or '')
-            path = unquote(parsed.path or '')
-
-            # 1) HB varyantları (case-insensitive)
-            m = re.search(r'(HBCV[0-9A-Z]+)', path, re.IGNORECASE)
-            if not m:
-                m = re.search(r'(HBV[0-9A-Z]+)', path, re.IGNORECASE)
-            if not m:
-                m = re.search(r'(HBC[0-9A-Z]+)', path, re.IGNORECASE)
-            if m:
-                code = m.group(1)
-                code = re.sub(r'[^0-9A-Z]', '', code.upper())
-                return code[:24]
-
-            # 2) pm-/p- sonrası alfasayısal blok
-            m = re.search(r'/(?:pm|p)-([a-z0-9]+)', path, re.IGNORECASE)
-            if m:
-                code = m.group(1)
-                code = re.sub(r'[^0-9A-Z]', '', code.upper())
-                return code[:24]
-
-            # 3) Yol sonu bloğu: en sondaki '-' sonrası 6+ uzun alfasayısal
-            last_seg = (path.split('/')[-1]) if path else ''
-            m = re.search(r'-([a-z0-9]{6,})$', last_seg, re.IGNORECASE)
-            if m:
-                code = m.group(1)
-                code = re.sub(r'[^0-9A-Z]', '', code.upper())
-                return code[:24]
-
-            return "Bulunamadı"
-        except Exception:
-            return "Bulunamadı"
+            for row in wb.active.iter_rows(max_col=1, values_only=True):
+                add(row[0])
+        finally:
+            wb.close()
+    else:
+        text = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', errors='replace', newline='')
+        for row in csv.reader(text):
+            add(row[0] if row else '')
 
-    def close(self):
-        """Tarayıcıyı kapat"""
-        if self.driver:
-            self.driver.quit()
+    terms = [str(v).strip() for v in rows if v is not None and str(v).strip()]
+    # Başlık satırını atla
+    if terms and terms[0].lower() in ('barkod', 'barcode', 'barkodno', 'arama', 'term'):
+        terms = terms[1:]
+    return terms
 
+@app.route('/api/search-batch', methods=['POST'])
+def search_batch():
+    """Toplu barkod arama - sonuçlar hazır oldukça NDJSON/SSE olarak akar"""
+    # Gövde okunmadan önce boyut kontrolü (MAX_CONTENT_LENGTH genel üst sınırdır)
+    if (request.content_length or 0) > BATCH_MAX_UPLOAD_KB * 1024:
+        return jsonify({'error': f'Dosya en fazla {BATCH_MAX_UPLOAD_KB} KB olabilir'}), 413
+    try:
+        upload = request.files.get('file')
+    except RequestEntityTooLarge:
+        return jsonify({'error': f'Dosya en fazla {BATCH_MAX_UPLOAD_KB} KB olabilir'}), 413
+    if upload is not None:
+        try:
+            terms = read_batch_terms(upload, BATCH_MAX_ROWS)
+        except Exception as e:
+            return jsonify({'error': f'Dosya okunamadı: {e}'}), 400
+    else:
+        data = request.get_json(silent=True) or {}
+        barcodes = data.get('barcodes') or []
+        if not isinstance(barcodes, list):
+            return jsonify({'error': 'barcodes bir liste olmalı'}), 400
+        if len(barcodes) > BATCH_MAX_ROWS:
+            return jsonify({'error': f'En fazla {BATCH_MAX_ROWS} satır gönderilebilir'}), 400
+        terms = [str(t).strip() for t in barcodes if str(t).strip()]
 
-# Global scraper instance
-scraper = HepsiburadaScraper()
-found_products = []
+    # Aynı terimi bir kez ara (sıra korunur)
+    seen, unique_terms = set(), []
+    for t in terms:
+        key = normalize_term(t)
+        if key not in seen:
+            seen.add(key)
+            unique_terms.append(t)
+    if not unique_terms:
+        return jsonify({'error': 'Arama terimi boş olamaz'}), 400
+    if len(unique_terms) > BATCH_MAX_TERMS:
+        return jsonify({'error': f'En fazla {BATCH_MAX_TERMS} barkod aranabilir'}), 400
 
-# Kullanıcı oturum takibi
-authenticated_users = {}
+    use_sse = request.args.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
 
-def check_auth():
-    """Şifre kontrolü - Geliştirme modunda atla"""
-    if DEVELOPMENT_MODE:
-        return True
-    
-    session_id = request.cookies.get('session_id')
-    if session_id and session_id in authenticated_users:
-        return True
-    
-    return False
+    def encode(payload: Dict) -> str:
+        line = json.dumps(payload, ensure_ascii=False)
+        return f"data: {line}\n\n" if use_sse else line + "\n"
 
-def is_port_in_use(port: int) -> bool:
-    """Belirtilen port dinlemede mi?"""
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(0.3)
-            return s.connect_ex(('127.0.0.1', port)) == 0
-    except Exception:
-        return False
+    # İstemci ayrılınca süren aramalar da (yalnızca kuyruktakiler değil) bırakılır
+    batch_cancel = threading.Event()
 
-@app.route('/')
-def index():
-    # Şifre kontrolü
-    if not check_auth():
-        return render_template('login.html')
-    return render_template('index.html')
+    def run_one(index: int, term: str) -> Dict:
+        if batch_cancel.is_set():
+            return {'index': index, 'barcode': term, 'products': [], 'error': 'İptal edildi'}
+        try:
+            products, cached = cached_search(term, batch_cancel)
+            if products is None:
+                return {'index': index, 'barcode': term, 'products': [], 'error': 'HTML içeriği alınamadı'}
+            return {'index': index, 'barcode': term, 'products': products, 'cached': cached}
+        except Exception as e:
+            return {'index': index, 'barcode': term, 'products': [], 'error': str(e)}
 
-@app.route('/api/login', methods=['POST'])
-def login():
-    """Şifre ile giriş yap - Her seferinde Google Sheets'ten şifreyi al"""
-    data = request.json
-    password = data.get('password', '')
-    
-    if DEVELOPMENT_MODE:
-        # Geliştirme modunda: Şifreyi atla
-        import uuid
-        session_id = str(uuid.uuid4())
-        authenticated_users[session_id] = True
-        response = jsonify({'success': True, 'redirect': '/'})
-        response.set_cookie('session_id', session_id)
-        return response
-    
-    # Her login'de şifreyi Google Sheets'ten tekrar al
-    current_password = get_password_from_sheet()
-    
-    if password == current_password:
-        import uuid
-        session_id = str(uuid.uuid4())
-        authenticated_users[session_id] = True
-        response = jsonify({'success': True, 'redirect': '/'})
-        response.set_cookie('session_id', session_id)
-        return response
-    else:
-        print(f"❌ Yanlış şifre girildi. Beklenen: {current_password}")
-        return jsonify({'success': False, 'error': 'Yanlış şifre!'}), 401
+    def generate():
+        started = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(unique_terms)))
+        found = 0
+        futures = []
+        try:
+            futures = [executor.submit(run_one, i, t) for i, t in enumerate(unique_terms)]
+            for future in as_completed(futures):
+                result = future.result()
+                if result.get('products'):
+                    found += 1
+                yield encode(result)
+            yield encode({
+                'done': True,
+                'count': len(unique_terms),
+                'found': found,
+                'elapsed': round(time.perf_counter() - started, 3),
+            })
+        finally:
+            # İstemci bağlantıyı kestiyse süren aramaları durdur, bekleyenleri iptal et
+            batch_cancel.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
 
-@app.route('/api/search', methods=['POST'])
-def search():
-    data = request.json
-    barcode = data.get('barcode', '')
-    
-    if not barcode:
-        return jsonify({'error': 'Arama terimi boş olamaz'}), 400
-    
-    html_content = scraper.get_html_content(barcode)
-    
-    if not html_content:
-        return jsonify({'error': 'HTML içeriği alınamadı'}), 500
-    
-    print(f"DEBUG: HTML uzunluğu: {len(html_content)}")
-    
-    products = scraper.parse_products(html_content)
-    
-    print(f"DEBUG: Bulunan ürün sayısı: {len(products)}")
-    
-    return jsonify({'products': products, 'cached': False})
+    mimetype = 'text/event-stream' if use_sse else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={'Cache-Control': 'no-cache'})
 
-@app.route('/api/search-hb', methods=['POST'])
-def search_hb():
-    data = request.json
-    term = data.get('barcode', '').strip()
-    if not term:
-        return jsonify({'error': 'Arama terimi boş olamaz'}), 400
+STOCK_CODE_BATCH_MAX = int(os.getenv('STOCK_CODE_BATCH_MAX', '100000'))
 
-    # Selenium ile ara
-    html = scraper.get_html_content(term)
-    if not html:
-        return jsonify({'products': []})
-    products: List[Dict] = scraper.parse_products(html)
+@app.route('/api/stock-codes', methods=['POST'])
+def stock_codes():
+    """Ürün URL'lerinden toplu stok kodu: `{"urls": [...]}` ya da `file` (CSV/XLSX, ilk sütun URL)"""
+    if 'file' in request.files:
+        try:
+            # +1: başlık satırı
+            urls = read_batch_terms(request.files['file'], STOCK_CODE_BATCH_MAX + 1)
+        except Exception as e:
+            return jsonify({'error': f'Dosya okunamadı: {e}'}), 400
+        if urls and urls[0].lower() in ('url', 'link', 'adres'):
+            urls = urls[1:]
+    else:
+        data = request.get_json(silent=True) or {}
+        urls = data.get('urls')
+        if not isinstance(urls, list):
+            return jsonify({'error': 'urls bir liste olmalı'}), 400
+    if len(urls) > STOCK_CODE_BATCH_MAX:
+        return jsonify({'error': f'En fazla {STOCK_CODE_BATCH_MAX} URL gönderilebilir'}), 400
 
-    return jsonify({'products': products, 'cached': False})
+    codes = extract_stock_codes(urls)
+    return jsonify({
+        'success': True,
+        'codes': codes,
+        'found': sum(1 for code in codes if code != STOCK_CODE_NOT_FOUND),
+    })
 
 # (Kaldırıldı) cache-clear / driver-status / driver-restart uç noktaları
 
@@ -450,28 +3316,42 @@ def parse_google_titles(html: str) -> List[str]:
                 uniq.append(t)
         return uniq[:20]
     except Exception as e:
-        print(f"Google parse hatası: {e}")
+        log_event(logging.WARNING, 'titles.parse', 'Google parse hatası: %s', e)
         return []
 
-def get_google_titles_with_selenium(query: str) -> List[str]:
+def get_google_titles_with_selenium(query: str, cancel: threading.Event = None) -> List[str]:
+    """Google sonuç başlıkları (Chrome). `cancel` set edilirse driver kuyruğundan ve
+    hazır olma beklemesinden çıkılır, sayfa durdurulup driver havuza bırakılır.
+    """
     try:
-        if not scraper.driver:
-            # Driver yoksa yeniden kurmayı dene
-            try:
-                scraper._setup_driver()
-            except Exception as _:
+        started = time.perf_counter()
+        with scraper.pool.checkout(cancel=cancel) as slot:
+            search_metrics.observe('acquire', time.perf_counter() - started, 'google')
+            if not slot:
                 return []
-
-        url = f"https://www.google.com/search?q={query}&hl=tr&gl=tr&pws=0"
-        scraper.driver.get(url)
-        wait = WebDriverWait(scraper.driver, 8)
-        wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        scraper.driver.execute_script("window.scrollTo(0, 600);")
-        scraper.driver.execute_script("window.scrollTo(0, 1200);")
-        html = scraper.driver.page_source
-        return parse_google_titles(html)
+            driver = slot.driver
+            url = f"{GOOGLE_URL}?q={query}&hl=tr&gl=tr&pws=0"
+            resource_blocker.apply(driver, 'google')
+            with search_metrics.stage('navigate', 'google'):
+                slot.navigate(url)
+            if cancel is not None and cancel.is_set():
+                HepsiburadaScraper._stop_loading(driver)
+                return []
+            with search_metrics.stage('ready_wait', 'google'):
+                readiness.wait(driver, GOOGLE_READINESS, cancel)
+            if cancel is not None and cancel.is_set():
+                HepsiburadaScraper._stop_loading(driver)
+                return []
+            with search_metrics.stage('page_source', 'google'):
+                html = driver.page_source
+            resource_blocker.record_traffic(driver, 'google')
+            slot.record_success()
+        with search_metrics.stage('parse', 'google'):
+            return parse_google_titles(html)
+    except SearchCancelled:
+        return []
     except Exception as e:
-        print(f"Google Selenium hatası: {e}")
+        log_event(logging.WARNING, 'titles.google', 'Google Selenium hatası: %s', e)
         return []
 
 def parse_duck_titles(html: str) -> List[str]:
@@ -493,7 +3373,7 @@ def parse_duck_titles(html: str) -> List[str]:
                 uniq.append(t)
         return uniq[:20]
     except Exception as e:
-        print(f"Duck parse hatası: {e}")
+        log_event(logging.WARNING, 'titles.parse', 'Duck parse hatası: %s', e)
         return []
 
 def parse_bing_titles(html: str) -> List[str]:
@@ -514,9 +3394,131 @@ def parse_bing_titles(html: str) -> List[str]:
                 uniq.append(t)
         return uniq[:20]
     except Exception as e:
-        print(f"Bing parse hatası: {e}")
+        log_event(logging.WARNING, 'titles.parse', 'Bing parse hatası: %s', e)
         return []
 
+# --- Hedged çoklu motor başlık araması ---
+TITLE_LOOKUP_MODE = os.getenv('TITLE_LOOKUP_MODE', 'hedged').strip().lower()
+TITLE_MIN_RESULTS = int(os.getenv('TITLE_MIN_RESULTS', '3'))
+TITLE_LOOKUP_TIMEOUT = float(os.getenv('TITLE_LOOKUP_TIMEOUT', '12'))
+TITLE_HTTP_TIMEOUT = float(os.getenv('TITLE_HTTP_TIMEOUT', '5'))
+GOOGLE_HEDGE_DELAY = float(os.getenv('GOOGLE_HEDGE_DELAY', '1.5'))
+# Arama motoru adresleri (benchmarks/standin_sites.py ile yerel sunucuya yönlendirilebilir)
+GOOGLE_URL = os.getenv('GOOGLE_URL', 'https://www.google.com/search')
+DUCK_URL = os.getenv('DUCK_URL', 'https://html.duckduckgo.com/html/')
+BING_URL = os.getenv('BING_URL', 'https://www.bing.com/search')
+
+def get_duck_titles_with_http(query: str) -> List[str]:
+    """DuckDuckGo HTML uç noktası (JavaScript gerektirmez)"""
+    resp = scraper.http.get(DUCK_URL, params={'q': query, 'kl': 'tr-tr'}, timeout=TITLE_HTTP_TIMEOUT)
+    resp.raise_for_status()
+    return parse_duck_titles(resp.text)
+
+def get_bing_titles_with_http(query: str) -> List[str]:
+    resp = scraper.http.get(BING_URL, params={'q': query, 'setlang': 'tr', 'cc': 'TR'}, timeout=TITLE_HTTP_TIMEOUT)
+    resp.raise_for_status()
+    return parse_bing_titles(resp.text)
+
+class TitleEngine:
+    """Başlık arama motoru + gecikme ve başarı istatistikleri"""
+
+    def __init__(self, name: str, fetch, hedge_delay: float = 0.0, cancellable: bool = False):
+        self.name = name
+        self.fetch = fetch
+        self.hedge_delay = hedge_delay  # >0 ise ancak bu süre sonunda kazanan yoksa başlar
+        # fetch(query, cancel) imzalı motorlar: kazanan çıkınca driver beklemesinden hemen çıkar
+        self.cancellable = cancellable
+        self.latency = Histogram()
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.successes = 0
+        self.failures = 0
+        self.wins = 0
+        self.cancelled = 0
+
+    def record(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            data = {
+                'attempts': self.attempts,
+                'successes': self.successes,
+                'failures': self.failures,
+                'wins': self.wins,
+                'cancelled': self.cancelled,
+                'success_rate': (self.successes / self.attempts) if self.attempts else 0.0,
+            }
+        data['latency'] = self.latency.snapshot()
+        return data
+
+class HedgedTitleLookup:
+    """Birden çok motoru eşzamanlı sorgula, eşiği geçen ilk sonucu döndür.
+
+    Hafif HTTP motorları hemen başlar; tarayıcı gerektiren motor
+    `hedge_delay` kadar bekler ve bu sürede kazanan çıkarsa hiç başlamaz.
+    Kazanan bulununca geri kalan aramalar iptal işaretiyle bırakılır.
+    """
+
+    def __init__(self, engines: List[TitleEngine], min_results: int = TITLE_MIN_RESULTS,
+                 timeout: float = TITLE_LOOKUP_TIMEOUT):
+        self.engines = engines
+        self.min_results = min_results
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max(4, len(engines) * 4), thread_name_prefix='title')
+
+    def _run(self, engine: TitleEngine, query: str, cancel: threading.Event):
+        if engine.hedge_delay and cancel.wait(engine.hedge_delay):
+            return engine, None
+        if cancel.is_set():
+            return engine, None
+        engine.record('attempts')
+        started = time.perf_counter()
+        try:
+            titles = engine.fetch(query, cancel) if engine.cancellable else engine.fetch(query)
+        except Exception as e:
+            log_event(logging.WARNING, 'titles.engine', '⚠️ %s başlık araması hatası: %s', engine.name, e)
+            titles = []
+        engine.latency.observe(time.perf_counter() - started)
+        if cancel.is_set():
+            engine.record('cancelled')
+        elif len(titles) >= self.min_results:
+            engine.record('successes')
+        else:
+            engine.record('failures')
+        return engine, titles
+
+    def lookup(self, query: str):
+        """(başlıklar, kazanan motor adı) döndürür"""
+        cancel = threading.Event()
+        futures = [self._executor.submit(self._run, e, query, cancel) for e in self.engines]
+        best_titles, best_engine = [], None
+        try:
+            for future in as_completed(futures, timeout=self.timeout):
+                engine, titles = future.result()
+                if titles is None:
+                    continue
+                if len(titles) >= self.min_results:
+                    engine.record('wins')
+                    return titles, engine.name
+                if len(titles) > len(best_titles):
+                    best_titles, best_engine = titles, engine.name
+        except Exception:
+            log_event(logging.WARNING, 'titles.timeout', '⏳ Başlık araması %.0f sn içinde tamamlanamadı', self.timeout)
+        finally:
+            cancel.set()
+        return best_titles, best_engine
+
+    def stats(self) -> Dict:
+        return {e.name: e.stats() for e in self.engines}
+
+title_lookup = HedgedTitleLookup([
+    TitleEngine('duckduckgo', get_duck_titles_with_http),
+    TitleEngine('bing', get_bing_titles_with_http),
+    TitleEngine('google', get_google_titles_with_selenium, hedge_delay=GOOGLE_HEDGE_DELAY, cancellable=True),
+])
+
 @app.route('/api/search-google', methods=['POST'])
 def search_google():
     data = request.json
@@ -525,13 +3527,41 @@ def search_google():
         return jsonify({'error': 'Arama terimi boş olamaz'}), 400
 
     try:
-        titles = get_google_titles_with_selenium(query)
+        mode = (data.get('mode') or TITLE_LOOKUP_MODE).strip().lower()
+        if mode == 'hedged':
+            titles, engine = title_lookup.lookup(query)
+        else:
+            titles, engine = get_google_titles_with_selenium(query), 'google'
         products = [{'name': t, 'stock_code': '', 'image_url': ''} for t in titles]
-        return jsonify({'products': products})
+        return jsonify({'products': products, 'engine': engine})
     except Exception as e:
-        print(f"Google Selenium genel hata: {e}")
+        log_event(logging.ERROR, 'titles.google', 'Google Selenium genel hata: %s', e)
         return jsonify({'products': []})
 
+def _resolve_cart_item(data: Dict):
+    """İstekteki `id`'ye (ya da eski istemciler için `index`'e) göre satırı bul"""
+    item_id = data.get('id')
+    if item_id is None and data.get('index') is not None:
+        item_id = cart.id_at(data.get('index'))
+    return cart.get(item_id) if item_id is not None else None
+
+def _valid_quantity(quantity) -> bool:
+    """Pozitif tam sayı; JSON true/false Python'da int alt sınıfıdır, adet sayılmaz"""
+    return type(quantity) is int and quantity >= 1
+
+def _validate_cart_product(barcode, product, quantity, source=None) -> str:
+    """/api/add ve toplu `add` gövdesini doğrula; hata mesajı ya da '' döndür"""
+    if (not isinstance(product, dict) or not isinstance(product.get('name'), str) or not product['name']
+            or not isinstance(product.get('stock_code'), str)):
+        return 'Geçersiz ürün'
+    if barcode is not None and not isinstance(barcode, str):
+        return 'Geçersiz barkod'
+    if source is not None and not isinstance(source, str):
+        return 'Geçersiz kaynak'
+    if not _valid_quantity(quantity):
+        return 'Geçersiz adet'
+    return ''
+
 @app.route('/api/manual-add', methods=['POST'])
 def manual_add():
     data = request.json
@@ -543,199 +3573,614 @@ def manual_add():
     if barcode and not barcode.isdigit():
         return jsonify({'error': 'Barkod sadece sayı olabilir'}), 400
 
-    new_product = {
-        'barcode': barcode,
-        'stock_code': barcode if barcode else '',
-        'name': name if quantity == 1 else f"{name} * {quantity} Adet",
-        'image_url': '',
-        'price': '',
-        'quantity': quantity,
-        'source': 'manual'
-    }
-    found_products.append(new_product)
+    with cart_write():
+        item = cart.add(
+            barcode=barcode,
+            stock_code=barcode if barcode else '',
+            name=name if quantity == 1 else f"{name} * {quantity} Adet",
+            image_url='',
+            price='',
+            quantity=quantity,
+            source='manual',
+        )
+        new_product = item.to_dict()
+        cart_journal.append({'op': 'add', 'item': new_product})
     return jsonify({'success': True, 'product': new_product})
 
-@app.route('/api/add', methods=['POST'])
-def add_product():
-    data = request.json
-    barcode = data.get('barcode')
-    product = data.get('product')
-    quantity = data.get('quantity', 1)
-    replace_existing = data.get('replace_existing', False)
-    source = (data.get('source') or '').strip().lower() or ('google' if replace_existing else 'hb')
-    
-    # Aynı stok kodlu ürün var mı kontrol et
-    existing_index = None
-    for i, item in enumerate(found_products):
-        if item.get('stock_code') == product['stock_code'] and item.get('barcode') == barcode:
-            existing_index = i
-            break
+def cart_add_product(barcode, product: Dict, quantity: int, replace_existing: bool, source: str):
+    """Ürünü sepete ekle ya da mevcut satırı güncelle.
+    (satır, journal kaydı, yanıt bayrakları) döndürür; cart_write() içinde çağrılmalı.
+    """
+    # Aynı stok kodlu ürün var mı kontrol et (hash indeksi, O(1))
+    existing = cart.find(product['stock_code'], barcode)
     
-    if existing_index is not None:
+    if existing is not None:
         # HB: her zaman adet artır
         if not replace_existing:
-            found_products[existing_index]['quantity'] += quantity
-            updated_qty = found_products[existing_index]['quantity']
+            updated_qty = existing.quantity + quantity
             base_incoming = (product.get('name') or '').split(' * ')[0]
-            found_products[existing_index]['name'] = base_incoming if updated_qty == 1 else f"{base_incoming} * {updated_qty} Adet"
-            if not found_products[existing_index].get('source'):
-                found_products[existing_index]['source'] = source
-            print(f"✅ (HB) Adet artırıldı: {base_incoming} - {updated_qty} adet")
-            return jsonify({'success': True, 'product': found_products[existing_index], 'updated': True})
+            cart.update(
+                existing,
+                quantity=updated_qty,
+                name=base_incoming if updated_qty == 1 else f"{base_incoming} * {updated_qty} Adet",
+                source=existing.source or source,
+            )
+            log_event(logging.DEBUG, 'cart.add', '✅ (HB) Adet artırıldı: %s - %s adet', base_incoming, updated_qty)
+            return existing, {'op': 'set', 'item': existing.to_dict()}, {'updated': True}
         
         # Google: isim aynıysa adet artır, farklıysa değiştir (adet=1)
-        existing_base = (found_products[existing_index].get('name') or '').split(' * ')[0].strip()
+        existing_base = (existing.name or '').split(' * ')[0].strip()
         incoming_base = (product.get('name') or '').split(' * ')[0].strip()
         if existing_base.lower() == incoming_base.lower():
-            found_products[existing_index]['quantity'] += quantity
-            updated_qty = found_products[existing_index]['quantity']
-            found_products[existing_index]['name'] = existing_base if updated_qty == 1 else f"{existing_base} * {updated_qty} Adet"
-            if not found_products[existing_index].get('source'):
-                found_products[existing_index]['source'] = source
-            print(f"✅ (Google) Aynı isim, adet artırıldı: {existing_base} - {updated_qty} adet")
-            return jsonify({'success': True, 'product': found_products[existing_index], 'updated': True, 'replaced': False})
+            updated_qty = existing.quantity + quantity
+            cart.update(
+                existing,
+                quantity=updated_qty,
+                name=existing_base if updated_qty == 1 else f"{existing_base} * {updated_qty} Adet",
+                source=existing.source or source,
+            )
+            log_event(logging.DEBUG, 'cart.add', '✅ (Google) Aynı isim, adet artırıldı: %s - %s adet', existing_base, updated_qty)
+            return existing, {'op': 'set', 'item': existing.to_dict()}, {'updated': True, 'replaced': False}
         else:
             # Değiştir - adedi 1'e çek ve adı güncelle
-            found_products[existing_index]['quantity'] = 1
-            found_products[existing_index]['name'] = incoming_base
-            if product.get('stock_code'):
-                found_products[existing_index]['stock_code'] = product['stock_code']
-            found_products[existing_index]['image_url'] = product.get('image_url', found_products[existing_index].get('image_url', ''))
-            found_products[existing_index]['price'] = product.get('price', found_products[existing_index].get('price', ''))
-            found_products[existing_index]['source'] = source
-            print(f"♻️ (Google) Farklı isim, ürün değiştirildi: {incoming_base}")
-            return jsonify({'success': True, 'product': found_products[existing_index], 'updated': True, 'replaced': True})
+            cart.update(
+                existing,
+                quantity=1,
+                name=incoming_base,
+                stock_code=product.get('stock_code') or existing.stock_code,
+                image_url=product.get('image_url', existing.image_url),
+                price=product.get('price', existing.price),
+                source=source,
+            )
+            log_event(logging.DEBUG, 'cart.add', '♻️ (Google) Farklı isim, ürün değiştirildi: %s', incoming_base)
+            return existing, {'op': 'set', 'item': existing.to_dict()}, {'updated': True, 'replaced': True}
+
+    # Yeni ürün ekle
+    base_name = product.get('name', '')
+    product_name = base_name if quantity == 1 else f"{base_name} * {quantity} Adet"
+    stock_code = product.get('stock_code') or barcode or ''
+    
+    item = cart.add(
+        barcode=barcode,
+        stock_code=stock_code,
+        name=product_name,
+        image_url=product.get('image_url', ''),
+        price=product.get('price', ''),
+        quantity=quantity,
+        source=source,
+    )
+    log_event(logging.DEBUG, 'cart.add', '➕ Yeni ürün eklendi: %s - %s adet', product['name'], quantity)
+    return item, {'op': 'add', 'item': item.to_dict()}, {'updated': False}
+
+def cart_set_quantity(product: CartItem, quantity: int) -> Dict:
+    """Adedi ve adet ekli ismi güncelle; journal kaydını döndür"""
+    base_name = product.name.split(' * ')[0]  # Temel ürün adı
+    product_name = base_name if quantity == 1 else f"{base_name} * {quantity} Adet"
+    cart.update(product, quantity=quantity, name=product_name)
+    return {'op': 'set', 'item': product.to_dict()}
+
+def cart_edit(product: CartItem, name: str, barcode: str) -> Dict:
+    """İsim/barkod düzenle; journal kaydını döndür"""
+    qty = product.quantity or 1
+    changes = {
+        'name': name if qty == 1 else f"{name} * {qty} Adet",
+        'barcode': barcode,
+    }
+    # Google kaynaklı ürünlerde düzenleme sonrası barkod ve stok kodu eşitlensin
+    if barcode:
+        if (product.source or '').lower() == 'google':
+            changes['stock_code'] = barcode
+        elif not product.stock_code:
+            changes['stock_code'] = barcode
     else:
-        # Yeni ürün ekle
-        base_name = product.get('name', '')
-        product_name = base_name if quantity == 1 else f"{base_name} * {quantity} Adet"
-        stock_code = product.get('stock_code') or barcode or ''
-        
-        new_product = {
-            'barcode': barcode,
-            'stock_code': stock_code,
-            'name': product_name,
-            'image_url': product.get('image_url', ''),
-            'price': product.get('price', ''),
-            'quantity': quantity,
-            'source': source
-        }
-        
-        found_products.append(new_product)
-        print(f"➕ Yeni ürün eklendi: {product['name']} - {quantity} adet")
-        return jsonify({'success': True, 'product': new_product, 'updated': False})
+        # Barkod silindiğinde stok kodunu da sil
+        changes['stock_code'] = ''
+    cart.update(product, **changes)
+    return {'op': 'set', 'item': product.to_dict()}
+
+@app.route('/api/add', methods=['POST'])
+def add_product():
+    data = request.json
+    barcode = data.get('barcode')
+    product = data.get('product')
+    quantity = data.get('quantity', 1)
+    replace_existing = data.get('replace_existing', False)
+    error = _validate_cart_product(barcode, product, quantity, data.get('source'))
+    if error:
+        return jsonify({'error': error}), 400
+    source = (data.get('source') or '').strip().lower() or ('google' if replace_existing else 'hb')
+    
+    with cart_write():
+        item, record, flags = cart_add_product(barcode, product, quantity, replace_existing, source)
+        cart_journal.append(record)
+        return jsonify({'success': True, 'product': record['item'], **flags})
+
+# Versiyonlar sıfırlanınca (tek süreçte her açılışta) değişir; farklı epoch'lu istemciler tam liste alır
+CART_EPOCH = cart_journal.epoch
 
 @app.route('/api/products', methods=['GET'])
 def get_products():
-    return jsonify({'products': found_products})
+    """Sepet: `?since=<versiyon>&epoch=<epoch>` ile yalnızca değişenler, ETag/304 destekli"""
+    with cart_read():
+        version = cart.version
+        etag = f'"{CART_EPOCH}-{version}"'
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=304, headers={'ETag': etag})
+
+        since = request.args.get('since', type=int)
+        delta = None
+        if since is not None and request.args.get('epoch') == CART_EPOCH:
+            delta = cart.changes_since(since)
+        if delta is not None:
+            changed, removed = delta
+            payload = {'version': version, 'epoch': CART_EPOCH, 'full': False, 'changed': changed, 'removed': removed}
+        else:
+            payload = {'version': version, 'epoch': CART_EPOCH, 'full': True, 'products': cart.to_list()}
+
+    response = jsonify(payload)
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/items/<int:item_id>', methods=['DELETE'])
+def delete_item(item_id):
+    """Satırı sabit id'siyle sil (O(1), eşzamanlı silmelerde güvenli)"""
+    with cart_write():
+        deleted = cart.delete(item_id)
+        if deleted is None:
+            return jsonify({'error': 'Ürün bulunamadı'}), 404
+        cart_journal.append({'op': 'delete', 'id': item_id})
+        return jsonify({'success': True, 'deleted': deleted.to_dict()})
 
 @app.route('/api/delete/<int:index>', methods=['DELETE'])
 def delete_product(index):
-    if 0 <= index < len(found_products):
-        deleted = found_products.pop(index)
-        return jsonify({'success': True, 'deleted': deleted})
-    return jsonify({'error': 'Geçersiz index'}), 400
+    """Eski index tabanlı silme (geriye uyumluluk)"""
+    with cart_write():
+        item_id = cart.id_at(index)
+        if item_id is None:
+            return jsonify({'error': 'Geçersiz index'}), 400
+        return delete_item(item_id)
 
 @app.route('/api/update-quantity', methods=['POST'])
 def update_quantity():
     data = request.json
-    index = data.get('index')
     quantity = data.get('quantity', 1)
+    if not _valid_quantity(quantity):
+        return jsonify({'error': 'Geçersiz adet'}), 400
     
-    if not (0 <= index < len(found_products)):
-        return jsonify({'error': 'Geçersiz index'}), 400
-    
-    # Mevcut ürünü al
-    product = found_products[index]
-    
-    # Yeni adet ile ürün ismini güncelle
-    if quantity == 1:
-        product_name = product['name'].split(' * ')[0]  # Sadece ürün adını al
-    else:
-        base_name = product['name'].split(' * ')[0]  # Temel ürün adı
-        product_name = f"{base_name} * {quantity} Adet"
-    
-    # Güncelle
-    found_products[index]['quantity'] = quantity
-    found_products[index]['name'] = product_name
-    
-    return jsonify({'success': True, 'product': found_products[index]})
+    with cart_write():
+        product = _resolve_cart_item(data)
+        if product is None:
+            return jsonify({'error': 'Geçersiz ürün'}), 400
+        record = cart_set_quantity(product, quantity)
+        cart_journal.append(record)
+        return jsonify({'success': True, 'product': record['item']})
 
 @app.route('/api/edit-product', methods=['POST'])
 def edit_product():
     data = request.json
-    index = data.get('index')
     name = (data.get('name') or '').strip()
     barcode = (data.get('barcode') or '').strip()
-    if index is None or not (0 <= index < len(found_products)):
-        return jsonify({'error': 'Geçersiz index'}), 400
     if not name:
         return jsonify({'error': 'İsim boş olamaz'}), 400
     if barcode and not barcode.isdigit():
         return jsonify({'error': 'Barkod sadece sayı olabilir'}), 400
 
-    product = found_products[index]
-    qty = product.get('quantity', 1)
-    base_name = name
-    product_name = base_name if qty == 1 else f"{base_name} * {qty} Adet"
-    product['name'] = product_name
-    product['barcode'] = barcode
-    # Google kaynaklı ürünlerde düzenleme sonrası barkod ve stok kodu eşitlensin
-    if barcode:
-        if (product.get('source') or '').lower() == 'google':
-            product['stock_code'] = barcode
-        elif not product.get('stock_code'):
-            product['stock_code'] = barcode
-    else:
-        # Barkod silindiğinde stok kodunu da sil
-        product['stock_code'] = ''
-    found_products[index] = product
-    return jsonify({'success': True, 'product': product})
+    with cart_write():
+        product = _resolve_cart_item(data)
+        if product is None:
+            return jsonify({'error': 'Geçersiz ürün'}), 400
+        record = cart_edit(product, name, barcode)
+        cart_journal.append(record)
+        return jsonify({'success': True, 'product': record['item']})
+
+CART_BATCH_MAX_OPS = int(os.getenv('CART_BATCH_MAX_OPS', '1000'))
+
+def _validate_cart_batch(ops) -> str:
+    """Tüm işlemleri uygulamadan önce doğrula; hata mesajı ya da '' döndür.
+    Doğrulanan bir toplu işlem uygulanırken hata veremez (ya hepsi ya hiçbiri).
+    """
+    if not isinstance(ops, list) or not ops:
+        return 'İşlem listesi boş olamaz'
+    if len(ops) > CART_BATCH_MAX_OPS:
+        return f'En fazla {CART_BATCH_MAX_OPS} işlem gönderilebilir'
+    removed = set()
+    cleared = False
+    for i, op in enumerate(ops):
+        kind = op.get('op') if isinstance(op, dict) else None
+        if kind == 'clear':
+            cleared = True
+            continue
+        if kind == 'add':
+            error = _validate_cart_product(op.get('barcode'), op.get('product'), op.get('quantity', 1), op.get('source'))
+            if error:
+                return f'#{i}: {error}'
+            continue
+        if kind not in ('update', 'edit', 'delete'):
+            return f'#{i}: Bilinmeyen işlem'
+        item_id = op.get('id')
+        if type(item_id) is not int:
+            return f'#{i}: Geçersiz id'
+        if cleared or item_id in removed or cart.get(item_id) is None:
+            return f'#{i}: Ürün bulunamadı ({item_id})'
+        if kind == 'delete':
+            removed.add(item_id)
+        elif kind == 'update':
+            if not _valid_quantity(op.get('quantity')):
+                return f'#{i}: Geçersiz adet'
+        else:
+            if not isinstance(op.get('name'), str) or not (op.get('barcode') is None or isinstance(op['barcode'], str)):
+                return f'#{i}: Geçersiz ürün'
+            name = (op.get('name') or '').strip()
+            barcode = (op.get('barcode') or '').strip()
+            if not name:
+                return f'#{i}: İsim boş olamaz'
+            if barcode and not barcode.isdigit():
+                return f'#{i}: Barkod sadece sayı olabilir'
+    return ''
+
+@app.route('/api/cart/batch', methods=['POST'])
+def cart_batch():
+    """Birden çok sepet işlemini tek istekte, atomik olarak uygula.
+    İşlemler: add, update (adet), edit (isim/barkod), delete, clear.
+    """
+    data = request.get_json(silent=True) or {}
+    ops = data.get('ops')
+    # Doğrulamadan kaçan bir hata olursa yarım uygulanmış işlemler geri alınır
+    with cart_write(atomic=True):
+        error = _validate_cart_batch(ops)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+
+        records, results = [], []
+        for op in ops:
+            kind = op['op']
+            if kind == 'clear':
+                cart.clear()
+                records.append({'op': 'clear'})
+                results.append({'op': 'clear'})
+            elif kind == 'add':
+                replace_existing = bool(op.get('replace_existing', False))
+                source = (op.get('source') or '').strip().lower() or ('google' if replace_existing else 'hb')
+                item, record, flags = cart_add_product(
+                    op.get('barcode'), op['product'], op.get('quantity', 1), replace_existing, source
+                )
+                records.append(record)
+                results.append({'op': 'add', 'product': record['item'], **flags})
+            elif kind == 'delete':
+                cart.delete(op['id'])
+                records.append({'op': 'delete', 'id': op['id']})
+                results.append({'op': 'delete', 'id': op['id']})
+            elif kind == 'update':
+                record = cart_set_quantity(cart.get(op['id']), op['quantity'])
+                records.append(record)
+                results.append({'op': 'update', 'product': record['item']})
+            else:
+                record = cart_edit(cart.get(op['id']), op['name'].strip(), (op.get('barcode') or '').strip())
+                records.append(record)
+                results.append({'op': 'edit', 'product': record['item']})
+
+        # Tek journal satırı: çökmede toplu işlem ya tamamen ya hiç uygulanmaz
+        cart_journal.append({'op': 'batch', 'ops': records})
+        return jsonify({'success': True, 'results': results, 'count': len(cart)})
+
+# --- Akış halinde Excel/CSV export (pandas ve geçici dosya yok) ---
+EXPORT_HEADER = ('BarkodNo', 'StokKodu', 'Ürünİsmi', 'GÜN')
+EXPORT_CHUNK_ROWS = 500
+_XML_ILLEGAL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # 0: normal, 1: kalın başlık (pandas çıktısındaki gibi)
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """zipfile'ın yazdığı baytları biriktiren, seek edilemeyen çıktı"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _xlsx_row(row_number: int, values, style: int = 0) -> str:
+    style_attr = f' s="{style}"' if style else ''
+    cells = []
+    for value in values:
+        text = _XML_ILLEGAL_RE.sub('', '' if value is None else str(value))
+        cells.append(f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{xml_escape(text)}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+def iter_xlsx(rows, header=EXPORT_HEADER, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Satırları tek sayfalık XLSX olarak parça parça üret.
+
+    Sayfa XML'i satır satır sıkıştırılarak zip akışına yazılır (ZIP64,
+    data descriptor); bellekte en fazla `chunk_rows` satırlık çıktı tutulur.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            zf.writestr(name, content)
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _xlsx_row(1, header, style=1)
+            ).encode('utf-8'))
+            buffered = []
+            for row_number, values in enumerate(rows, start=2):
+                buffered.append(_xlsx_row(row_number, values))
+                if len(buffered) >= chunk_rows:
+                    sheet.write(''.join(buffered).encode('utf-8'))
+                    buffered.clear()
+                    yield sink.drain()
+            sheet.write((''.join(buffered) + '</sheetData></worksheet>').encode('utf-8'))
+    yield sink.drain()
+
+
+def iter_csv(rows, header=EXPORT_HEADER, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Satırları UTF-8 (BOM'lu, Excel uyumlu) CSV olarak parça parça üret"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write('\ufeff')
+    writer.writerow(header)
+    for i, values in enumerate(rows, start=1):
+        writer.writerow(values)
+        if i % chunk_rows == 0:
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode('utf-8')
+
 
 @app.route('/api/export', methods=['GET'])
 def export_excel():
-    if not found_products:
+    # Sadece gereken alanları kopyala (sepet kilidini kısa tut)
+    with cart_read():
+        rows = [(item.id, item.barcode, item.stock_code, item.name) for item in cart]
+    if not rows:
         return jsonify({'error': 'Export edilecek ürün yok'}), 400
     
     try:
         # Barkod doğrulama: sadece rakam
         invalid = []
-        for idx, p in enumerate(found_products):
-            bc = str(p.get('barcode') or '').strip()
+        for idx, (item_id, barcode, _, name) in enumerate(rows):
+            bc = str(barcode or '').strip()
             if bc and not bc.isdigit():
-                invalid.append({'index': idx, 'name': p.get('name', ''), 'barcode': bc})
+                invalid.append({'index': idx, 'id': item_id, 'name': name or '', 'barcode': bc})
         if invalid:
             return jsonify({'error': 'Lütfen barkodları sadece sayı olacak şekilde düzenleyin.', 'invalid': invalid}), 400
 
         weekday_map = {0:'Pazartesi',1:'Salı',2:'Çarşamba',3:'Perşembe',4:'Cuma',5:'Cumartesi',6:'Pazar'}
         today_day = weekday_map[datetime.now().weekday()]
+        export_rows = ((barcode or '', stock_code or '', name or '', today_day) for _, barcode, stock_code, name in rows)
         
-        export_data = []
-        for p in found_products:
-            export_data.append({
-                'BarkodNo': p.get('barcode', ''),
-                'StokKodu': p.get('stock_code', ''),
-                'Ürünİsmi': p.get('name', ''),
-                'GÜN': today_day
-            })
-        
-        df = pd.DataFrame(export_data)
-        
-        filename = f"bulunanlar_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        # Temp dizin kullan (EXE için)
-        import tempfile
-        temp_dir = tempfile.gettempdir()
-        filepath = os.path.join(temp_dir, filename)
-        
-        df.to_excel(filepath, index=False, engine='openpyxl')
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if request.args.get('format') == 'csv':
+            filename = f"bulunanlar_{stamp}.csv"
+            body, mimetype = iter_csv(export_rows), 'text/csv; charset=utf-8'
+        else:
+            filename = f"bulunanlar_{stamp}.xlsx"
+            body = iter_xlsx(export_rows)
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         
-        return send_file(filepath, as_attachment=True, download_name=filename)
+        return Response(body, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-cache',
+        })
         
     except Exception as e:
-        print(f"❌ Export hatası: {str(e)}")
+        log_event(logging.ERROR, 'export.error', '❌ Export hatası: %s', e, exc_info=True)
         return jsonify({'error': f'Export hatası: {str(e)}'}), 500
 
+class PrometheusText:
+    """Prometheus metin biçimi (text exposition 0.0.4) üretici"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    @staticmethod
+    def _labels(labels: Dict) -> str:
+        if not labels:
+            return ''
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+    @staticmethod
+    def _value(value) -> str:
+        if isinstance(value, float):
+            return repr(value)
+        return str(int(value))
+
+    def add(self, name: str, kind: str, help_text: str, samples):
+        """samples: tek değer ya da [(etiketler, değer), ...]; None değerler atlanır"""
+        if not isinstance(samples, list):
+            samples = [({}, samples)]
+        self.lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in samples:
+            if value is not None:
+                self.lines.append(f'{name}{self._labels(labels)} {self._value(value)}')
+
+    def histogram(self, name: str, help_text: str, series):
+        """series: [(etiketler, Histogram.snapshot()), ...]"""
+        self.lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for labels, snap in series:
+            for le, count in snap['buckets'].items():
+                self.lines.append(f'{name}_bucket{self._labels(dict(labels, le=repr(float(le))))} {count}')
+            self.lines.append(f'{name}_bucket{self._labels(dict(labels, le="+Inf"))} {snap["count"]}')
+            self.lines.append(f'{name}_sum{self._labels(labels)} {self._value(float(snap["sum"]))}')
+            self.lines.append(f'{name}_count{self._labels(labels)} {snap["count"]}')
+
+    def render(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+def render_metrics() -> str:
+    """Tüm bileşenlerin istatistiklerini Prometheus biçiminde topla (süreç başına)"""
+    out = PrometheusText()
+
+    search = search_metrics.stats()
+    out.histogram('hb_search_stage_seconds', 'Arama aşaması süresi (scroll, ready_wait içindedir)',
+                  [({'site': s['site'], 'stage': s['stage']}, s) for s in search['stages']])
+    out.add('hb_searches_total', 'counter', 'Tamamlanan aramalar (yol ve sonuca göre)',
+            [({'path': s['path'], 'outcome': s['outcome']}, s['count']) for s in search['searches']])
+    out.add('hb_search_html_bytes_total', 'counter', 'Alınan arama sayfası HTML boyutu',
+            [({'path': path}, n) for path, n in search['html_bytes'].items()])
+    out.add('hb_search_cards_total', 'counter', 'Aramalarda bulunan ürün kartları',
+            [({'path': path}, n) for path, n in search['cards'].items()])
+    out.add('hb_parse_selector_total', 'counter', 'parse_products tarafından kullanılan kart seçicisi',
+            [({'selector': sel}, n) for sel, n in search['selectors'].items()])
+    out.add('hb_search_retries_total', 'counter', 'Tarayıcı ile sayfa yükleme tekrar denemeleri', search['retries'])
+
+    http = scraper.search_stats()
+    out.add('hb_http_attempts_total', 'counter', 'HTTP öncelikli arama denemeleri', http['http_attempts'])
+    out.add('hb_http_hits_total', 'counter', 'HTTP ile kart bulunan aramalar', http['http_hits'])
+    out.add('hb_browser_fallbacks_total', 'counter', "Tarayıcıya düşen aramalar", http['browser_fallbacks'])
+
+    ready = readiness.stats()
+    out.histogram('hb_readiness_seconds', 'Sayfanın hazır olma süresi',
+                  [({'strategy': name}, s['time_to_ready']) for name, s in ready.items()])
+    out.add('hb_readiness_outcomes_total', 'counter', 'Hazır olma beklemesi sonuçları',
+            [({'strategy': name, 'outcome': o}, n) for name, s in ready.items() for o, n in s['outcomes'].items()])
+
+    pool = scraper.pool.stats()
+    for key in ('size', 'open', 'idle', 'in_use', 'creating', 'waiting'):
+        out.add(f'hb_driver_pool_{key}', 'gauge', f'Driver havuzu: {key}', pool[key])
+    for key in ('checkouts', 'waits', 'timeouts', 'create_failures', 'discarded', 'prewarmed', 'probes', 'probe_failures'):
+        out.add(f'hb_driver_pool_{key}_total', 'counter', f'Driver havuzu: {key}', pool[key])
+    out.add('hb_driver_pool_wait_seconds_max', 'gauge', 'En uzun driver bekleme süresi', pool['wait_time_max'])
+    out.add('hb_driver_recycled_total', 'counter', 'Yenilenen driverlar (nedene göre)',
+            [({'reason': reason}, n) for reason, n in pool['recycled'].items()])
+    out.add('hb_driver_navigations', 'gauge', 'Driver başına sayfa açılışı',
+            [({'driver': d['id']}, d['navigations']) for d in pool['drivers']])
+    out.add('hb_driver_rss_megabytes', 'gauge', 'Driver süreç ağacı belleği',
+            [({'driver': d['id']}, d['rss_mb']) for d in pool['drivers']])
+
+    cache = search_cache.stats()
+    out.add('hb_search_cache_entries', 'gauge', 'Arama cache kayıt sayısı', cache['entries'])
+    for key in ('hits', 'l2_hits', 'misses', 'evictions', 'expirations'):
+        out.add(f'hb_search_cache_{key}_total', 'counter', f'Arama cache: {key}', cache[key])
+
+    flights = search_flights.stats()
+    out.add('hb_search_flights_in_flight', 'gauge', 'Süren birleşik aramalar', flights['in_flight'])
+    for key in ('leaders', 'coalesced', 'abandoned', 'saved_browser_fetches', 'rejoined'):
+        out.add(f'hb_search_flights_{key}_total', 'counter', f'Birleşik arama: {key}', flights[key])
+
+    jobs = search_jobs.stats()
+    out.add('hb_search_jobs', 'gauge', 'Bellekteki arama işleri', jobs['jobs'])
+    out.add('hb_search_jobs_active', 'gauge', 'Süren arama işleri', jobs['active'])
+    for key in ('submitted', 'completed', 'cancelled', 'superseded', 'failed', 'remote_cancels'):
+        out.add(f'hb_search_jobs_{key}_total', 'counter', f'Arama işleri: {key}', jobs[key])
+
+    blocker = resource_blocker.stats()
+    for key in ('pages', 'requests', 'bytes', 'blocked'):
+        out.add(f'hb_browser_traffic_{key}_total', 'counter', f'Tarayıcı trafiği: {key}',
+                [({'site': site}, t[key]) for site, t in blocker['sites'].items()])
+
+    titles = title_lookup.stats()
+    for key in ('attempts', 'successes', 'failures', 'wins', 'cancelled'):
+        out.add(f'hb_title_engine_{key}_total', 'counter', f'Başlık motoru: {key}',
+                [({'engine': engine}, s[key]) for engine, s in titles.items()])
+    out.histogram('hb_title_engine_seconds', 'Başlık motoru yanıt süresi',
+                  [({'engine': engine}, s['latency']) for engine, s in titles.items()])
+
+    password = password_cache.stats()
+    out.add('hb_password_cache_age_seconds', 'gauge', 'Şifrenin son doğrulanmasından beri geçen süre', password['age'])
+    for key in ('fetches', 'not_modified', 'failures', 'hits', 'stale_hits', 'sync_loads'):
+        out.add(f'hb_password_cache_{key}_total', 'counter', f'Şifre cache: {key}', password[key])
+
+    with cart_read():
+        items, version = len(cart), cart.version
+    out.add('hb_cart_items', 'gauge', 'Sepetteki satır sayısı', items)
+    out.add('hb_cart_version', 'gauge', 'Sepet versiyonu', version)
+
+    logs = log_stats()
+    for key in ('queued', 'dropped'):
+        out.add(f'hb_log_records_{key}_total', 'counter', f'Log kayıtları: {key}', logs[key])
+    out.add('hb_log_queue_pending', 'gauge', 'Yazılmayı bekleyen log kayıtları', logs['pending'])
+    out.add('hb_log_sampled_out_total', 'counter', 'Örneklemeyle atlanan log kayıtları',
+            [({'event': event}, n) for event, n in logs['sampled_out'].items()])
+
+    out.add('hb_startup_stage_milliseconds', 'gauge', 'Başlangıç aşaması süresi',
+            [({'stage': stage}, ms) for stage, ms in STARTUP_TIMINGS.items()])
+    out.add('hb_lazy_import_milliseconds', 'gauge', 'Arka planda yüklenen modül süresi',
+            [({'module': name}, ms) for name, ms in LAZY_IMPORT_TIMINGS.items()])
+    return out.render()
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrikleri (çoklu worker'da yanıt veren worker'ın değerleri)"""
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8',
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/debug/logs', methods=['GET'])
+def debug_logs():
+    """Bellekteki son log kayıtları: ?since=<seq>&level=WARNING&event=search.&limit=200"""
+    if not check_auth():
+        return jsonify({'success': False, 'error': 'Giriş gerekli'}), 401
+    level = request.args.get('level', '').strip().upper()
+    records = log_buffer.query(
+        since=request.args.get('since', 0, type=int),
+        level=logging.getLevelName(level) if level in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL') else logging.NOTSET,
+        event=request.args.get('event', '').strip(),
+        limit=min(max(request.args.get('limit', 200, type=int), 0), LOG_BUFFER_SIZE),
+    )
+    return jsonify({'success': True, 'records': records, 'stats': log_stats()})
+
 @app.route('/api/shutdown', methods=['POST'])
 def shutdown():
     """Uygulamayı kapat - Temiz bir şekilde"""
@@ -743,26 +4188,131 @@ def shutdown():
     def cleanup():
         """Temizlik işlemleri"""
         try:
-            # Chrome driver'ı kapat
-            if scraper and scraper.driver:
-                scraper.driver.quit()
+            # Sepet journal'ını diske yaz
+            cart_journal.close()
+        except:
+            pass
+        try:
+            search_jobs.close()
+        except:
+            pass
+        try:
+            # Chrome driver'ları kapat
+            if scraper:
+                scraper.close()
+        except:
+            pass
+        
+        # Gunicorn altında yalnızca bu worker değil, tüm sunucu kapansın
+        master_pid = os.getenv('HB_SERVE_MASTER_PID')
+        if master_pid:
+            try:
+                import signal
+                os.kill(int(master_pid), signal.SIGTERM)
+            except (OSError, ValueError):
+                pass
+        
+        try:
+            # Kuyrukta bekleyen log kayıtlarını yaz
+            log_listener.stop()
         except:
             pass
         
         # System exit
-        import os
         os._exit(0)
     
     # 0.5 saniye bekle ve temizle
-    import threading
     threading.Timer(0.5, cleanup).start()
     return jsonify({'success': True})
 
+def start_background_services():
+    """Worker başına açılış işleri: sepet kurtarma, modül ön yükleme, driver ısıtma, watchdog, şifre cache'i"""
+    init_cart_storage()
+    session_signer()
+    # Selenium/openpyxl ilk aramadan önce arka planda yüklenir; ilk driver da arka planda açılır
+    threading.Thread(target=preload_heavy_modules, daemon=True).start()
+    if not DEVELOPMENT_MODE:
+        # İlk login Sheets'i beklemesin
+        password_cache.start()
+    scraper.pool.prewarm(DRIVER_PREWARM)
+    scraper.pool.start_watchdog(DRIVER_WATCHDOG_INTERVAL)
+
+def serve_production(host: str = SERVE_HOST, port: int = SERVE_PORT, workers: int = SERVE_WORKERS,
+                     threads: int = SERVE_THREADS, on_ready=None):
+    """Çoklu worker ile sun: gunicorn (gthread) > waitress > thread'li werkzeug.
+
+    Gunicorn'da her worker `app` modülünü kendisi yükler; sepet ve arama işleri
+    SHARED_STATE_DB üzerinden paylaşılır, driver havuzu worker başınadır.
+    Windows'ta gunicorn çalışmadığı için waitress tek süreçte
+    workers × threads thread ile sunar.
+    """
+    BaseApplication = None
+    if sys.platform != 'win32':
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            print("⚠️ gunicorn bulunamadı, tek süreçle devam ediliyor")
+
+    if BaseApplication is not None:
+        options = {
+            'bind': f'{host}:{port}',
+            'workers': workers,
+            'worker_class': 'gthread',
+            'threads': threads,
+            # Arama istekleri driver beklemesiyle uzun sürebilir; SSE bağlantıları SEARCH_JOB_MAX_WAIT'te kapanır
+            'timeout': max(120, int(SEARCH_JOB_MAX_WAIT) * 2),
+            'graceful_timeout': 10,
+            'keepalive': 5,
+        }
+        if on_ready:
+            options['when_ready'] = lambda server: on_ready()
+
+        class ProductionServer(BaseApplication):
+            def load_config(self):
+                for key, value in options.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                import app as module
+                module.start_background_services()
+                return module.app
+
+        # /api/shutdown worker'dan tüm sunucuyu kapatabilsin
+        os.environ['HB_SERVE_MASTER_PID'] = str(os.getpid())
+        print(f"🚀 gunicorn: {workers} worker × {threads} thread, http://{host}:{port}")
+        ProductionServer().run()
+        return
+
+    start_background_services()
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    if serve is not None:
+        print(f"🚀 waitress: {workers * threads} thread, http://{host}:{port}")
+        if on_ready:
+            threading.Timer(0.5, on_ready).start()
+        serve(app, host=host, port=port, threads=workers * threads)
+        return
+
+    from werkzeug.serving import make_server
+    server = make_server(host, port, app, threaded=True)
+    print(f"🚀 werkzeug (thread'li): http://{host}:{port}")
+    if on_ready:
+        threading.Thread(target=on_ready, daemon=True).start()
+    server.serve_forever()
+
+startup_mark('init')
+
 if __name__ == '__main__':
     import webbrowser
-    import threading
-    import sys
     import ctypes
+    from werkzeug.serving import make_server
+    
+    APP_URL = f'http://{SERVE_HOST}:{SERVE_PORT}'
+    
+    # --startup-report: sunucuyu bağla, zamanlama dökümünü yaz ve çık (tarayıcı açılmaz)
+    report_only = '--startup-report' in sys.argv
     
     # Konsolu gizle (Windows'ta) - EN BAŞTA
     if sys.platform == 'win32':
@@ -782,29 +4332,50 @@ if __name__ == '__main__':
             app_mutex = kernel32.CreateMutexW(None, True, 'HB_SINGLETON_MUTEX')
             if app_mutex == 0:
                 # Mutex oluşturulamadı, port kontrolüne bak
-                existing_running = is_port_in_use(5001)
+                existing_running = is_port_in_use(SERVE_PORT)
             else:
                 last_error = ctypes.GetLastError()
                 if last_error == 183:  # ERROR_ALREADY_EXISTS
                     existing_running = True
-                elif is_port_in_use(5001):
+                elif is_port_in_use(SERVE_PORT):
                     existing_running = True
         except Exception:
             # Hata durumunda sadece port kontrolü yap
-            existing_running = is_port_in_use(5001)
+            existing_running = is_port_in_use(SERVE_PORT)
     else:
-        existing_running = is_port_in_use(5001)
+        existing_running = is_port_in_use(SERVE_PORT)
 
     if existing_running:
+        if report_only:
+            print(f'❌ Port {SERVE_PORT} kullanımda, başlangıç raporu alınamadı')
+            sys.exit(1)
         # Mevcut instance için sekme aç ve çık
-        webbrowser.open_new_tab('http://127.0.0.1:5001')
+        webbrowser.open_new_tab(APP_URL)
         time.sleep(1.0)
         sys.exit(0)
+    startup_mark('tekil kontrol')
     
-    # Tarayıcıyı ayrı bir thread'de aç
-    def open_browser():
-        time.sleep(1.5)  # Sunucunun başlaması için bekle
-        webbrowser.open('http://127.0.0.1:5001')
+    if SERVE_WORKERS > 1 and not report_only:
+        # Production modu: tarayıcı worker'lar hazır olunca açılır
+        serve_production(on_ready=lambda: webbrowser.open(APP_URL))
+        sys.exit(0)
+    
+    # Portu burada bağla: tarayıcı sabit bir bekleme yerine soket dinlemeye başlar başlamaz açılır
+    server = make_server(SERVE_HOST, SERVE_PORT, app, threaded=True)
+    startup_mark('bind')
+    # İlk istekten önce: kurtarma süresi başlangıç raporunda görünsün
+    init_cart_storage()
+    startup_mark('sepet')
+    
+    if report_only:
+        preload_heavy_modules()
+        print(f"⏱️ Başlangıç raporu: {startup_report()}")
+        server.server_close()
+        scraper.close()
+        cart_journal.close()
+        sys.exit(0)
     
-    threading.Thread(target=open_browser).start()
-    app.run(debug=False, port=5001, use_reloader=False)
+    print(f"⏱️ Başlangıç: {startup_report()}")
+    threading.Thread(target=webbrowser.open, args=(APP_URL,), daemon=True).start()
+    start_background_services()
+    server.serve_forever()
@@ -0,0 +1,172 @@
+"""Sepet toplu işlem regresyon kontrolü: /api/cart/batch ya hepsi ya hiçbiri.
+
+Her mod ayrı bir süreçte, geçici veri klasöründe çalışır:
+    journal  tek süreç: cart_journal.log + snapshot
+    shared   çoklu worker düzeni: SHARED_STATE_DB (SQLite log)
+
+Kontroller:
+    - geçersiz bir işlem (liste barkod, bool adet, bool/liste id...) 400 döner,
+      sepet ve journal değişmez
+    - doğrulamadan geçip uygulanırken patlayan bir toplu işlem 500 döner,
+      önceki işlemleri geri alınır, journal'a hiçbir şey yazılmaz
+    - kapanıştaki snapshot silinmemiş satırları içerir
+    - geçerli bir toplu işlem uygulanır ve journal'a tek kayıt olarak yazılır
+
+Kullanım:
+    python benchmarks/cart_batch_check.py            # iki mod
+    python benchmarks/cart_batch_check.py --mode journal
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('journal', 'shared')
+
+
+def mode_env(mode: str, data_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'CART_DATA_DIR': data_dir,
+        'CART_JOURNAL': 'True',
+        'SHARED_STATE_DB': os.path.join(data_dir, 'app_state.db') if mode == 'shared' else '',
+        'SERVE_WORKERS': '1',
+        'DEVELOPMENT_MODE': 'True',
+        'DRIVER_PREWARM': '0',
+        'LOG_LEVEL': 'WARNING',
+    })
+    return env
+
+
+def run_checks(mode: str, data_dir: str) -> list:
+    """Bu süreçte app'i yükleyip kontrolleri çalıştır; hata mesajları listesi döndür"""
+    os.chdir(data_dir)
+    sys.path.insert(0, ROOT)
+    import app
+
+    client = app.app.test_client()
+    # Enjekte edilen hatanın beklenen traceback'i yazılmasın
+    app.app.logger.disabled = True
+    failures = []
+
+    def check(ok: bool, message: str):
+        if not ok:
+            failures.append(f'{mode}: {message}')
+
+    def cart_state():
+        return client.get('/api/products').get_json()['products']
+
+    def journal_state():
+        if mode == 'shared':
+            conn = app.cart_journal._connection()
+            return conn.execute('SELECT seq, op FROM cart_log ORDER BY seq').fetchall()
+        app.cart_journal.sync()
+        with open(app.cart_journal.journal_path, encoding='utf-8') as f:
+            return f.read()
+
+    ids = []
+    for i in range(3):
+        r = client.post('/api/add', json={'barcode': f'86900000{i}', 'quantity': 1,
+                                          'product': {'name': f'Ürün {i}', 'stock_code': f'HBC{i:06d}'}})
+        check(r.status_code == 200, f'ekleme {i}: {r.status_code}')
+        ids.append(r.get_json()['product']['id'])
+    before_cart, before_journal = cart_state(), journal_state()
+
+    invalid = {
+        'liste barkod': [{'op': 'delete', 'id': ids[0]}, {'op': 'add', 'barcode': ['x'], 'product': {'name': 'X', 'stock_code': 'S'}}],
+        'liste stok kodu': [{'op': 'delete', 'id': ids[0]}, {'op': 'add', 'product': {'name': 'X', 'stock_code': ['S']}}],
+        'bool adet (add)': [{'op': 'add', 'quantity': True, 'product': {'name': 'X', 'stock_code': 'S'}}],
+        'bool adet (update)': [{'op': 'update', 'id': ids[1], 'quantity': True}],
+        'liste id': [{'op': 'delete', 'id': [ids[0]]}],
+        'bool id': [{'op': 'delete', 'id': True}],
+        'sayı isim': [{'op': 'edit', 'id': ids[1], 'name': 5}],
+        'silinmiş satır': [{'op': 'delete', 'id': ids[0]}, {'op': 'update', 'id': ids[0], 'quantity': 2}],
+    }
+    for name, ops in invalid.items():
+        r = client.post('/api/cart/batch', json={'ops': ops})
+        check(r.status_code == 400, f'{name}: 400 bekleniyordu, {r.status_code}')
+        check(cart_state() == before_cart, f'{name}: sepet değişti')
+        check(journal_state() == before_journal, f"{name}: journal'a yazıldı")
+
+    for path, body in (('/api/update-quantity', {'id': ids[1], 'quantity': True}),
+                       ('/api/add', {'barcode': '1', 'quantity': False, 'product': {'name': 'X', 'stock_code': 'S'}})):
+        r = client.post(path, json=body)
+        check(r.status_code == 400, f'{path} bool adet: 400 bekleniyordu, {r.status_code}')
+    check(cart_state() == before_cart, 'tekli uç noktalar sepeti değiştirdi')
+
+    # Doğrulamadan kaçan bir hata: ikinci update uygulanırken patlar
+    original = app.cart_set_quantity
+    calls = []
+
+    def failing_set_quantity(product, quantity):
+        calls.append(product.id)
+        if len(calls) == 2:
+            raise RuntimeError('enjekte edilen hata')
+        return original(product, quantity)
+
+    app.cart_set_quantity = failing_set_quantity
+    try:
+        r = client.post('/api/cart/batch', json={'ops': [
+            {'op': 'delete', 'id': ids[0]},
+            {'op': 'update', 'id': ids[1], 'quantity': 7},
+            {'op': 'update', 'id': ids[2], 'quantity': 9},
+        ]})
+    finally:
+        app.cart_set_quantity = original
+    check(r.status_code == 500, f'enjekte hata: 500 bekleniyordu, {r.status_code}')
+    check(cart_state() == before_cart, 'enjekte hata: sepet geri alınmadı')
+    check(journal_state() == before_journal, "enjekte hata: journal'a yazıldı")
+    r = client.get('/api/products', query_string={'since': 0, 'epoch': app.CART_EPOCH})
+    check(r.status_code == 200, 'enjekte hata sonrası okuma başarısız')
+
+    r = client.post('/api/cart/batch', json={'ops': [
+        {'op': 'delete', 'id': ids[0]},
+        {'op': 'update', 'id': ids[1], 'quantity': 3},
+    ]})
+    check(r.status_code == 200, f'geçerli toplu işlem: {r.status_code}')
+    after = {p['id']: p for p in cart_state()}
+    check(ids[0] not in after and after.get(ids[1], {}).get('quantity') == 3, 'geçerli toplu işlem uygulanmadı')
+
+    app.cart_journal.close()
+    if mode == 'journal':
+        with open(app.cart_journal.snapshot_path, encoding='utf-8') as f:
+            snap_ids = {item['id'] for item in json.load(f)['items']}
+        check(snap_ids == set(after), f'snapshot satırları {sorted(snap_ids)}, beklenen {sorted(after)}')
+        with open(app.cart_journal.journal_path, encoding='utf-8') as f:
+            check(f.read() == '', 'snapshot sonrası journal boşalmadı')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=MODES, action='append', help='yalnızca bu mod (tekrarlanabilir)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        failures = run_checks(args.child, os.environ['CART_DATA_DIR'])
+        for message in failures:
+            print(f'  - {message}')
+        # Journal/havuz thread'lerini beklemeden çık
+        sys.stdout.flush()
+        os._exit(1 if failures else 0)
+
+    failed = False
+    for mode in args.mode or MODES:
+        data_dir = tempfile.mkdtemp(prefix=f'hb_cart_{mode}_')
+        try:
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode],
+                                    env=mode_env(mode, data_dir), cwd=data_dir)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        print(f"{'✅' if result.returncode == 0 else '❌'} {mode}")
+        failed |= result.returncode != 0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Excel export benchmark: eski pandas + geçici dosya yolu vs akış halinde XLSX/CSV.
+
+Kullanım:
+    python benchmarks/export_bench.py            # 10k ve 100k satır
+    python benchmarks/export_bench.py 250000     # özel satır sayıları
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app import'u kullanıcının sepet journal'ına dokunmasın (kurtarma zaten ilk sepet erişimine kadar ertelenir)
+os.environ.setdefault('CART_JOURNAL', 'False')
+from app import EXPORT_HEADER, iter_csv, iter_xlsx  # noqa: E402
+
+
+def make_rows(count: int):
+    return [
+        (f"86900{i:08d}", f"HBC{i:010d}", f"Örnek Ürün {i} & Aksesuar * {i % 5 + 1} Adet", 'Pazartesi')
+        for i in range(count)
+    ]
+
+
+def legacy_export(rows) -> int:
+    """Önceki yol: DataFrame -> geçici .xlsx dosyası -> dosya boyutu"""
+    import pandas as pd
+    df = pd.DataFrame([dict(zip(EXPORT_HEADER, r)) for r in rows])
+    path = os.path.join(tempfile.gettempdir(), 'bench_export_legacy.xlsx')
+    df.to_excel(path, index=False, engine='openpyxl')
+    size = os.path.getsize(path)
+    os.remove(path)  # eski yol bu dosyayı silmiyordu
+    return size
+
+
+def stream_export(fn, rows) -> int:
+    """Akış: parçaları tüketip yalnızca toplam boyutu say (istemciye gönderim gibi)"""
+    total = 0
+    for chunk in fn(iter(rows)):
+        total += len(chunk)
+    return total
+
+
+def measure(label: str, fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<22}{elapsed:>9.2f} sn{peak / 1024 / 1024:>10.1f} MB tepe{size / 1024:>10.0f} KB çıktı")
+
+
+def main(counts):
+    for count in counts:
+        rows = make_rows(count)
+        print(f"{count:,} satır")
+        measure('pandas + temp dosya', lambda: legacy_export(rows))
+        measure('akış XLSX', lambda: stream_export(iter_xlsx, rows))
+        measure('akış CSV', lambda: stream_export(iter_csv, rows))
+
+    # Doğrulama: akış XLSX'i openpyxl ile okunabiliyor mu
+    from openpyxl import load_workbook
+    data = b''.join(iter_xlsx(iter(make_rows(3))))
+    values = list(load_workbook(io.BytesIO(data), read_only=True).active.values)
+    assert values[0] == EXPORT_HEADER and len(values) == 4, values
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000])
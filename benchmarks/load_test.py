@@ -0,0 +1,192 @@
+"""Çoklu worker yük testi: aynı iş yükünü farklı SERVE_WORKERS değerleriyle ölçer.
+
+Her worker sayısı için uygulama ayrı bir portta ve geçici veri klasöründe
+başlatılır (DEVELOPMENT_MODE, driver ısıtma kapalı). Sepet 50 ürünle, arama
+cache'i birkaç terimle doldurulur; ardından çok süreçli keep-alive istemciler
+şu karışımı gönderir:
+
+    %50 GET /api/products (tam liste)
+    %25 GET /api/products?since=...  (delta)
+    %15 POST /api/update-quantity
+    %10 POST /api/search-jobs (cache'ten dönen arama, wait=5)
+
+Kullanım:
+    python benchmarks/load_test.py                          # 1, 2, 4 worker
+    python benchmarks/load_test.py --workers 1,4 --clients 16 --duration 20
+
+Not: worker sayısının etkisi çekirdek sayısıyla sınırlıdır; tek çekirdekli
+makinede worker eklemek yalnızca ek yük getirir.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CART_ITEMS = 50
+SEARCH_TERMS = [f'{8690000000000 + i}' for i in range(10)]
+
+SEED_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+import app
+for term in {terms!r}:
+    app.search_cache.set('hb', term, [{{'name': 'Ürün ' + term, 'stock_code': 'HBC' + term[-6:], 'image_url': ''}}])
+"""
+
+
+def server_env(workers: int, port: int, data_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        'SERVE_WORKERS': str(workers),
+        'SERVE_PORT': str(port),
+        'SERVE_HOST': '127.0.0.1',
+        # Tek worker'da da aynı paylaşımlı durum katmanı kullanılır, karşılaştırma adil olsun
+        'SHARED_STATE_DB': os.path.join(data_dir, 'app_state.db'),
+        'CART_DATA_DIR': data_dir,
+        'DEVELOPMENT_MODE': 'True',
+        'DRIVER_PREWARM': '0',
+        # webbrowser.open'ı etkisiz bir komuta yönlendir
+        'BROWSER': 'true',
+        'PYTHONUNBUFFERED': '1',
+    })
+    return env
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.3)
+            if s.connect_ex(('127.0.0.1', port)) == 0:
+                return True
+        time.sleep(0.2)
+    return False
+
+
+def client(args) -> Dict:
+    """Tek istemci süreci: süre dolana kadar karışık istek gönder"""
+    base, duration, seed = args
+    rng = random.Random(seed)
+    session = requests.Session()
+    counts = {'products': 0, 'delta': 0, 'update': 0, 'search': 0}
+    latencies: List[float] = []
+    errors = 0
+    state = session.get(f'{base}/api/products').json()
+    version, epoch = state['version'], state['epoch']
+    item_ids = [p['id'] for p in state['products']]
+
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        started = time.perf_counter()
+        try:
+            if roll < 0.50:
+                kind = 'products'
+                r = session.get(f'{base}/api/products')
+            elif roll < 0.75:
+                kind = 'delta'
+                r = session.get(f'{base}/api/products', params={'since': max(0, version - 5), 'epoch': epoch})
+            elif roll < 0.90:
+                kind = 'update'
+                r = session.post(f'{base}/api/update-quantity',
+                                 json={'id': rng.choice(item_ids), 'quantity': rng.randint(1, 9)})
+            else:
+                kind = 'search'
+                r = session.post(f'{base}/api/search-jobs', json={'barcode': rng.choice(SEARCH_TERMS), 'wait': 5})
+            ok = r.status_code == 200
+            if ok and kind in ('products', 'delta'):
+                version = r.json().get('version', version)
+        except requests.RequestException:
+            ok = False
+        latencies.append(time.perf_counter() - started)
+        if ok:
+            counts[kind] += 1
+        else:
+            errors += 1
+    return {'counts': counts, 'latencies': latencies, 'errors': errors}
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(workers: int, port: int, clients: int, duration: float) -> Dict:
+    data_dir = tempfile.mkdtemp(prefix=f'hb_load_{workers}_')
+    env = server_env(workers, port, data_dir)
+    base = f'http://127.0.0.1:{port}'
+    subprocess.run([sys.executable, '-c', SEED_SCRIPT.format(root=ROOT, terms=SEARCH_TERMS)],
+                   cwd=data_dir, env=env, check=True, stdout=subprocess.DEVNULL)
+    log = open(os.path.join(data_dir, 'server.log'), 'w')
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'app.py')],
+                              cwd=data_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        if not wait_for_port(port):
+            raise RuntimeError(f'Sunucu başlamadı, bkz. {log.name}')
+        session = requests.Session()
+        for i in range(CART_ITEMS):
+            session.post(f'{base}/api/manual-add', json={'barcode': f'{1000 + i}', 'name': f'Ürün {i}', 'quantity': 1})
+        # Tüm worker'lar ayağa kalkıp modülü yüklesin
+        for _ in range(workers * 4):
+            session.get(f'{base}/api/products')
+
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(client, [(base, duration, seed) for seed in range(clients)])
+    finally:
+        try:
+            requests.post(f'{base}/api/shutdown', timeout=2)
+        except requests.RequestException:
+            pass
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    latencies = [lat for r in results for lat in r['latencies']]
+    counts = {k: sum(r['counts'][k] for r in results) for k in results[0]['counts']}
+    total = sum(counts.values())
+    return {
+        'workers': workers,
+        'rps': total / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'errors': sum(r['errors'] for r in results),
+        'counts': counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4', help='virgülle ayrılmış worker sayıları')
+    parser.add_argument('--clients', type=int, default=8, help='eşzamanlı istemci süreci')
+    parser.add_argument('--duration', type=float, default=10.0, help='her koşu için süre (sn)')
+    parser.add_argument('--port', type=int, default=5101, help='ilk port (her koşu bir artırır)')
+    args = parser.parse_args()
+
+    print(f"🖥️ CPU: {os.cpu_count()}, istemci: {args.clients}, süre: {args.duration:.0f} sn")
+    print(f"{'worker':>7}{'istek/sn':>11}{'p50 ms':>9}{'p95 ms':>9}{'hata':>7}  dağılım")
+    baseline = None
+    for offset, workers in enumerate(int(w) for w in args.workers.split(',')):
+        result = run(workers, args.port + offset, args.clients, args.duration)
+        baseline = baseline or result['rps']
+        counts = ' '.join(f"{k}={v}" for k, v in result['counts'].items())
+        print(f"{workers:>7}{result['rps']:>11.0f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+              f"{result['errors']:>7}  {counts}  (x{result['rps'] / baseline:.2f})")
+
+
+if __name__ == '__main__':
+    main()
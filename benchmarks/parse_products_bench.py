@@ -0,0 +1,118 @@
+"""parse_products benchmark: eski regex yaklaşımı vs tek geçişli akış parser.
+
+Kullanım:
+    python benchmarks/parse_products_bench.py                 # sentetik sayfalar
+    python benchmarks/parse_products_bench.py kayit1.html ... # kayıtlı sayfalar da eklenir
+"""
+import os
+import re
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app import'u kullanıcının sepet journal'ına dokunmasın (kurtarma zaten ilk sepet erişimine kadar ertelenir)
+os.environ.setdefault('CART_JOURNAL', 'False')
+from app import HepsiburadaScraper  # noqa: E402
+
+REGEX_SELECTORS = [
+    r'<article class="productCard-module_article__[^"]*"[^>]*>(.*?)</article>',
+    r'<article[^>]*class="[^"]*productCard[^"]*"[^>]*>(.*?)</article>',
+    r'<div[^>]*class="[^"]*product-card[^"]*"[^>]*>(.*?)</div>',
+    r'<li[^>]*class="[^"]*product[^"]*"[^>]*>(.*?)</li>'
+]
+
+
+def parse_products_regex(scraper: HepsiburadaScraper, html_content: str) -> List[Dict]:
+    """Önceki parse_products (referans) - çoklu DOTALL regex taraması"""
+    products = []
+    product_cards = []
+    for selector in REGEX_SELECTORS:
+        cards = re.findall(selector, html_content, re.DOTALL)
+        if cards:
+            product_cards = cards
+            break
+    for card_html in product_cards:
+        product = {}
+        title_match = re.search(r'title="([^"]*?)"', card_html)
+        if title_match:
+            product_name = title_match.group(1)
+            product_name = product_name.replace('&amp;', '&').replace('&quot;', '"').replace('&lt;', '<').replace('&gt;', '>')
+            product['name'] = product_name.strip()
+        href_match = re.search(r'href="([^"]*?)"', card_html)
+        if href_match:
+            product['stock_code'] = scraper.extract_stock_code_from_url(href_match.group(1))
+        img_match = re.search(r'<img[^>]*src="([^"]*)"[^>]*>', card_html)
+        product['image_url'] = img_match.group(1) if img_match else ""
+        if product.get('name'):
+            products.append(product)
+    return products
+
+
+CARD_TEMPLATE = (
+    '<article class="productCard-module_article__q1w2e" data-test-id="product-card">'
+    '<a href="/urun-adi-{i}-pm-HBC0000{i:05d}" title="Örnek Ürün {i} &amp; Aksesuar" class="productCardLink">'
+    '<div class="image"><img src="https://productimages.hepsiburada.net/s/{i}.jpg" alt="Ürün {i}"></div>'
+    '<h3 class="title"><span>Örnek Ürün {i}</span></h3>'
+    '<div class="price"><span>{price} TL</span><ul><li>Kargo</li></ul></div>'
+    '</a></article>'
+)
+FILLER = '<div class="filler"><span>lorem ipsum</span><script>var x = {i};</script></div>'
+
+
+def synthetic_page(cards: int, filler_blocks: int) -> str:
+    parts = ['<html><head><title>Arama</title></head><body><ul class="results">']
+    for i in range(cards):
+        parts.append(CARD_TEMPLATE.format(i=i, price=100 + i))
+    parts.append('</ul>')
+    parts.extend(FILLER.format(i=i) for i in range(filler_blocks))
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def unclosed_li_page(items: int) -> str:
+    """Kapanmamış <li class="product..."> öğeleri: lazy (.*?)</li> için en kötü durum"""
+    item = '<li class="product-item"><a href="/x-p-HBC{i:06d}" title="Ürün {i}">Ürün {i}</a>'
+    return '<html><body><ul>' + ''.join(item.format(i=i) for i in range(items)) + '</ul></body></html>'
+
+
+def timed(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(paths: List[str]):
+    scraper = HepsiburadaScraper(pool_size=1)
+    pages = [
+        ('küçük (24 kart)', synthetic_page(24, 50)),
+        ('orta (48 kart, ~1 MB)', synthetic_page(48, 12000)),
+        ('büyük (200 kart, ~5 MB)', synthetic_page(200, 60000)),
+        ('kartsız (~5 MB)', synthetic_page(0, 60000)),
+        # Regex burada kapanış bulamayıp 0 kart döner (ve karesel zaman harcar);
+        # akış tarayıcı örtük </li> kuralıyla kartları bulur, sonuçlar beklenen şekilde farklıdır
+        ('kapanmamış li (3000)', unclosed_li_page(3000)),
+    ]
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            pages.append((os.path.basename(path), f.read()))
+
+    print(f"{'sayfa':<28}{'boyut':>10}{'kart':>7}{'regex ms':>11}{'akış ms':>11}{'limit=24 ms':>13}  aynı?")
+    for name, html in pages:
+        old = parse_products_regex(scraper, html)
+        new = scraper.parse_products(html)
+        repeat = 5 if len(html) < 2_000_000 else 2
+        t_regex = timed(lambda: parse_products_regex(scraper, html), repeat)
+        t_stream = timed(lambda: scraper.parse_products(html), repeat)
+        t_limit = timed(lambda: scraper.parse_products(html, limit=24), repeat)
+        print(f"{name:<28}{len(html) / 1024:>8.0f}KB{len(new):>7}"
+              f"{t_regex * 1000:>11.1f}{t_stream * 1000:>11.1f}{t_limit * 1000:>13.1f}  {'evet' if old == new else 'HAYIR'}")
+    scraper.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
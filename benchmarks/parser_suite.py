@@ -0,0 +1,280 @@
+"""Parser benchmark paketi: kayıtlı ve sentetik sayfalarla çevrimdışı ölçüm.
+
+Ölçülen parser'lar: parse_products, extract_stock_code_from_url, extract_stock_codes,
+parse_google_titles, parse_bing_titles, parse_duck_titles.
+
+Her sayfa için sayfa/sn, kart/sn (parser'ın döndürdüğü öğe sayısı), p95
+süresi ve tepe bellek (tracemalloc) raporlanır. Sonuçlar kayıtlı baseline
+ile karşılaştırılır; hız/bellek toleransın dışına çıkarsa ya da parser
+çıktısı değişirse çıkış kodu 1 olur.
+
+Sayfalar:
+    benchmarks/fixtures/hb_*.html       -> parse_products
+    benchmarks/fixtures/google_*.html   -> parse_google_titles
+    benchmarks/fixtures/bing_*.html     -> parse_bing_titles
+    benchmarks/fixtures/duck_*.html     -> parse_duck_titles
+    benchmarks/fixtures/urls_*.txt      -> extract_stock_code_from_url (satır başına bir URL)
+Tarayıcıdan kaydedilen gerçek sayfalar aynı öneklerle bu klasöre (ya da
+--fixtures ile verilen klasöre) eklenebilir. Sentetik sayfalar küçükten
+çok büyüğe (~5 MB) ölçeklenir.
+
+Kullanım:
+    python benchmarks/parser_suite.py                   # ölç ve baseline ile karşılaştır
+    python benchmarks/parser_suite.py --save-baseline   # bu makinede baseline'ı yeniden yaz
+    python benchmarks/parser_suite.py --only parse_products --quick
+
+Baseline makineye bağlıdır: farklı bir makinede karşılaştırmadan önce
+değişiklik öncesi kodla --save-baseline çalıştırın.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# app import'u kullanıcının sepet journal'ına dokunmasın (kurtarma zaten ilk sepet erişimine kadar ertelenir)
+os.environ.setdefault('CART_JOURNAL', 'False')
+import app  # noqa: E402
+from parse_products_bench import synthetic_page, unclosed_li_page  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'parser_baseline.json')
+# Geriye gidiş görünen sayfa bu kadar kez yeniden ölçülür
+RETRIES = 2
+
+FIXTURE_PREFIXES = {
+    'hb_': 'parse_products',
+    'google_': 'parse_google_titles',
+    'bing_': 'parse_bing_titles',
+    'duck_': 'parse_duck_titles',
+    'urls_': 'extract_stock_code_from_url',
+}
+
+
+def build_parsers() -> Dict[str, Callable]:
+    scraper = app.HepsiburadaScraper(pool_size=1)
+    return {
+        'parse_products': scraper.parse_products,
+        # "Sayfa" bir URL listesidir; kart sayısı = URL sayısı
+        'extract_stock_code_from_url': lambda urls: [scraper.extract_stock_code_from_url(u) for u in urls],
+        'extract_stock_codes': app.extract_stock_codes,
+        'parse_google_titles': app.parse_google_titles,
+        'parse_bing_titles': app.parse_bing_titles,
+        'parse_duck_titles': app.parse_duck_titles,
+    }
+
+
+def noise(size_kb: int) -> str:
+    """Sonuçsuz dolgu: script/div blokları (büyük sayfalarda tarama maliyeti)"""
+    block = '<div class="filler"><span>lorem ipsum dolor</span><script>var x = 1;</script></div>'
+    return block * (size_kb * 1024 // len(block))
+
+
+def result_page(parser: str, results: int, filler_kb: int) -> str:
+    """Arama motoru sonuç sayfası: `results` sonuç + dolgu"""
+    rows = []
+    for i in range(results):
+        title = f'Örnek Ürün {i} &amp; Aksesuar <b>Fiyatı</b>'
+        if parser == 'parse_google_titles':
+            rows.append(f'<div class="g"><a href="https://example{i}.com/"><h3 class="LC20lb">{title}</h3></a>'
+                        f'<div class="VwiC3b"><span>Açıklama {i}</span></div></div>')
+        elif parser == 'parse_bing_titles':
+            rows.append(f'<li class="b_algo"><h2><a href="https://example{i}.com/">{title}</a></h2>'
+                        f'<div class="b_caption"><p>Açıklama {i}</p></div></li>')
+        else:
+            rows.append(f'<div class="result"><h2 class="result__title"><a class="result__a" '
+                        f'href="https://example{i}.com/">{title}</a></h2></div>')
+    return '<html><head><title>Arama</title></head><body>' + ''.join(rows) + noise(filler_kb) + '</body></html>'
+
+
+def load_corpus(fixtures_dir: str) -> List[Tuple[str, str, object]]:
+    """(parser, sayfa adı, girdi) listesi: önce kayıtlı sayfalar, sonra sentetikler"""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*'))):
+        name = os.path.basename(path)
+        parser = next((p for prefix, p in FIXTURE_PREFIXES.items() if name.startswith(prefix)), None)
+        if parser is None:
+            continue
+        with open(path, encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        corpus.append((parser, name, text.split() if parser == 'extract_stock_code_from_url' else text))
+
+    corpus += [
+        ('parse_products', 'sentetik 24 kart', synthetic_page(24, 50)),
+        ('parse_products', 'sentetik 48 kart ~1MB', synthetic_page(48, 12000)),
+        ('parse_products', 'sentetik 200 kart ~5MB', synthetic_page(200, 60000)),
+        ('parse_products', 'sentetik kartsız ~5MB', synthetic_page(0, 60000)),
+        ('parse_products', 'kapanmamış li 3000', unclosed_li_page(3000)),
+    ]
+    for parser in ('parse_google_titles', 'parse_bing_titles', 'parse_duck_titles'):
+        corpus += [
+            (parser, 'sentetik 10 sonuç', result_page(parser, 10, 16)),
+            (parser, 'sentetik 100 sonuç ~2MB', result_page(parser, 100, 2048)),
+        ]
+    # Tekrarsız URL'ler: memoize eden bir uygulama cache'ten ölçülmesin
+    sample = [
+        '/urun-{i}-p-HBC0000{i:05d}', '/urun-{i}-pm-HBCV{i:08d}?magaza=x', '/urun-{i}-p-{i:09d}',
+        'https://www.hepsiburada.com/urun-adi-{i}-hbv{i:07d}', 'https://www.hepsiburada.com/urun-{i}-abcdef{i}',
+        'https://www.hepsiburada.com/kampanyalar/indirim-{i}',
+    ]
+    urls = [sample[i % len(sample)].format(i=i) for i in range(10000)]
+    corpus.append(('extract_stock_code_from_url', 'sentetik 10k URL', urls))
+    # Toplu API: içe aktarılan listelerde aynı ürün birçok kez geçer
+    corpus += [
+        ('extract_stock_codes', 'sentetik 10k URL', urls),
+        ('extract_stock_codes', 'tekrarlı 10k URL', urls[:1000] * 10),
+    ]
+    return corpus
+
+
+def page_size(payload) -> int:
+    if isinstance(payload, list):
+        return sum(len(u) for u in payload)
+    return len(payload.encode('utf-8'))
+
+
+def digest(result) -> str:
+    return hashlib.sha1(json.dumps(result, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def measure(fn: Callable, payload, min_runs: int, min_time: float, max_runs: int = 200) -> Dict:
+    result = fn(payload)  # ısınma + çıktı
+    times = []
+    started = time.perf_counter()
+    while len(times) < min_runs or (time.perf_counter() - started < min_time and len(times) < max_runs):
+        t0 = time.perf_counter()
+        fn(payload)
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    fn(payload)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    times.sort()
+    median = times[len(times) // 2]
+    cards = len(result)
+    return {
+        'pages_per_s': round(1 / median, 2),
+        'cards_per_s': round(cards / median, 1),
+        'p95_ms': round(times[min(len(times) - 1, int(0.95 * len(times)))] * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+        'cards': cards,
+        'digest': digest(result),
+        'runs': len(times),
+    }
+
+
+def best_of(a: Dict, b: Dict) -> Dict:
+    best = dict(a)
+    best['pages_per_s'] = max(a['pages_per_s'], b['pages_per_s'])
+    best['cards_per_s'] = max(a['cards_per_s'], b['cards_per_s'])
+    best['p95_ms'] = min(a['p95_ms'], b['p95_ms'])
+    best['peak_kb'] = min(a['peak_kb'], b['peak_kb'])
+    best['runs'] = a['runs'] + b['runs']
+    return best
+
+
+def compare(key: str, current: Dict, base: Dict, tolerance: float, mem_tolerance: float) -> List[str]:
+    """Baseline'a göre geriye gidişler (boş liste = sorun yok)"""
+    problems = []
+    if current['digest'] != base['digest']:
+        problems.append(f"çıktı değişti ({base['cards']} -> {current['cards']} öğe)")
+    if current['pages_per_s'] < base['pages_per_s'] * (1 - tolerance):
+        problems.append(f"sayfa/sn {base['pages_per_s']} -> {current['pages_per_s']}")
+    if current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+        problems.append(f"p95 {base['p95_ms']} ms -> {current['p95_ms']} ms")
+    # Küçük sayfalarda birkaç KB'lık oynama gürültüdür
+    if current['peak_kb'] > base['peak_kb'] * (1 + mem_tolerance) + 64:
+        problems.append(f"tepe bellek {base['peak_kb']} KB -> {current['peak_kb']} KB")
+    return [f"{key}: {p}" for p in problems]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='kayıtlı sayfa klasörü')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline JSON dosyası')
+    parser.add_argument('--save-baseline', action='store_true', help='sonuçları baseline olarak kaydet')
+    parser.add_argument('--only', action='append', help='yalnızca bu parser (tekrarlanabilir)')
+    parser.add_argument('--tolerance', type=float, default=0.30, help='hız/p95 için izin verilen oran (0.30 = %%30)')
+    parser.add_argument('--mem-tolerance', type=float, default=0.20, help='tepe bellek için izin verilen oran')
+    parser.add_argument('--quick', action='store_true', help='daha az tekrar (gürültülü, yalnızca kontrol için)')
+    args = parser.parse_args()
+
+    min_runs, min_time = (3, 0.1) if args.quick else (7, 0.5)
+    parsers = build_parsers()
+    corpus = [c for c in load_corpus(args.fixtures) if not args.only or c[0] in args.only]
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('cases', {})
+
+    print(f"{'parser':<30}{'sayfa':<28}{'boyut':>9}{'öğe':>6}{'sayfa/sn':>10}{'öğe/sn':>11}"
+          f"{'p95 ms':>9}{'tepe KB':>9}  baseline")
+    results, problems, totals = {}, [], {}
+    for name, page, payload in corpus:
+        metrics = measure(parsers[name], payload, min_runs, min_time)
+        key = f'{name}/{page}'
+        base = baseline.get(key)
+        found = compare(key, metrics, base, args.tolerance, args.mem_tolerance) if base else []
+        for _ in range(RETRIES if found else 0):
+            # Tek seferlik gürültü (GC, zamanlayıcı) geriye gidiş sayılmasın: yeniden ölç, en iyisini tut
+            again = measure(parsers[name], payload, min_runs, min_time)
+            metrics = best_of(metrics, again)
+            found = compare(key, metrics, base, args.tolerance, args.mem_tolerance)
+            if not found:
+                break
+        results[key] = metrics
+        problems += found
+        status = 'yeni' if base is None else ('GERİLEDİ' if found else f"x{metrics['pages_per_s'] / base['pages_per_s']:.2f}")
+        print(f"{name:<30}{page[:27]:<28}{page_size(payload) / 1024:>7.0f}KB{metrics['cards']:>6}"
+              f"{metrics['pages_per_s']:>10.1f}{metrics['cards_per_s']:>11.0f}{metrics['p95_ms']:>9.2f}"
+              f"{metrics['peak_kb']:>9.0f}  {status}")
+        total = totals.setdefault(name, {'pages': 0, 'cards': 0, 'seconds': 0.0, 'peak_kb': 0.0})
+        total['pages'] += 1
+        total['cards'] += metrics['cards']
+        total['seconds'] += 1 / metrics['pages_per_s']
+        total['peak_kb'] = max(total['peak_kb'], metrics['peak_kb'])
+
+    print("\nParser özeti (tüm sayfalar):")
+    for name, total in totals.items():
+        print(f"  {name:<30}{total['pages'] / total['seconds']:>10.1f} sayfa/sn{total['cards'] / total['seconds']:>12.0f} öğe/sn"
+              f"{total['peak_kb']:>10.0f} KB tepe")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'cpu_count': os.cpu_count(),
+                    'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                },
+                'cases': results,
+            }, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n💾 Baseline kaydedildi: {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\n⚠️ Baseline yok ({args.baseline}); --save-baseline ile oluşturun")
+        return 0
+    if problems:
+        print(f"\n❌ {len(problems)} geriye gidiş:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print("\n✅ Baseline'a göre geriye gidiş yok")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Uçtan uca arama ölçümü: uygulama yerel sahte sitelere karşı çalışır.
+
+benchmarks/standin_sites.py bu süreçte başlatılır, uygulama ayrı bir süreçte
+HB_BASE_URL/GOOGLE_URL/BING_URL/DUCK_URL sahte sunucuya yönlendirilerek açılır.
+Eşzamanlı istemciler /api/search-hb'ye arama gönderir; gecikme dağılımı,
+istek/sn, hata ve boş sonuç sayıları ile sahte sunucunun sayaçları yazılır.
+
+Kullanım:
+    python benchmarks/search_e2e.py                                # HTTP yolu (kartlar HTML'de)
+    python benchmarks/search_e2e.py --js-ratio 1 --js-delay 1500   # tarayıcı yolu (Chrome gerekir)
+    python benchmarks/search_e2e.py --concurrency 16 --requests 400 --terms 50 --error-rate 0.05
+
+`--terms` 0 ise her arama benzersizdir (cache'e düşmez); küçük bir değer
+aynı terimlerin tekrarlanmasıyla cache ve eşzamanlı arama birleştirmeyi de
+ölçer. Sahte sunucu ayarları standin_sites.py ile aynıdır.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from load_test import percentile, wait_for_port  # noqa: E402
+from standin_sites import add_arguments, app_env, build_sites, start_standin  # noqa: E402
+
+
+def run_searches(base: str, terms: List[str], concurrency: int) -> List[Dict]:
+    local = threading.local()
+
+    def one(term: str) -> Dict:
+        # İstemci thread'i başına keep-alive oturum
+        session = getattr(local, 'session', None) or requests.Session()
+        local.session = session
+        started = time.perf_counter()
+        try:
+            r = session.post(f'{base}/api/search-hb', json={'barcode': term}, timeout=120)
+            products = r.json().get('products', []) if r.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            products = None
+        return {'elapsed': time.perf_counter() - started, 'products': products}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(one, terms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='toplam arama sayısı')
+    parser.add_argument('--concurrency', type=int, default=8, help='eşzamanlı istemci')
+    parser.add_argument('--terms', type=int, default=0, help='farklı terim sayısı (0 = hepsi benzersiz)')
+    parser.add_argument('--port', type=int, default=5201, help='uygulama portu')
+    parser.add_argument('--workers', type=int, default=1, help='SERVE_WORKERS')
+    parser.add_argument('--pool-size', type=int, default=2, help='DRIVER_POOL_SIZE')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    sites = build_sites(args)
+    standin, standin_url = start_standin(sites=sites)
+    data_dir = tempfile.mkdtemp(prefix='hb_e2e_')
+    env = dict(os.environ)
+    env.update(app_env(standin_url))
+    env.update({
+        'SERVE_WORKERS': str(args.workers),
+        'SERVE_PORT': str(args.port),
+        'CART_DATA_DIR': data_dir,
+        'DEVELOPMENT_MODE': 'True',
+        'DRIVER_POOL_SIZE': str(args.pool_size),
+        'DRIVER_PREWARM': '1' if args.js_ratio > 0 else '0',
+        'BROWSER': 'true',
+        'PYTHONUNBUFFERED': '1',
+    })
+    base = f'http://127.0.0.1:{args.port}'
+    log = open(os.path.join(data_dir, 'server.log'), 'w')
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'app.py')], cwd=data_dir, env=env,
+                              stdout=log, stderr=subprocess.STDOUT)
+    try:
+        if not wait_for_port(args.port):
+            raise SystemExit(f'❌ Uygulama başlamadı, bkz. {log.name}')
+        distinct = args.terms or args.requests
+        terms = [f'{8690000000000 + (i % distinct)}' for i in range(args.requests)]
+        started = time.perf_counter()
+        results = run_searches(base, terms, args.concurrency)
+        wall = time.perf_counter() - started
+    finally:
+        try:
+            requests.post(f'{base}/api/shutdown', timeout=2)
+        except requests.RequestException:
+            pass
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+        standin.shutdown()
+
+    latencies = [r['elapsed'] for r in results]
+    errors = sum(1 for r in results if r['products'] is None)
+    empty = sum(1 for r in results if r['products'] == [])
+    print(f"🎭 Sahte siteler: {standin_url} (seed {args.seed})")
+    print(f"🔍 {len(results)} arama, {args.concurrency} eşzamanlı, {wall:.1f} sn -> {len(results) / wall:.1f} arama/sn")
+    print(f"⏱️ p50 {percentile(latencies, 0.50) * 1000:.0f} ms | p95 {percentile(latencies, 0.95) * 1000:.0f} ms"
+          f" | p99 {percentile(latencies, 0.99) * 1000:.0f} ms | en fazla {max(latencies) * 1000:.0f} ms")
+    print(f"❗ hata: {errors}, boş sonuç: {empty}")
+    for site, stats in sites.snapshot()['sites'].items():
+        print(f"   {site}: {stats['requests']} istek, ok {stats['ok']}, js {stats['js']}, boş {stats['empty']},"
+              f" hata {stats['errors']}, ort. gecikme {stats['avg_delay_ms']} ms")
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
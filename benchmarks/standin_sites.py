@@ -0,0 +1,294 @@
+"""Yerel sahte site sunucusu: Hepsiburada, Google, Bing ve DuckDuckGo sayfalarını tekrar oynatır.
+
+benchmarks/fixtures/ altındaki kayıtlı sayfalar (hb_*, google_*, bing_*,
+duck_*) ayarlanabilir gecikme, hata oranı ve boş sonuç oranıyla sunulur.
+Hepsiburada sayfalarının bir kısmı (`--js-ratio`) kartlar HTML'de olmadan,
+iskelet sayfa olarak gelir; kartlar `--js-delay` ms içinde `--js-batches`
+parça halinde JavaScript ile eklenir. Böylece HTTP-öncelikli aramanın
+tarayıcıya düşmesi, sayfa hazır olma beklemesi ve page_source yolu canlı
+siteye gitmeden ölçülebilir.
+
+Uygulamayı yönlendirmek için (.env ya da ortam değişkeni):
+    HB_BASE_URL=http://127.0.0.1:8765
+    GOOGLE_URL=http://127.0.0.1:8765/google/search
+    BING_URL=http://127.0.0.1:8765/bing/search
+    DUCK_URL=http://127.0.0.1:8765/duck/html/
+
+Kullanım:
+    python benchmarks/standin_sites.py
+    python benchmarks/standin_sites.py --latency 300 --jitter 200 --error-rate 0.05 --js-ratio 1 --js-delay 1500
+    python benchmarks/standin_sites.py --site hb:latency=800,error_rate=0.2 --site google:empty_rate=0.5
+
+Rastgele kararlar (gecikme, hata, JS) `--seed`, site, arama terimi ve o
+terimin kaçıncı isteği olduğundan türetilir: aynı istekler eşzamanlılıktan
+bağımsız olarak aynı davranışı görür. Sayaçlar GET /__stats ile okunur.
+"""
+import argparse
+import glob
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+# Yol -> site; HB_BASE_URL kök adres olduğu için Hepsiburada /ara altında
+ROUTES = {
+    '/ara': 'hb',
+    '/google/search': 'google',
+    '/bing/search': 'bing',
+    '/duck/html': 'duck',
+    '/duck/html/': 'duck',
+}
+# Sayfalardaki dış kaynaklar yerel sunucuya çevrilir (çevrimdışı, tekrarlanabilir)
+EXTERNAL_HOSTS = re.compile(r'https://(?:productimages|images|static)\.hepsiburada\.net')
+# 1x1 şeffaf GIF
+PIXEL = bytes.fromhex('47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b')
+
+HB_CARD_RE = re.compile(r'<article[^>]*productCard.*?</article>', re.DOTALL)
+# Kartların sarmalayıcıları ve öneri listeleri de (li.product*) kart sayılır
+HB_LIST_ITEM_RE = re.compile(r'<li[^>]*class="[^"]*product[^"]*"[^>]*>.*?</li>', re.DOTALL)
+INJECT_SCRIPT = """<script>
+(function () {
+  var cards = %s, batches = %d, delay = %d;
+  var list = document.getElementById('standin-results');
+  var per = Math.ceil(cards.length / batches), sent = 0;
+  function next() {
+    var html = cards.slice(sent, sent + per).map(function (c) { return '<li class="standin-card">' + c + '</li>'; });
+    list.insertAdjacentHTML('beforeend', html.join(''));
+    sent += per;
+    if (sent < cards.length) setTimeout(next, delay / batches);
+  }
+  if (cards.length) setTimeout(next, delay / batches);
+})();
+</script>"""
+
+
+class SiteBehavior:
+    """Tek bir sitenin gecikme/hata/boş sonuç ayarları"""
+
+    FIELDS = ('latency', 'jitter', 'error_rate', 'empty_rate', 'js_ratio', 'js_delay', 'js_batches')
+
+    def __init__(self, latency: float = 150, jitter: float = 100, error_rate: float = 0.0, empty_rate: float = 0.0,
+                 js_ratio: float = 0.0, js_delay: float = 1200, js_batches: int = 3):
+        self.latency = latency        # ms
+        self.jitter = jitter          # ms, [0, jitter) eklenir
+        self.error_rate = error_rate  # 503 dönen isteklerin oranı
+        self.empty_rate = empty_rate  # sonuçsuz sayfa oranı
+        self.js_ratio = js_ratio      # (yalnızca hb) kartları JavaScript ile gelen sayfa oranı
+        self.js_delay = js_delay      # ms, son kart partisinin eklenme süresi
+        self.js_batches = js_batches
+
+    def update(self, spec: str):
+        """'latency=400,error_rate=0.1' biçimindeki ayarları uygula"""
+        for pair in filter(None, spec.split(',')):
+            key, _, value = pair.partition('=')
+            key = key.strip()
+            if key not in self.FIELDS:
+                raise ValueError(f'Bilinmeyen ayar: {key}')
+            setattr(self, key, type(getattr(self, key))(float(value)))
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class StandinSites:
+    """Sayfa havuzu, site davranışları ve sayaçlar"""
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, seed: int = 1, behaviors: Dict[str, SiteBehavior] = None):
+        self.seed = seed
+        self.behaviors = behaviors or {}
+        self.pages: Dict[str, List[str]] = {site: [] for site in ('hb', 'google', 'bing', 'duck')}
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+            site = os.path.basename(path).split('_', 1)[0]
+            if site in self.pages:
+                with open(path, encoding='utf-8', errors='replace') as f:
+                    self.pages[site].append(f.read())
+        missing = [site for site, pages in self.pages.items() if not pages]
+        if missing:
+            raise SystemExit(f"❌ Fixture bulunamadı: {', '.join(missing)} ({fixtures_dir})")
+        self._lock = threading.Lock()
+        self._seen: Dict[str, int] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def behavior(self, site: str) -> SiteBehavior:
+        return self.behaviors.setdefault(site, SiteBehavior())
+
+    def decide(self, site: str, term: str) -> random.Random:
+        """Site + terim + terimin kaçıncı isteği olduğuna göre tekrarlanabilir RNG"""
+        key = f'{site}:{term}'
+        with self._lock:
+            n = self._seen.get(key, 0)
+            self._seen[key] = n + 1
+        return random.Random(f'{self.seed}:{key}:{n}')
+
+    def record(self, site: str, outcome: str, size: int, delay: float):
+        with self._lock:
+            s = self.stats.setdefault(site, {'requests': 0, 'ok': 0, 'errors': 0, 'empty': 0, 'js': 0,
+                                             'bytes': 0, 'delay_ms': 0.0})
+            s['requests'] += 1
+            s[outcome] += 1
+            s['bytes'] += size
+            s['delay_ms'] += delay * 1000
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            sites = {
+                site: dict(s, avg_delay_ms=round(s['delay_ms'] / s['requests'], 1))
+                for site, s in self.stats.items() if s['requests']
+            }
+        return {'seed': self.seed, 'behaviors': {k: v.to_dict() for k, v in self.behaviors.items()}, 'sites': sites}
+
+    def render(self, site: str, term: str, base_url: str):
+        """(status, body, içerik türü, sonuç türü) + uygulanacak gecikme"""
+        rng = self.decide(site, term)
+        behavior = self.behavior(site)
+        delay = (behavior.latency + rng.random() * behavior.jitter) / 1000
+        if rng.random() < behavior.error_rate:
+            return 503, 'Service Unavailable', 'text/plain; charset=utf-8', 'errors', delay
+
+        pages = self.pages[site]
+        page = pages[sum(map(ord, term)) % len(pages)]
+        outcome = 'ok'
+        if rng.random() < behavior.empty_rate:
+            page = self.empty_page(site, page)
+            outcome = 'empty'
+        elif site == 'hb' and rng.random() < behavior.js_ratio:
+            page = self.js_page(page, behavior)
+            outcome = 'js'
+        page = EXTERNAL_HOSTS.sub(base_url + '/static', page)
+        page = page.replace('<title>barkod', f'<title>{html.escape(term)}', 1)
+        return 200, page, 'text/html; charset=utf-8', outcome, delay
+
+    @staticmethod
+    def empty_page(site: str, page: str) -> str:
+        """Sonuç bloklarını çıkarılmış sayfa (sonuçsuz arama)"""
+        if site == 'hb':
+            return HB_LIST_ITEM_RE.sub('', HB_CARD_RE.sub('', page))
+        patterns = {
+            'google': re.compile(r'<h3[^>]*>.*?</h3>', re.DOTALL),
+            'bing': re.compile(r'<li class="b_algo".*?</li>', re.DOTALL),
+            'duck': re.compile(r'<a[^>]*class="[^"]*result__a[^"]*"[^>]*>.*?</a>', re.DOTALL),
+        }
+        return patterns[site].sub('', page)
+
+    @staticmethod
+    def js_page(page: str, behavior: SiteBehavior) -> str:
+        """Kartları HTML'den çıkar, gecikmeli olarak JavaScript ile ekle.
+        Kartlar `<` kaçışlı JSON olarak gömülür: düz HTTP ile gelen sayfada kart görünmez.
+        """
+        cards = HB_CARD_RE.findall(page)
+        shell = StandinSites.empty_page('hb', page)
+        payload = json.dumps(cards, ensure_ascii=False).replace('<', '\\u003c').replace('>', '\\u003e')
+        script = INJECT_SCRIPT % (payload, max(1, int(behavior.js_batches)), int(behavior.js_delay))
+        return shell.replace('</body>', f'<ul id="standin-results"></ul>{script}</body>', 1)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive (requests.Session, Chrome)
+    sites: StandinSites = None
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/__stats':
+            return self._send(200, json.dumps(self.sites.snapshot(), ensure_ascii=False), 'application/json')
+        if parsed.path.startswith('/static/'):
+            if parsed.path.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
+                return self._send(200, PIXEL, 'image/gif')
+            return self._send(200, '', 'text/css' if parsed.path.endswith('.css') else 'application/javascript')
+        site = ROUTES.get(parsed.path)
+        if site is None:
+            return self._send(404, 'Not Found', 'text/plain; charset=utf-8')
+
+        term = (parse_qs(parsed.query).get('q') or [''])[0]
+        base_url = f'http://{self.headers.get("Host") or "%s:%d" % self.server.server_address[:2]}'
+        status, body, content_type, outcome, delay = self.sites.render(site, term, base_url)
+        time.sleep(delay)
+        size = self._send(status, body, content_type)
+        self.sites.record(site, outcome, size, delay)
+
+    def _send(self, status: int, body, content_type: str) -> int:
+        data = body if isinstance(body, bytes) else body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+        return len(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_standin(host: str = '127.0.0.1', port: int = 0, sites: StandinSites = None):
+    """Sunucuyu arka plan thread'inde başlat: (sunucu, kök adres). port=0 boş port seçer."""
+    handler = type('Handler', (StandinHandler,), {'sites': sites or StandinSites()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='standin-sites', daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def app_env(base_url: str) -> Dict[str, str]:
+    """Uygulamayı sahte sunucuya yönlendiren ortam değişkenleri"""
+    return {
+        'HB_BASE_URL': base_url,
+        'GOOGLE_URL': f'{base_url}/google/search',
+        'BING_URL': f'{base_url}/bing/search',
+        'DUCK_URL': f'{base_url}/duck/html/',
+    }
+
+
+def build_sites(args) -> StandinSites:
+    defaults = dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, empty_rate=args.empty_rate,
+                    js_ratio=args.js_ratio, js_delay=args.js_delay, js_batches=args.js_batches)
+    behaviors = {site: SiteBehavior(**defaults) for site in ('hb', 'google', 'bing', 'duck')}
+    for spec in args.site or []:
+        site, _, settings = spec.partition(':')
+        if site not in behaviors:
+            raise SystemExit(f'❌ Bilinmeyen site: {site}')
+        behaviors[site].update(settings)
+    return StandinSites(args.fixtures, seed=args.seed, behaviors=behaviors)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='kayıtlı sayfa klasörü')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=150, help='yanıt gecikmesi (ms)')
+    parser.add_argument('--jitter', type=float, default=100, help='gecikmeye eklenen rastgele pay (ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 dönen istek oranı')
+    parser.add_argument('--empty-rate', type=float, default=0.0, help='sonuçsuz sayfa oranı')
+    parser.add_argument('--js-ratio', type=float, default=0.0, help='kartları JavaScript ile gelen HB sayfası oranı')
+    parser.add_argument('--js-delay', type=float, default=1200, help='JS kartlarının tamamlanma süresi (ms)')
+    parser.add_argument('--js-batches', type=int, default=3, help='JS kartlarının kaç partide ekleneceği')
+    parser.add_argument('--site', action='append', help="site bazlı ayar, ör. 'hb:latency=800,error_rate=0.2'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server, base_url = start_standin(args.host, args.port, build_sites(args))
+    print(f"🎭 Sahte siteler: {base_url}")
+    for key, value in app_env(base_url).items():
+        print(f"   {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
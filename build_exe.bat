@@ -24,13 +24,13 @@ python -m PyInstaller --onefile ^
     --add-data ".env;." ^
     --hidden-import=flask ^
     --hidden-import=selenium ^
-    --hidden-import=pandas ^
     --hidden-import=openpyxl ^
     --hidden-import=webbrowser ^
     --hidden-import=threading ^
     --hidden-import=ctypes ^
     --hidden-import=dotenv ^
     --hidden-import=requests ^
+    --hidden-import=psutil ^
     --hidden-import=urllib3 ^
     --hidden-import=certifi ^
     --hidden-import=charset_normalizer ^